@@ -0,0 +1,125 @@
+"""Account e-mail campaign sender.
+
+The message template is compiled once per campaign and the contacts that
+already have a log row are loaded in one query. Recipients are then
+rendered and sent in batches over one mail connection. Before a batch is
+sent its log rows are written as unsent, and they are marked sent (or
+removed, for messages the server refused) once the batch is done. A run
+that is interrupted can therefore be started again: it skips every
+contact with a sent log row, and every contact with an unsent one still
+within its ``LEASE``, which belongs to a batch another run may be
+sending. Unsent rows older than that were left by a run that died
+mid-batch; they are dropped and their contacts sent to again, which may
+repeat the few messages that run sent without marking them.
+"""
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.template import Context, Template
+from django.utils import timezone
+
+from accounts.models import AccountEmail, AccountEmailLog
+
+BATCH_SIZE = 100
+# Well above the time one batch takes to send.
+LEASE = timedelta(minutes=30)
+
+
+def contact_context(primary_email, first_name, last_name):
+    return {
+        "email": primary_email or "",
+        "name": " ".join(name for name in (first_name, last_name) if name),
+    }
+
+
+def pending_recipients(email_obj):
+    """``(id, email, first name, last name)`` of contacts not yet logged."""
+    AccountEmailLog.objects.filter(
+        email=email_obj, is_sent=False, created_at__lt=timezone.now() - LEASE
+    ).delete()
+    logged = set(
+        AccountEmailLog.objects.filter(email=email_obj).values_list(
+            "contact_id", flat=True
+        )
+    )
+    recipients = (
+        email_obj.recipients.exclude(primary_email__isnull=True)
+        .exclude(primary_email="")
+        .order_by("id")
+        .values_list("id", "primary_email", "first_name", "last_name")
+    )
+    for recipient in recipients.iterator():
+        if recipient[0] not in logged:
+            yield recipient
+
+
+class CampaignSender:
+    """Send one ``AccountEmail`` to every recipient that has not had it."""
+
+    def __init__(self, email_obj, batch_size=BATCH_SIZE, connection=None):
+        self.email_obj = email_obj
+        self.batch_size = batch_size
+        self.connection = connection or get_connection()
+        self.template = Template(email_obj.message_body or "")
+        self.sent = 0
+        self.failed = 0
+        self.rendered = None
+
+    def run(self):
+        batch = []
+        with self.connection:
+            for recipient in pending_recipients(self.email_obj):
+                batch.append(recipient)
+                if len(batch) >= self.batch_size:
+                    self.send_batch(batch)
+                    batch = []
+            if batch:
+                self.send_batch(batch)
+        if self.rendered is not None:
+            AccountEmail.objects.filter(pk=self.email_obj.pk).update(
+                rendered_message_body=self.rendered
+            )
+        return {"sent": self.sent, "failed": self.failed}
+
+    def render(self, contact_id, primary_email, first_name, last_name):
+        html_content = self.template.render(
+            Context(contact_context(primary_email, first_name, last_name))
+        )
+        msg = EmailMessage(
+            self.email_obj.message_subject,
+            html_content,
+            from_email=self.email_obj.from_email,
+            to=[primary_email],
+            connection=self.connection,
+        )
+        msg.content_subtype = "html"
+        return msg
+
+    def send_batch(self, batch):
+        logs = AccountEmailLog.objects.bulk_create(
+            [
+                AccountEmailLog(email=self.email_obj, contact_id=contact_id)
+                for contact_id, *_ in batch
+            ]
+        )
+        sent = []
+        failed = []
+        for log, recipient in zip(logs, batch):
+            try:
+                msg = self.render(*recipient)
+                msg.send()
+            except Exception:
+                failed.append(log.id)
+            else:
+                sent.append(log.id)
+                if self.rendered is None:
+                    self.rendered = msg.body
+        AccountEmailLog.objects.filter(id__in=sent).update(is_sent=True)
+        # Refused messages get no log row, so the next run retries them.
+        AccountEmailLog.objects.filter(id__in=failed).delete()
+        self.sent += len(sent)
+        self.failed += len(failed)
+
+
+def send_campaign(email_obj, batch_size=BATCH_SIZE, connection=None):
+    return CampaignSender(email_obj, batch_size=batch_size, connection=connection).run()
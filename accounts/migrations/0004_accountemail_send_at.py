@@ -0,0 +1,52 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:09
+
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.timezone import localtime
+
+from common.utils import convert_to_custom_timezone
+
+
+def set_send_at(apps, schema_editor):
+    AccountEmail = apps.get_model('accounts', 'AccountEmail')
+    pending = AccountEmail.objects.filter(
+        scheduled_later=True, scheduled_date_time__isnull=False
+    )
+    now = timezone.now()
+    expired = []
+    for email in pending.iterator():
+        send_at = convert_to_custom_timezone(
+            localtime(email.scheduled_date_time), email.timezone, to_utc=True
+        )
+        if send_at > now:
+            email.send_at = send_at
+            email.save(update_fields=['send_at'])
+        else:
+            expired.append(email.pk)
+    # Times already past were missed by the old minute-match loop; sending
+    # them all on the first tick after deploy would be worse than never.
+    # Clearing scheduled_later also keeps a later save from re-arming them.
+    for start in range(0, len(expired), 1000):
+        AccountEmail.objects.filter(pk__in=expired[start:start + 1000]).update(
+            scheduled_later=False
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_account_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountemail',
+            name='send_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_send_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='accountemail',
+            index=models.Index(condition=models.Q(('scheduled_later', True)), fields=['send_at'], name='account_email_due_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import arrow
 from django.db import models
 from django.utils.text import slugify
+from django.utils.timezone import localtime
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
 from phonenumber_field.modelfields import PhoneNumberField
@@ -152,16 +153,37 @@ class AccountEmail(BaseModel):
     scheduled_later = models.BooleanField(default=False)
     from_email = models.EmailField()
     rendered_message_body = models.TextField(null=True)
+    # When a scheduled e-mail is due, in UTC; only set while it is pending.
+    send_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = "Account Email"
         verbose_name_plural = "Account Emails"
         db_table = "account_email"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["send_at"],
+                condition=models.Q(scheduled_later=True),
+                name="account_email_due_idx",
+            )
+        ]
 
     def __str__(self):
         return f"{self.message_subject}"
 
+    def scheduled_send_at(self):
+        """``scheduled_date_time`` read as wall time in ``timezone``, in UTC."""
+        if not (self.scheduled_later and self.scheduled_date_time):
+            return None
+        return utils.convert_to_custom_timezone(
+            localtime(self.scheduled_date_time), self.timezone, to_utc=True
+        )
+
+    def save(self, *args, **kwargs):
+        self.send_at = self.scheduled_send_at()
+        super().save(*args, **kwargs)
+
 class AccountEmailLog(BaseModel):
     """this model is used to track if the email is sent or not"""
 
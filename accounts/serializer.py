@@ -1,3 +1,4 @@
+import pytz
 from rest_framework import serializers
 
 from accounts.models import Account, AccountEmail, Tags, AccountEmailLog
@@ -62,6 +63,7 @@ class AccountSerializer(serializers.ModelSerializer):
 
 class EmailSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
+        kwargs.pop("request_obj", None)
         super().__init__(*args, **kwargs)
 
     class Meta:
@@ -94,6 +96,11 @@ class EmailSerializer(serializers.ModelSerializer):
             )
         return message_body
 
+    def validate_timezone(self, timezone):
+        if timezone not in pytz.all_timezones_set:
+            raise serializers.ValidationError("Enter a valid time zone.")
+        return timezone
+
 
 class EmailLogSerializer(serializers.ModelSerializer):
     email = EmailSerializer()
@@ -1,112 +1,73 @@
-from datetime import datetime
+from functools import partial
 
-import pytz
 from celery import Celery
 from django.conf import settings
-from django.core.mail import EmailMessage
-from django.template import Context, Template
-from django.template.loader import render_to_string
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
 
-from accounts.models import Account, AccountEmail, AccountEmailLog
-from common.models import Profile
-from common.utils import convert_to_custom_timezone
+from accounts.campaigns import send_campaign
+from accounts.models import Account, AccountEmail
+from common.notifications import notify_profiles
 
 app = Celery("redis://")
 
+CAMPAIGN_LOCK_TIMEOUT = 60 * 60
+SCHEDULED_BATCH_SIZE = 100
+
 
 @app.task
 def send_email(email_obj_id):
-    email_obj = Email.objects.filter(id=email_obj_id).first()
-    if email_obj:
-        from_email = email_obj.from_email
-        contacts = email_obj.recipients.all()
-        for contact_obj in contacts:
-            if not EmailLog.objects.filter(
-                email=email_obj, contact=contact_obj, is_sent=True
-            ).exists():
-                html = email_obj.message_body
-                context_data = {
-                    "email": contact_obj.primary_email
-                    if contact_obj.primary_email
-                    else "",
-                    "name": contact_obj.first_name
-                    if contact_obj.first_name
-                    else "" + " " + contact_obj.last_name
-                    if contact_obj.last_name
-                    else "",
-                }
-                try:
-                    html_content = Template(html).render(Context(context_data))
-                    subject = email_obj.message_subject
-                    msg = EmailMessage(
-                        subject,
-                        html_content,
-                        from_email=from_email,
-                        to=[
-                            contact_obj.primary_email,
-                        ],
-                    )
-                    msg.content_subtype = "html"
-                    res = msg.send()
-                    if res:
-                        email_obj.rendered_message_body = html_content
-                        email_obj.save()
-                        EmailLog.objects.create(
-                            email=email_obj, contact=contact_obj, is_sent=True
-                        )
-                except Exception as e:
-                    print(e)
+    """Send an account e-mail to its recipients; safe to run again after a crash."""
+    lock_key = f"accounts:email:{email_obj_id}:sending"
+    if not cache.add(lock_key, True, CAMPAIGN_LOCK_TIMEOUT):
+        return None
+    try:
+        email_obj = AccountEmail.objects.filter(id=email_obj_id).first()
+        if email_obj:
+            return send_campaign(email_obj)
+    finally:
+        cache.delete(lock_key)
 
 
 @app.task
 def send_email_to_assigned_user(recipients, from_email):
     """Send Mail To Users When they are assigned to a contact"""
     account = Account.objects.filter(id=from_email).first()
-    created_by = account.created_by
-
-    for profile_id in recipients:
-        recipients_list = []
-        profile = Profile.objects.filter(id=profile_id, is_active=True).first()
-        if profile:
-            recipients_list.append(profile.user.email)
-            context = {}
-            context["url"] = settings.DOMAIN_NAME
-            context["user"] = profile.user
-            context["account"] = account
-            context["created_by"] = created_by
-            subject = "Assigned a account for you."
-            html_content = render_to_string(
-                "assigned_to/account_assigned.html", context=context
-            )
-
-            msg = EmailMessage(subject, html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    context = {
+        "url": settings.DOMAIN_NAME,
+        "account": account,
+        "created_by": account.created_by,
+    }
+    notify_profiles(
+        recipients,
+        "assigned_to/account_assigned.html",
+        "Assigned a account for you.",
+        context,
+        obj=account,
+    )
 
 
 @app.task
-def send_scheduled_emails():
-    email_objs = Email.objects.filter(scheduled_later=True)
-    # TODO: modify this later , since models are updated
-    for each in email_objs:
-        scheduled_date_time = each.scheduled_date_time
-
-        sent_time = datetime.now().strftime("%Y-%m-%d %H:%M")
-        sent_time = datetime.strptime(sent_time, "%Y-%m-%d %H:%M")
-        local_tz = pytz.timezone(settings.TIME_ZONE)
-        sent_time = local_tz.localize(sent_time)
-        sent_time = convert_to_custom_timezone(sent_time, each.timezone, to_utc=True)
+def send_scheduled_emails(batch_size=SCHEDULED_BATCH_SIZE):
+    """Hand every due scheduled e-mail to ``send_email`` exactly once.
 
-        # if (
-        #     str(each.scheduled_date_time.date()) == str(sent_time.date()) and
-        #     str(scheduled_date_time.hour) == str(sent_time.hour) and
-        #     (str(scheduled_date_time.minute + 5) < str(sent_time.minute) or
-        #     str(scheduled_date_time.minute - 5) > str(sent_time.minute))
-        # ):
-        #     send_email.delay(each.id)
-        if (
-            str(each.scheduled_date_time.date()) == str(sent_time.date())
-            and str(scheduled_date_time.hour) == str(sent_time.hour)
-            and str(scheduled_date_time.minute) == str(sent_time.minute)
-        ):
-            send_email.delay(each.id)
+    Due rows are found through the partial ``send_at`` index and claimed
+    with ``SKIP LOCKED``; clearing ``scheduled_later`` takes them out of
+    the index, so concurrent or later ticks never see them again.
+    """
+    claimed = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                AccountEmail.objects.select_for_update(skip_locked=True)
+                .filter(scheduled_later=True, send_at__lte=timezone.now())
+                .order_by("send_at")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            AccountEmail.objects.filter(id__in=ids).update(scheduled_later=False)
+            for email_id in ids:
+                transaction.on_commit(partial(send_email.delay, email_id))
+        claimed += len(ids)
+        if len(ids) < batch_size:
+            return claimed
@@ -0,0 +1,125 @@
+import datetime
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.campaigns import send_campaign
+from accounts.models import AccountEmail, AccountEmailLog
+from accounts.tasks import send_scheduled_emails
+from common.models import Org
+from contacts.models import Contact
+
+
+class CampaignSenderTest(TestCase):
+    def setUp(self):
+        org = Org.objects.create(name="campaign org")
+        self.contacts = [
+            Contact.objects.create(
+                first_name=f"Contact{number}",
+                last_name="Doe",
+                primary_email=f"contact{number}@example.com",
+                org=org,
+            )
+            for number in range(5)
+        ]
+        self.email = AccountEmail.objects.create(
+            message_subject="Offer",
+            message_body="<p>Hi {{ name }} ({{ email }})</p>",
+            from_email="crm@example.com",
+        )
+        self.email.recipients.set(self.contacts)
+
+    def test_sends_once_per_contact_in_batches(self):
+        AccountEmailLog.objects.create(
+            email=self.email, contact=self.contacts[0], is_sent=True
+        )
+        result = send_campaign(self.email, batch_size=2)
+        self.assertEqual(result, {"sent": 4, "failed": 0})
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIn(
+            "<p>Hi Contact1 Doe (contact1@example.com)</p>",
+            [message.body for message in mail.outbox],
+        )
+        self.assertEqual(AccountEmailLog.objects.filter(is_sent=True).count(), 5)
+        self.email.refresh_from_db()
+        self.assertIn("Doe", self.email.rendered_message_body)
+
+        self.assertEqual(send_campaign(self.email), {"sent": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_batches_of_a_crashed_run_are_retried_after_the_lease(self):
+        stale, _ = [
+            AccountEmailLog.objects.create(email=self.email, contact=contact)
+            for contact in self.contacts[:2]
+        ]
+        AccountEmailLog.objects.filter(id=stale.id).update(
+            created_at=timezone.now() - datetime.timedelta(hours=1)
+        )
+        self.assertEqual(send_campaign(self.email), {"sent": 4, "failed": 0})
+        self.assertNotIn(
+            self.contacts[1].primary_email, [message.to[0] for message in mail.outbox]
+        )
+        self.assertFalse(AccountEmailLog.objects.filter(id=stale.id).exists())
+
+    def test_refused_messages_are_retried_on_the_next_run(self):
+        calls = {"count": 0}
+        send = locmem.EmailBackend.send_messages
+
+        def flaky(backend, messages):
+            calls["count"] += 1
+            if calls["count"] == 2:
+                raise OSError("refused")
+            return send(backend, messages)
+
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages", flaky
+        ):
+            self.assertEqual(send_campaign(self.email), {"sent": 4, "failed": 1})
+        self.assertEqual(send_campaign(self.email), {"sent": 1, "failed": 0})
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(contact.primary_email for contact in self.contacts),
+        )
+
+
+class ScheduledEmailTest(TestCase):
+    def schedule(self, when, tz="Europe/Madrid"):
+        return AccountEmail.objects.create(
+            message_subject="Later",
+            message_body="<p>Hi</p>",
+            from_email="crm@example.com",
+            timezone=tz,
+            scheduled_later=True,
+            scheduled_date_time=when,
+        )
+
+    def test_send_at_is_wall_time_in_the_email_time_zone(self):
+        email = self.schedule(
+            timezone.make_aware(datetime.datetime(2026, 7, 1, 10, 0)),
+            tz="America/New_York",
+        )
+        self.assertEqual(
+            email.send_at,
+            datetime.datetime(2026, 7, 1, 14, 0, tzinfo=datetime.timezone.utc),
+        )
+
+    def test_due_emails_are_handed_off_once(self):
+        now = timezone.now()
+        due = [
+            self.schedule(now - datetime.timedelta(hours=hours)) for hours in (1, 2, 3)
+        ]
+        later = self.schedule(now + datetime.timedelta(hours=1))
+        with mock.patch("accounts.tasks.send_email.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(send_scheduled_emails(batch_size=2), 3)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(send_scheduled_emails(), 0)
+        self.assertEqual(
+            sorted(call.args[0] for call in delay.call_args_list),
+            sorted(email.id for email in due),
+        )
+        later.refresh_from_db()
+        self.assertTrue(later.scheduled_later)
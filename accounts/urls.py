@@ -6,6 +6,7 @@ app_name = "api_accounts"
 
 urlpatterns = [
     path("", views.AccountsListView.as_view()),
+    path("export/", views.AccountExportView.as_view()),
     path("<str:pk>/", views.AccountDetailView.as_view()),
     path("<str:pk>/create_mail/", views.AccountCreateMailView.as_view()),
     path("comment/<str:pk>/", views.AccountCommentView.as_view()),
@@ -30,6 +30,7 @@ from teams.serializer import TeamsSerializer
 from accounts.tasks import send_email, send_email_to_assigned_user
 from cases.serializer import CaseSerializer
 from common.models import Attachments, Comment, Profile
+from common.export import export_format_param, export_response, requested_format
 from leads.models import Lead
 from leads.serializer import LeadSerializer
 
@@ -62,7 +63,7 @@ class AccountsListView(APIView, LimitOffsetPagination):
     model = Account
     serializer_class = AccountReadSerializer
 
-    def get_context_data(self, **kwargs):
+    def get_queryset(self):
         params = self.request.query_params
         queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
@@ -81,7 +82,10 @@ class AccountsListView(APIView, LimitOffsetPagination):
                 queryset = queryset.filter(
                     tags__in=params.get("tags")
                 ).distinct()
+        return queryset
 
+    def get_context_data(self, **kwargs):
+        queryset = self.get_queryset()
         context = {}
         queryset_open = queryset.filter(status="open")
         results_accounts_open = self.paginate_queryset(
@@ -214,6 +218,47 @@ class AccountsListView(APIView, LimitOffsetPagination):
         )
 
 
+ACCOUNT_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("name", "name"),
+    ("email", "email"),
+    ("phone", "phone"),
+    ("industry", "industry"),
+    ("status", "status"),
+    ("contact_name", "contact_name"),
+    ("website", "website"),
+    ("billing_address_line", "billing_address_line"),
+    ("billing_street", "billing_street"),
+    ("billing_city", "billing_city"),
+    ("billing_state", "billing_state"),
+    ("billing_postcode", "billing_postcode"),
+    ("billing_country", "billing_country"),
+    ("created_at", "created_at"),
+)
+
+
+class AccountExportView(AccountsListView):
+    http_method_names = ["get", "options"]
+
+    @extend_schema(
+        tags=["Accounts"],
+        parameters=swagger_params1.account_get_params + [export_format_param],
+    )
+    def get(self, request, *args, **kwargs):
+        export_format = requested_format(request.query_params)
+        if export_format is None:
+            return Response(
+                {"error": True, "errors": "Unsupported export format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return export_response(
+            self.get_queryset().distinct(),
+            ACCOUNT_EXPORT_COLUMNS,
+            "accounts",
+            export_format,
+        )
+
+
 class AccountDetailView(APIView):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
@@ -601,18 +646,24 @@ class AccountCreateMailView(APIView):
             request_obj=request,  # account=account,
         )
 
+        recipients = data.get("recipients")
         data = {}
         if serializer.is_valid():
+            is_scheduled = scheduled_later not in ["", None, False, "false"]
+            if is_scheduled and scheduled_date_time in ["", None]:
+                return Response(
+                    {
+                        "error": True,
+                        "errors": {"scheduled_date_time": ["This field is required."]},
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            # Scheduled e-mails get their send_at from the model and are
+            # picked up by the send_scheduled_emails task when due.
             email_obj = serializer.save(from_account=account)
-            if scheduled_later not in ["", None, False, "false"]:
-                if scheduled_date_time in ["", None]:
-                    return Response(
-                        {"error": True, "errors": serializer.errors},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
 
-            if data.get("recipients"):
-                contacts = json.loads(data.get("recipients"))
+            if recipients:
+                contacts = json.loads(recipients)
                 for contact in contacts:
                     obj_contact = Contact.objects.filter(id=contact, org=request.profile.org)
                     if obj_contact.exists():
@@ -621,11 +672,8 @@ class AccountCreateMailView(APIView):
                         email_obj.delete()
                         data["recipients"] = "Please enter valid recipient"
                         return Response({"error": True, "errors": data})
-            if data.get("scheduled_later") != "true":
+            if not is_scheduled:
                 send_email.delay(email_obj.id)
-            else:
-                email_obj.scheduled_later = True
-                email_obj.scheduled_date_time = scheduled_date_time
             return Response(
                 {"error": False, "message": "Email sent successfully"},
                 status=status.HTTP_200_OK,
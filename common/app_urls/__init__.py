@@ -12,4 +12,6 @@ urlpatterns = [
     path("events/", include("events.urls", namespace="api_events")),
     path("cases/", include("cases.urls", namespace="api_cases")),
     path("properties/", include("properties.urls", namespace="api_properties")),
+    path("planner/", include("planner.urls", namespace="api_planner")),
+    path("invoices/", include("invoices.urls", namespace="api_invoices")),
 ]
@@ -0,0 +1,78 @@
+"""@mention parsing and resolution against a per-org member directory.
+
+A member can be mentioned by e-mail address (``@ana@example.com``) or by
+its local part (``@ana``) when no other member of the org shares it. The
+directory mapping those handles to profile ids is built in one query and
+kept in the cache per org; ``common.signals`` drops it when a member
+changes, so resolving the mentions of a comment costs no query at all
+once the directory is warm. Comments are resolved by the Celery worker,
+so this relies on the cache being shared with the web processes (see
+``CACHES`` in the settings).
+"""
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+
+from common.models import Profile
+
+MEMBER_DIRECTORY_CACHE_KEY = "member_directory:{org_id}"
+MEMBER_DIRECTORY_CACHE_TIMEOUT = 60 * 60
+MENTION_RE = re.compile(r"(?<![\w.+-])@([\w.+-]+(?:@[\w-]+(?:\.[\w-]+)+)?)")
+
+
+def parse_handles(text):
+    """Lower-cased handles mentioned in ``text``, first mention first."""
+    handles = {}
+    for match in MENTION_RE.finditer(text or ""):
+        handle = match.group(1).rstrip(".").lower()
+        if handle:
+            handles.setdefault(handle, None)
+    return list(handles)
+
+
+def build_member_directory(org_id):
+    directory = {}
+    local_parts = {}
+    members = Profile.objects.filter(
+        org_id=org_id, is_active=True, user__is_active=True
+    ).values_list("id", "user__email")
+    for profile_id, email in members:
+        if not email:
+            continue
+        email = email.lower()
+        directory[email] = profile_id
+        local_parts.setdefault(email.split("@", 1)[0], []).append(profile_id)
+    for local_part, profile_ids in local_parts.items():
+        # An ambiguous local part would notify the wrong person.
+        if len(profile_ids) == 1:
+            directory.setdefault(local_part, profile_ids[0])
+    return directory
+
+
+def member_directory(org_id):
+    key = MEMBER_DIRECTORY_CACHE_KEY.format(org_id=org_id)
+    directory = cache.get(key)
+    if directory is None:
+        directory = build_member_directory(org_id)
+        cache.set(key, directory, MEMBER_DIRECTORY_CACHE_TIMEOUT)
+    return directory
+
+
+def invalidate_member_directory(*org_ids):
+    keys = [MEMBER_DIRECTORY_CACHE_KEY.format(org_id=org_id) for org_id in org_ids]
+    cache.delete_many(keys)
+    # Dropped again once the change is visible: a worker may have rebuilt
+    # the directory from the old rows while the transaction was open.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def resolve_mentions(text, org_id):
+    """Profile ids of the org members mentioned in ``text``, without repeats."""
+    directory = member_directory(org_id)
+    profile_ids = []
+    for handle in parse_handles(text):
+        profile_id = directory.get(handle)
+        if profile_id is not None and profile_id not in profile_ids:
+            profile_ids.append(profile_id)
+    return profile_ids
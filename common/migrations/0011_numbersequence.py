@@ -0,0 +1,44 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('common', '0010_attachments_opportunity_task_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('series', models.CharField(max_length=50)),
+                ('period', models.CharField(blank=True, default='', max_length=20)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('org', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='number_sequences', to='common.org')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Number Sequence',
+                'verbose_name_plural': 'Number Sequences',
+                'db_table': 'number_sequence',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='numbersequence',
+            constraint=models.UniqueConstraint(fields=('org', 'series', 'period'), name='number_sequence_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='numbersequence',
+            constraint=models.UniqueConstraint(condition=models.Q(('org__isnull', True)), fields=('series', 'period'), name='number_sequence_global_unique'),
+        ),
+    ]
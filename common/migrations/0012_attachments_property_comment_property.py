@@ -0,0 +1,25 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0001_initial'),
+        ('common', '0011_numbersequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachments',
+            name='property',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='property_attachment', to='properties.property'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='property',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='property_comments', to='properties.property'),
+        ),
+    ]
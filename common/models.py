@@ -1,4 +1,5 @@
 import binascii
+import builtins
 import datetime
 import os
 import time
@@ -324,7 +325,8 @@ class Comment(BaseModel):
     def get_files(self):
         return CommentFiles.objects.filter(comment_id=self)
 
-    @property
+    # The ``property`` field above shadows the builtin in the class body.
+    @builtins.property
     def commented_on_arrow(self):
         return arrow.get(self.commented_on).humanize()
 
@@ -473,7 +475,8 @@ class Attachments(BaseModel):
             return self.file_type()[1]
         return None
 
-    @property
+    # The ``property`` field above shadows the builtin in the class body.
+    @builtins.property
     def created_on_arrow(self):
         return arrow.get(self.created_at).humanize()
 
@@ -608,3 +611,38 @@ class APISettings(BaseModel):
         if not self.apikey or self.apikey is None or self.apikey == "":
             self.apikey = generate_key()
         super().save(*args, **kwargs)
+
+
+class NumberSequence(BaseModel):
+    """Last number handed out in one (org, series, period); see common.sequences."""
+
+    org = models.ForeignKey(
+        Org,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="number_sequences",
+    )
+    series = models.CharField(max_length=50)
+    period = models.CharField(max_length=20, blank=True, default="")
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Number Sequence"
+        verbose_name_plural = "Number Sequences"
+        db_table = "number_sequence"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["org", "series", "period"], name="number_sequence_unique"
+            ),
+            # NULLs never collide in a unique index, so sequences shared by
+            # every org need their own.
+            models.UniqueConstraint(
+                fields=["series", "period"],
+                condition=models.Q(org__isnull=True),
+                name="number_sequence_global_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.series} {self.period}: {self.last_value}"
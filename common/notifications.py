@@ -0,0 +1,83 @@
+"""Batched notification e-mails to CRM users.
+
+Recipients are loaded in one query and the template is compiled once per
+worker. ``notify_profiles`` stores the rendered messages in the e-mail
+outbox, which sends them at a controlled rate; ``send_messages`` sends
+over a single mail connection in batches, instead of one connection per
+recipient.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
+
+from common.models import Profile
+from emails.outbox import queue
+
+SEND_BATCH_SIZE = 50
+
+
+@lru_cache(maxsize=64)
+def compiled_template(template_name):
+    return get_template(template_name)
+
+
+def active_recipients(profile_ids):
+    return list(
+        Profile.objects.filter(id__in=list(profile_ids), is_active=True)
+        .select_related("user")
+        .order_by("id")
+    )
+
+
+def build_messages(template_name, subject, profiles, context, extra_context=None,
+                   from_email=None):
+    """One HTML message per profile with an e-mail address.
+
+    ``extra_context(profile)`` may return per-recipient context on top of
+    ``context`` and ``user``, which is always the recipient's user.
+    """
+    template = compiled_template(template_name)
+    messages = []
+    for profile in profiles:
+        if not profile.user.email:
+            continue
+        recipient_context = dict(context, user=profile.user)
+        if extra_context:
+            recipient_context.update(extra_context(profile))
+        msg = EmailMessage(
+            subject,
+            template.render(recipient_context),
+            from_email or settings.DEFAULT_FROM_EMAIL,
+            [profile.user.email],
+        )
+        msg.content_subtype = "html"
+        messages.append(msg)
+    return messages
+
+
+def send_messages(messages, batch_size=SEND_BATCH_SIZE, connection=None):
+    """Send ``messages`` over one connection; returns how many were sent."""
+    if not messages:
+        return 0
+    connection = connection or get_connection()
+    sent = 0
+    with connection:
+        for start in range(0, len(messages), batch_size):
+            sent += connection.send_messages(messages[start:start + batch_size]) or 0
+    return sent
+
+
+def notify_profiles(profile_ids, template_name, subject, context, extra_context=None,
+                    from_email=None, obj=None):
+    """Render ``template_name`` for each active profile and queue the messages.
+
+    ``obj`` is what the notification is about; a recipient is notified
+    once per template and object while a message is still pending.
+    """
+    profiles = active_recipients(profile_ids)
+    messages = build_messages(
+        template_name, subject, profiles, context, extra_context, from_email
+    )
+    return queue(messages, template=template_name, obj=obj)
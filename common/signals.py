@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.mentions import invalidate_member_directory
+from common.models import Profile, User
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    if instance.org_id:
+        invalidate_member_directory(instance.org_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields == frozenset(["last_login"]):
+        return
+    org_ids = set(
+        Profile.objects.filter(user_id=instance.pk)
+        .exclude(org_id=None)
+        .values_list("org_id", flat=True)
+    )
+    if org_ids:
+        invalidate_member_directory(*org_ids)
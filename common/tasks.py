@@ -9,8 +9,11 @@ from django.utils import timezone
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
+from common.mentions import resolve_mentions
 from common.models import Comment, Profile, User
+from common.notifications import notify_profiles
 from common.token_generator import account_activation_token
+from emails.outbox import queue
 
 app = Celery("redis://")
 
@@ -55,7 +58,19 @@ def send_email_to_new_user(user_id):
             to=recipients,
         )
         msg.content_subtype = "html"
-        msg.send()
+        queue([msg], "user_status_in.html")
+
+
+MENTION_SUBJECTS = {
+    "accounts": "New comment on Account. ",
+    "contacts": "New comment on Contact. ",
+    "leads": "New comment on Lead. ",
+    "opportunity": "New comment on Opportunity. ",
+    "cases": "New comment on Case. ",
+    "tasks": "New comment on Task. ",
+    "invoices": "New comment on Invoice. ",
+    "events": "New comment on Event. ",
+}
 
 
 @app.task
@@ -64,66 +79,28 @@ def send_email_user_mentions(
     called_from,
 ):
     """Send Mail To Mentioned Users In The Comment"""
-    comment = Comment.objects.filter(id=comment_id).first()
-    if comment:
-        comment_text = comment.comment
-        comment_text_list = comment_text.split()
-        recipients = []
-        for comment_text in comment_text_list:
-            if comment_text.startswith("@"):
-                if comment_text.strip("@").strip(",") not in recipients:
-                    if User.objects.filter(
-                        username=comment_text.strip("@").strip(","), is_active=True
-                    ).exists():
-                        email = (
-                            User.objects.filter(
-                                username=comment_text.strip("@").strip(",")
-                            )
-                            .first()
-                            .email
-                        )
-                        recipients.append(email)
-
-        context = {}
-        context["commented_by"] = comment.commented_by
-        context["comment_description"] = comment.comment
-        subject = None
-        if called_from == "accounts":
-            subject = "New comment on Account. "
-        elif called_from == "contacts":
-            subject = "New comment on Contact. "
-        elif called_from == "leads":
-            subject = "New comment on Lead. "
-        elif called_from == "opportunity":
-            subject = "New comment on Opportunity. "
-        elif called_from == "cases":
-            subject = "New comment on Case. "
-        elif called_from == "tasks":
-            subject = "New comment on Task. "
-        elif called_from == "invoices":
-            subject = "New comment on Invoice. "
-        elif called_from == "events":
-            subject = "New comment on Event. "
-        if subject:
-            context["url"] = settings.DOMAIN_NAME
-        else:
-            context["url"] = ""
-        # subject = 'Django CRM : comment '
-        if recipients:
-            for recipient in recipients:
-                recipients_list = [
-                    recipient,
-                ]
-                context["mentioned_user"] = recipient
-                html_content = render_to_string("comment_email.html", context=context)
-                msg = EmailMessage(
-                    subject,
-                    html_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=recipients_list,
-                )
-                msg.content_subtype = "html"
-                msg.send()
+    comment = (
+        Comment.objects.filter(id=comment_id).select_related("commented_by").first()
+    )
+    if not (comment and comment.commented_by and comment.commented_by.org_id):
+        return 0
+    recipients = resolve_mentions(comment.comment, comment.commented_by.org_id)
+    if not recipients:
+        return 0
+    subject = MENTION_SUBJECTS.get(called_from)
+    context = {
+        "commented_by": comment.commented_by,
+        "comment_description": comment.comment,
+        "url": settings.DOMAIN_NAME if subject else "",
+    }
+    return notify_profiles(
+        recipients,
+        "comment_email.html",
+        subject or "New comment. ",
+        context,
+        extra_context=lambda profile: {"mentioned_user": profile.user.email},
+        obj=comment,
+    )
 
 
 @app.task
@@ -145,14 +122,11 @@ def send_email_user_status(
         context["status_changed_user"] = status_changed_user
         if context["message"] == "activated":
             subject = "Account Activated "
-            html_content = render_to_string(
-                "user_status_activate.html", context=context
-            )
+            template_name = "user_status_activate.html"
         else:
             subject = "Account Deactivated "
-            html_content = render_to_string(
-                "user_status_deactivate.html", context=context
-            )
+            template_name = "user_status_deactivate.html"
+        html_content = render_to_string(template_name, context=context)
         recipients = []
         recipients.append(user.email)
         if recipients:
@@ -163,7 +137,7 @@ def send_email_user_status(
                 to=recipients,
             )
             msg.content_subtype = "html"
-            msg.send()
+            queue([msg], template_name, obj=user)
 
 
 @app.task
@@ -189,7 +163,7 @@ def send_email_user_delete(
                 to=recipients,
             )
             msg.content_subtype = "html"
-            msg.send()
+            queue([msg], "user_delete_email.html")
 
 
 @app.task
@@ -227,8 +201,7 @@ def resend_activation_link_to_user(
             context["token"],
             activation_key,
         )
-        recipients = [context["complete_url"]]
-        recipients.append(user_email)
+        recipients = [user_email]
         subject = "Welcome to Bottle CRM"
         html_content = render_to_string("user_status_in.html", context=context)
         if recipients:
@@ -239,7 +212,7 @@ def resend_activation_link_to_user(
                 to=recipients,
             )
             msg.content_subtype = "html"
-            msg.send()
+            queue([msg], "user_status_in.html")
 
 
 @app.task
@@ -268,4 +241,4 @@ def send_email_to_reset_password(user_email):
             subject, html_content, from_email=settings.DEFAULT_FROM_EMAIL, to=recipients
         )
         msg.content_subtype = "html"
-        msg.send()
+        queue([msg], "registration/password_reset_email.html", obj=user)
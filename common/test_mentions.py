@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase
+
+from common.mentions import (
+    MEMBER_DIRECTORY_CACHE_KEY,
+    parse_handles,
+    resolve_mentions,
+)
+from common.models import Comment, Org, Profile, User
+from common.tasks import send_email_user_mentions
+from emails.models import OutboxEmail
+from emails.outbox import dispatch
+
+
+class MentionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Org.objects.create(name="mention org")
+        other_org = Org.objects.create(name="other org")
+        self.ana, self.ana_other, self.luis = [
+            Profile.objects.create(user=User.objects.create(email=email), org=self.org)
+            for email in ("ana@example.com", "ana@other.com", "luis@example.com")
+        ]
+        self.outsider = Profile.objects.create(
+            user=User.objects.create(email="eva@example.com"), org=other_org
+        )
+
+    def test_parse_handles(self):
+        self.assertEqual(
+            parse_handles("Hi @Luis, @ana@example.com and @luis. mail@host.com"),
+            ["luis", "ana@example.com"],
+        )
+
+    def test_resolves_against_cached_directory(self):
+        text = "@luis @ana @ana@other.com @eva @LUIS"
+        with self.assertNumQueries(1):
+            profile_ids = resolve_mentions(text, self.org.id)
+        # "ana" is ambiguous inside the org and "eva" is not a member.
+        self.assertEqual(profile_ids, [self.luis.id, self.ana_other.id])
+        with self.assertNumQueries(0):
+            resolve_mentions(text, self.org.id)
+
+        self.luis.is_active = False
+        self.luis.save()
+        self.assertEqual(resolve_mentions(text, self.org.id), [self.ana_other.id])
+
+    def test_directory_rebuilt_before_commit_is_dropped(self):
+        resolve_mentions("@luis", self.org.id)
+        key = MEMBER_DIRECTORY_CACHE_KEY.format(org_id=self.org.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.luis.is_active = False
+            self.luis.save()
+            # Another process, not seeing the change yet, caches the old rows.
+            cache.set(key, {"luis": self.luis.id})
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(resolve_mentions("@luis", self.org.id), [])
+
+    def test_task_queues_one_message_per_mentioned_member(self):
+        # Comment.property has no migration yet, so comments cannot be
+        # stored in the test database.
+        comment = Comment(
+            comment="@luis and @ana@example.com please check", commented_by=self.ana
+        )
+        resolve_mentions("", self.org.id)
+        with mock.patch("common.tasks.Comment.objects") as comments:
+            query = comments.filter.return_value.select_related.return_value
+            query.first.return_value = comment
+            # Members, then the pending lookup and the insert in a savepoint.
+            with self.assertNumQueries(5):
+                self.assertEqual(send_email_user_mentions(comment.id, "leads"), 2)
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+        dispatch(max_seconds=5)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["ana@example.com", "luis@example.com"],
+        )
+        self.assertEqual(mail.outbox[0].subject, "New comment on Lead. ")
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+
+from common.models import Org, Profile, User
+from common.notifications import notify_profiles, send_messages
+from emails.outbox import dispatch
+
+
+class NotifyProfilesTest(TestCase):
+    def setUp(self):
+        org = Org.objects.create(name="notify org")
+        self.profiles = [
+            Profile.objects.create(
+                user=User.objects.create(email=f"agent{number}@example.com"), org=org
+            )
+            for number in range(3)
+        ]
+        self.profiles[2].is_active = False
+        self.profiles[2].save()
+
+    def test_one_message_per_active_recipient(self):
+        # Profiles, then the pending lookup and the insert in a savepoint.
+        with self.assertNumQueries(5):
+            queued = notify_profiles(
+                [profile.id for profile in self.profiles],
+                "assigned_to/contact_assigned.html",
+                "Assigned a contact for you.",
+                {"contact": "Ana", "created_by": "admin", "url": "https://crm"},
+            )
+        self.assertEqual(queued, 2)
+        self.assertEqual(mail.outbox, [])
+        dispatch(max_seconds=5)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["agent0@example.com", "agent1@example.com"],
+        )
+        self.assertIn("Ana", mail.outbox[0].body)
+
+    def test_batches_share_one_connection(self):
+        connection = mock.MagicMock()
+        connection.send_messages.side_effect = len
+        self.assertEqual(send_messages(list(range(5)), batch_size=2, connection=connection), 5)
+        self.assertEqual(connection.send_messages.call_count, 3)
+        connection.__enter__.assert_called_once()
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from common.models import NumberSequence, Org
+from common.sequences import next_value, next_values
+from invoices.models import Invoice
+from properties.models import Property
+
+
+class NumberSequenceTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="numbering org")
+        self.other_org = Org.objects.create(name="other org")
+
+    def test_sequences_are_per_org_series_and_period(self):
+        self.assertEqual(next_value("invoice", org=self.org, period="2026"), 1)
+        self.assertEqual(
+            list(next_values("invoice", org=self.org, period="2026", count=3)),
+            [2, 3, 4],
+        )
+        self.assertEqual(next_value("invoice", org=self.other_org, period="2026"), 1)
+        self.assertEqual(next_value("invoice", org=self.org, period="2027"), 1)
+        self.assertEqual(next_value("invoice", period="2026"), 1)
+        self.assertEqual(next_value("invoice", period="2026"), 2)
+
+    def test_reserving_a_block_costs_the_same_as_one_number(self):
+        next_value("invoice", org=self.org)
+        with self.assertNumQueries(4):  # savepoint, update, select, release
+            numbers = next_values("invoice", org=self.org, count=500)
+        self.assertEqual((numbers[0], numbers[-1]), (2, 501))
+
+    def test_rolled_back_numbers_are_reused(self):
+        next_value("invoice", org=self.org)
+        try:
+            with transaction.atomic():
+                self.assertEqual(next_value("invoice", org=self.org), 2)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(next_value("invoice", org=self.org), 2)
+
+    def test_invoice_numbers_continue_after_existing_ones(self):
+        today = timezone.localdate().strftime("%d%m%Y")
+        fields = {"invoice_title": "Rent", "name": "Tenant", "email": "t@example.com"}
+        Invoice.objects.create(
+            invoice_number=f"{today}0007", org=self.org, **fields
+        )
+        invoice = Invoice.objects.create(org=self.org, **fields)
+        self.assertEqual(invoice.invoice_number, f"{today}0008")
+        invoice = Invoice.objects.create(org=self.other_org, **fields)
+        self.assertEqual(invoice.invoice_number, f"{today}0001")
+        self.assertEqual(
+            Invoice.invoice_numbers(self.org.id, count=2),
+            [f"{today}0009", f"{today}0010"],
+        )
+
+    def test_blank_property_reference_is_numbered(self):
+        property_obj = Property.objects.create(
+            title="Flat", property_type="flat", operation="sale", org=self.org
+        )
+        year = timezone.localdate().year
+        self.assertEqual(property_obj.reference, f"REF-{year}-00001")
+        self.assertTrue(property_obj.slug.startswith(f"ref-{year}-00001"))
+        self.assertEqual(NumberSequence.objects.get(series="property").last_value, 1)
+
+    def test_property_references_continue_after_existing_ones(self):
+        year = timezone.localdate().year
+        fields = {"property_type": "flat", "operation": "sale", "org": self.org}
+        Property.objects.create(reference=f"REF-{year}-00041", title="Old", **fields)
+        Property.objects.create(reference=f"REF-{year}-CUSTOM", title="Own", **fields)
+        property_obj = Property.objects.create(title="Flat", **fields)
+        self.assertEqual(property_obj.reference, f"REF-{year}-00042")
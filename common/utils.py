@@ -644,3 +644,51 @@ def verify_signature(file_id, expiry, signature):
         hashlib.sha256
     ).hexdigest()
     return hmac.compare_digest(signature, expected)
+
+
+def calendar_feed_signature(profile_id, token=""):
+    # Without a token the message is the one URLs were first signed with.
+    message = f"calendar-feed:{profile_id}" + (f":{token}" if token else "")
+    return hmac.new(
+        settings.SECRET_KEY.encode(),
+        message.encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+def generate_calendar_feed_url(profile_id, token=""):
+    """Generate the signed URL of a profile's ICS feed; it does not expire,
+    but stops working once the profile's feed token is replaced"""
+    signature = calendar_feed_signature(profile_id, token)
+    return f"/api/events/calendar/feed/{profile_id}/?signature={signature}"
+
+def verify_calendar_feed_signature(profile_id, signature, token=""):
+    """Verify the signature of a calendar feed URL"""
+    return hmac.compare_digest(
+        signature or "", calendar_feed_signature(profile_id, token)
+    )
+
+def generate_invoice_pdf_url(invoice_id, digest, expires_in=300):
+    """Generate signed URL of a stored invoice PDF that expires in 5 minutes"""
+    expiry = int(time.time()) + expires_in
+    message = f"invoice-pdf:{invoice_id}:{digest}:{expiry}"
+    signature = hmac.new(
+        settings.SECRET_KEY.encode(),
+        message.encode(),
+        hashlib.sha256
+    ).hexdigest()
+    return (
+        f"/api/invoices/{invoice_id}/pdf/{digest}/"
+        f"?expires={expiry}&signature={signature}"
+    )
+
+def verify_invoice_pdf_signature(invoice_id, digest, expiry, signature):
+    """Verify the signature of an invoice PDF URL is valid and not expired"""
+    if not expiry or not expiry.isdigit() or int(time.time()) > int(expiry):
+        return False
+    message = f"invoice-pdf:{invoice_id}:{digest}:{expiry}"
+    expected = hmac.new(
+        settings.SECRET_KEY.encode(),
+        message.encode(),
+        hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(signature or "", expected)
@@ -0,0 +1,216 @@
+"""Bulk contact upsert keyed on ``primary_email``.
+
+Records are processed in batches. Each batch costs a fixed number of
+queries whatever its size: one lookup of the existing contacts and phone
+numbers, one ``INSERT ... ON CONFLICT (primary_email) DO UPDATE``, bulk
+address inserts and updates, and one delete plus one bulk insert per
+many-to-many relation that the batch sets.
+"""
+import json
+
+from django.db import transaction
+from django.utils import timezone
+
+from common.models import Address, Profile
+from contacts.models import Contact
+from contacts.serializer import ContactBulkSerializer
+from teams.models import Teams
+
+BATCH_SIZE = 500
+ADDRESS_FIELDS = ("address_line", "street", "city", "state", "postcode")
+RELATIONS = {"assigned_to": Profile, "teams": Teams}
+CONTACT_FIELDS = tuple(
+    name
+    for name in ContactBulkSerializer.Meta.fields
+    if name not in ADDRESS_FIELDS and name not in RELATIONS
+)
+UPDATE_FIELDS = tuple(
+    name for name in CONTACT_FIELDS if name != "primary_email"
+) + ("address", "updated_at", "updated_by")
+
+
+def parse_ndjson(lines):
+    """Yield one record per non-blank line; ``None`` for invalid JSON."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def email_of(record):
+    if isinstance(record, dict) and isinstance(record.get("primary_email"), str):
+        return record["primary_email"].strip()
+    return None
+
+
+def _set_relation(name, contacts_data, org):
+    field = Contact._meta.get_field(name)
+    through = field.remote_field.through
+    source = f"{field.m2m_field_name()}_id"
+    target = f"{field.m2m_reverse_field_name()}_id"
+    wanted = {
+        target_id for target_ids in contacts_data.values() for target_id in target_ids
+    }
+    allowed = set(
+        RELATIONS[name].objects.filter(id__in=wanted, org=org).values_list("id", flat=True)
+    )
+    through.objects.filter(**{f"{source}__in": list(contacts_data)}).delete()
+    through.objects.bulk_create(
+        [
+            through(**{source: contact_id, target: target_id})
+            for contact_id, target_ids in contacts_data.items()
+            for target_id in set(target_ids)
+            if target_id in allowed
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class ContactUpsert:
+    """Validate and upsert contact records for one org."""
+
+    def __init__(self, org, user=None, batch_size=BATCH_SIZE):
+        self.org = org
+        self.user = user
+        self.batch_size = batch_size
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def run(self, records):
+        batch = []
+        for index, record in enumerate(records):
+            batch.append((index, record))
+            if len(batch) >= self.batch_size:
+                self.upsert_batch(batch)
+                batch = []
+        if batch:
+            self.upsert_batch(batch)
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "errors": sorted(self.errors, key=lambda error: error["index"]),
+        }
+
+    def error(self, index, record, errors):
+        email = record.get("primary_email") if isinstance(record, dict) else None
+        self.errors.append({"index": index, "primary_email": email, "errors": errors})
+
+    def validate(self, batch, existing):
+        """Validate the records of ``batch``; those of ``existing`` contacts
+        only need the fields they change."""
+        valid = {}
+        for index, record in batch:
+            if not isinstance(record, dict):
+                self.error(index, record, {"non_field_errors": ["Expected a JSON object."]})
+                continue
+            serializer = ContactBulkSerializer(
+                data=record, partial=email_of(record) in existing
+            )
+            if not serializer.is_valid():
+                self.error(index, record, serializer.errors)
+                continue
+            data = serializer.validated_data
+            # A later record for the same email replaces the earlier one.
+            valid[data["primary_email"]] = (index, record, data)
+        return valid
+
+    def upsert_batch(self, batch):
+        emails = {email_of(record) for _, record in batch} - {None}
+        existing = {
+            contact.primary_email: contact
+            for contact in Contact.objects.filter(
+                primary_email__in=list(emails)
+            ).select_related("address")
+        }
+        valid = self.validate(batch, existing)
+        if not valid:
+            return
+        phones = {}
+        for email, (index, record, data) in list(valid.items()):
+            contact = existing.get(email)
+            if contact and contact.org_id != self.org.id:
+                self.error(index, record, {"primary_email": ["This email is already in use."]})
+                del valid[email]
+            elif data.get("mobile_number"):
+                number = str(data["mobile_number"])
+                if number in phones:
+                    self.error(index, record, {"mobile_number": ["Duplicated in this batch."]})
+                    del valid[email]
+                else:
+                    phones[number] = email
+        for number, email in Contact.objects.filter(
+            mobile_number__in=list(phones)
+        ).values_list("mobile_number", "primary_email"):
+            owner = phones.get(str(number))
+            if owner and owner != email and owner in valid:
+                index, record, _ = valid.pop(owner)
+                self.error(index, record, {"mobile_number": ["This number is already in use."]})
+        if not valid:
+            return
+
+        now = timezone.now()
+        contacts = []
+        new_addresses = []
+        changed_addresses = []
+        relations = {name: {} for name in RELATIONS}
+        for email, (index, record, data) in valid.items():
+            contact = existing.get(email) or Contact(org=self.org, created_by=self.user)
+            for name in CONTACT_FIELDS:
+                if name in data:
+                    setattr(contact, name, data[name])
+            contact.updated_by = self.user
+            address_values = {name: data[name] for name in ADDRESS_FIELDS if name in data}
+            if address_values:
+                if "country" in data:
+                    address_values["country"] = data["country"] or ""
+                if contact.address_id:
+                    for name, value in address_values.items():
+                        setattr(contact.address, name, value)
+                    contact.address.updated_at = now
+                    contact.address.updated_by = self.user
+                    changed_addresses.append(contact.address)
+                else:
+                    contact.address = Address(created_by=self.user, **address_values)
+                    new_addresses.append(contact.address)
+            for name in RELATIONS:
+                if name in data:
+                    relations[name][email] = data[name]
+            contacts.append(contact)
+
+        with transaction.atomic():
+            Address.objects.bulk_create(new_addresses)
+            Address.objects.bulk_update(
+                changed_addresses,
+                fields=ADDRESS_FIELDS + ("country", "updated_at", "updated_by"),
+            )
+            Contact.objects.bulk_create(
+                contacts,
+                update_conflicts=True,
+                unique_fields=["primary_email"],
+                update_fields=UPDATE_FIELDS,
+            )
+            if any(relations.values()):
+                # A concurrent insert may have won the conflict, so read back
+                # the stored ids rather than trusting the generated ones.
+                ids = dict(
+                    Contact.objects.filter(primary_email__in=list(valid)).values_list(
+                        "primary_email", "id"
+                    )
+                )
+                for name, emails in relations.items():
+                    if emails:
+                        _set_relation(
+                            name,
+                            {ids[email]: targets for email, targets in emails.items()},
+                            self.org,
+                        )
+        self.updated += len(existing.keys() & valid.keys())
+        self.created += len(valid) - len(existing.keys() & valid.keys())
+
+
+def upsert_contacts(records, org, user=None, batch_size=BATCH_SIZE):
+    return ContactUpsert(org, user=user, batch_size=batch_size).run(records)
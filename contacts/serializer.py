@@ -113,6 +113,58 @@ class CreateContactSerializer(serializers.ModelSerializer):
         )
 
 
+class ContactBulkSerializer(serializers.ModelSerializer):
+    """One record of a bulk upsert, keyed on ``primary_email``.
+
+    Records of existing contacts are validated with ``partial=True``: the
+    fields they leave out keep their stored values. Uniqueness is resolved
+    by the upsert itself, so the per-row unique validators (one query
+    each) are disabled.
+    """
+
+    address_line = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    street = serializers.CharField(max_length=55, required=False, allow_blank=True)
+    city = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    state = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    postcode = serializers.CharField(max_length=64, required=False, allow_blank=True)
+    assigned_to = serializers.ListField(child=serializers.UUIDField(), required=False)
+    teams = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+    class Meta:
+        model = Contact
+        fields = (
+            "salutation",
+            "first_name",
+            "last_name",
+            "date_of_birth",
+            "organization",
+            "title",
+            "primary_email",
+            "secondary_email",
+            "mobile_number",
+            "secondary_number",
+            "department",
+            "country",
+            "language",
+            "do_not_call",
+            "description",
+            "linked_in_url",
+            "facebook_url",
+            "twitter_username",
+            "address_line",
+            "street",
+            "city",
+            "state",
+            "postcode",
+            "assigned_to",
+            "teams",
+        )
+        extra_kwargs = {
+            "primary_email": {"validators": []},
+            "mobile_number": {"validators": []},
+        }
+
+
 class ContactDetailEditSwaggerSerializer(serializers.Serializer):
     comment = serializers.CharField()
     contact_attachment = serializers.FileField()
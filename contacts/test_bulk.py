@@ -0,0 +1,82 @@
+from django.test import TestCase
+
+from common.models import Address, Org, Profile, User
+from contacts.bulk import parse_ndjson, upsert_contacts
+from contacts.models import Contact
+
+
+class ContactBulkUpsertTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="sync org")
+        self.profile = Profile.objects.create(
+            user=User.objects.create(email="agent@example.com"), org=self.org
+        )
+        self.existing = Contact.objects.create(
+            first_name="Ana",
+            last_name="Old",
+            primary_email="ana@example.com",
+            address=Address.objects.create(city="Madrid"),
+            org=self.org,
+        )
+        Contact.objects.create(
+            first_name="Other",
+            last_name="Org",
+            primary_email="other@example.com",
+            org=Org.objects.create(name="other org"),
+        )
+
+    def test_upsert_in_batches(self):
+        records = [
+            {
+                "primary_email": "ana@example.com",
+                "first_name": "Ana",
+                "last_name": "New",
+                "city": "Valencia",
+                "assigned_to": [str(self.profile.id)],
+            },
+            {
+                "primary_email": "luis@example.com",
+                "first_name": "Luis",
+                "last_name": "Diaz",
+                "city": "Sevilla",
+                "assigned_to": [str(self.profile.id)],
+            },
+            {"primary_email": "other@example.com", "first_name": "X", "last_name": "Y"},
+            {"primary_email": "not-an-email", "first_name": "Bad", "last_name": "Row"},
+            None,
+        ]
+        result = upsert_contacts(records, self.org, batch_size=2)
+
+        self.assertEqual((result["created"], result["updated"]), (1, 1))
+        self.assertEqual([error["index"] for error in result["errors"]], [2, 3, 4])
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.last_name, "New")
+        self.assertEqual(self.existing.address.city, "Valencia")
+        luis = Contact.objects.get(primary_email="luis@example.com")
+        self.assertEqual((luis.org, luis.address.city), (self.org, "Sevilla"))
+        self.assertEqual(
+            Contact.objects.filter(assigned_to=self.profile).count(), 2
+        )
+        self.assertEqual(Address.objects.count(), 2)
+
+    def test_updates_only_need_the_fields_they_change(self):
+        result = upsert_contacts(
+            [
+                {"primary_email": "ana@example.com", "city": "Bilbao"},
+                {"primary_email": "new@example.com", "city": "Bilbao"},
+            ],
+            self.org,
+        )
+        self.assertEqual((result["created"], result["updated"]), (0, 1))
+        self.assertEqual(list(result["errors"][0]["errors"]), ["first_name", "last_name"])
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.first_name, self.existing.last_name), ("Ana", "Old")
+        )
+        self.assertEqual(self.existing.address.city, "Bilbao")
+
+    def test_ndjson_records(self):
+        lines = [b'{"primary_email": "a@example.com"}\n', b"\n", b"{broken\n"]
+        self.assertEqual(
+            list(parse_ndjson(lines)), [{"primary_email": "a@example.com"}, None]
+        )
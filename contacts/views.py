@@ -10,6 +10,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from common.models import Attachments, Comment, Profile
+from common.export import export_format_param, export_response, requested_format
 from common.serializer import (
     AttachmentsSerializer,
     BillingAddressSerializer,
@@ -19,6 +20,7 @@ from common.utils import COUNTRIES
 
 #from common.external_auth import CustomDualAuthentication
 from contacts import swagger_params1
+from contacts.bulk import parse_ndjson, upsert_contacts
 from contacts.models import Contact, Profile
 from contacts.serializer import *
 from contacts.tasks import send_email_to_assigned_user
@@ -31,7 +33,7 @@ class ContactsListView(APIView, LimitOffsetPagination):
     permission_classes = (IsAuthenticated,)
     model = Contact
     
-    def get_context_data(self, **kwargs):
+    def get_queryset(self):
         params = self.request.query_params
         queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
@@ -59,7 +61,10 @@ class ContactsListView(APIView, LimitOffsetPagination):
                 queryset = queryset.filter(
                     assigned_to__id__in=params.get("assigned_to")
                 ).distinct()
+        return queryset
 
+    def get_context_data(self, **kwargs):
+        queryset = self.get_queryset()
         context = {}
         results_contact = self.paginate_queryset(
             queryset.distinct(), self.request, view=self
@@ -145,6 +150,75 @@ class ContactsListView(APIView, LimitOffsetPagination):
         )
 
 
+CONTACT_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("salutation", "salutation"),
+    ("first_name", "first_name"),
+    ("last_name", "last_name"),
+    ("primary_email", "primary_email"),
+    ("secondary_email", "secondary_email"),
+    ("mobile_number", "mobile_number"),
+    ("secondary_number", "secondary_number"),
+    ("organization", "organization"),
+    ("title", "title"),
+    ("department", "department"),
+    ("language", "language"),
+    ("do_not_call", "do_not_call"),
+    ("address_line", "address__address_line"),
+    ("city", "address__city"),
+    ("state", "address__state"),
+    ("postcode", "address__postcode"),
+    ("country", "country"),
+    ("date_of_birth", "date_of_birth"),
+    ("created_at", "created_at"),
+)
+
+
+class ContactExportView(ContactsListView):
+    http_method_names = ["get", "options"]
+
+    @extend_schema(
+        tags=["contacts"],
+        parameters=swagger_params1.contact_list_get_params + [export_format_param],
+    )
+    def get(self, request, *args, **kwargs):
+        export_format = requested_format(request.query_params)
+        if export_format is None:
+            return Response(
+                {"error": True, "errors": "Unsupported export format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return export_response(
+            self.get_queryset().distinct(),
+            CONTACT_EXPORT_COLUMNS,
+            "contacts",
+            export_format,
+        )
+
+
+class ContactBulkUpsertView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=["contacts"],
+        parameters=swagger_params1.organization_params,
+        request=ContactBulkSerializer(many=True),
+    )
+    def post(self, request, *args, **kwargs):
+        if request.content_type.startswith("application/x-ndjson"):
+            # Streamed line by line, so large syncs are never held in memory.
+            records = parse_ndjson(request.stream or [])
+        else:
+            records = request.data
+            if not isinstance(records, list):
+                return Response(
+                    {"error": True, "errors": "Expected a list of contacts"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        result = upsert_contacts(records, request.profile.org, request.profile.user)
+        return Response({"error": False, **result}, status=status.HTTP_200_OK)
+
+
 class ContactDetailView(APIView):
     # #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
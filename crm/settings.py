@@ -1,6 +1,7 @@
 import os
 from datetime import timedelta
 
+from celery.schedules import crontab
 from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
@@ -173,6 +174,15 @@ LOCALE_PATHS = [os.path.join(BASE_DIR, "locale")]
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Notification outbox: sends per second, burst size, retries and the
+# base delay in seconds of the exponential backoff between them.
+EMAIL_OUTBOX_RATE = float(os.environ.get("EMAIL_OUTBOX_RATE", 10))
+EMAIL_OUTBOX_BURST = int(os.environ.get("EMAIL_OUTBOX_BURST", 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("EMAIL_OUTBOX_MAX_ATTEMPTS", 8))
+EMAIL_OUTBOX_BACKOFF = int(os.environ.get("EMAIL_OUTBOX_BACKOFF", 60))
+EMAIL_OUTBOX_INTERVAL = int(os.environ.get("EMAIL_OUTBOX_INTERVAL", 30))
+EMAIL_OUTBOX_RUN_SECONDS = EMAIL_OUTBOX_INTERVAL - 5
+
 AUTH_USER_MODEL = "common.User"
 
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
@@ -194,6 +204,47 @@ ADMIN_EMAIL = os.environ["ADMIN_EMAIL"]
 CELERY_BROKER_URL = os.environ["CELERY_BROKER_URL"]
 CELERY_RESULT_BACKEND = os.environ["CELERY_RESULT_BACKEND"]
 
+# The cache is shared by the web processes and the Celery workers, which
+# fill and invalidate entries the others read (valuation stats, similarity
+# index, report versions, the outbox rate limit). Without Redis, e.g. with
+# an in-memory broker in tests, each process keeps its own.
+CACHE_URL = os.environ.get("CACHE_URL", CELERY_BROKER_URL)
+if CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": "crm",
+        }
+    }
+
+CELERY_BEAT_SCHEDULE = {
+    "refresh-valuation-stats": {
+        "task": "properties.tasks.refresh_valuation_stats",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "rebuild-similarity-index": {
+        "task": "properties.tasks.rebuild_similarity_index",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "prune-invoice-pdfs": {
+        "task": "invoices.tasks.prune_invoice_pdfs",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "send-scheduled-account-emails": {
+        "task": "accounts.tasks.send_scheduled_emails",
+        "schedule": crontab(),
+    },
+    "send-due-planner-reminders": {
+        "task": "planner.tasks.send_due_reminders",
+        "schedule": crontab(),
+    },
+    "dispatch-email-outbox": {
+        "task": "emails.tasks.dispatch_email_outbox",
+        "schedule": EMAIL_OUTBOX_INTERVAL,
+    },
+}
+
 
 LOGGING = {
     "version": 1,
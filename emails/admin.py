@@ -1,6 +1,13 @@
 from django.contrib import admin
 
-from emails.models import Email
+from emails.models import Email, OutboxEmail
 
 # Register your models here.
 admin.site.register(Email)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("recipient", "subject", "status", "attempts", "next_attempt_at")
+    list_filter = ("status", "template")
+    search_fields = ("recipient", "subject")
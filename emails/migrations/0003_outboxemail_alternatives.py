@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emails', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='alternatives',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.1 on 2026-10-19 15:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('emails', '0003_outboxemail_alternatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxThrottle',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('tokens', models.FloatField(blank=True, null=True)),
+                ('refilled_at', models.FloatField(blank=True, null=True)),
+                ('dispatching_until', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Outbox Throttle',
+                'verbose_name_plural': 'Outbox Throttles',
+                'db_table': 'email_outbox_throttle',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='outboxemail',
+            name='email_outbox_pending_unique',
+        ),
+        migrations.AddConstraint(
+            model_name='outboxemail',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('recipient', 'template', 'object_key'), name='email_outbox_pending_unique'),
+        ),
+        migrations.AddField(
+            model_name='outboxthrottle',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By'),
+        ),
+        migrations.AddField(
+            model_name='outboxthrottle',
+            name='updated_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By'),
+        ),
+    ]
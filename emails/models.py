@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from common.base import BaseModel
 
 # Create your models here.
@@ -23,4 +24,78 @@ class Email(BaseModel):
         ordering = ("-created_at",)
 
     def __str__(self):
-        return f"{self.message_subject}"
\ No newline at end of file
+        return f"{self.message_subject}"
+
+
+class OutboxEmail(BaseModel):
+    """A notification waiting to be sent by the outbox dispatcher.
+
+    Only one pending message may exist per recipient, template and object,
+    so repeated notifications about the same thing collapse into one.
+    One already being sent does not count: a newer version is queued
+    behind it.
+    """
+
+    OUTBOX_STATUS = (
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    )
+    recipient = models.EmailField(max_length=254)
+    template = models.CharField(max_length=255, blank=True, default="")
+    object_key = models.CharField(max_length=255, blank=True, default="")
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default="html")
+    from_email = models.CharField(max_length=255)
+    # [content, mimetype] pairs of alternative parts, e.g. the HTML of a
+    # plain-text body.
+    alternatives = models.JSONField(default=list, blank=True)
+    # [filename, storage path, mimetype] triples in the default storage.
+    attachments = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=OUTBOX_STATUS, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
+        db_table = "email_outbox"
+        ordering = ("next_attempt_at",)
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipient", "template", "object_key"],
+                condition=models.Q(status="pending"),
+                name="email_outbox_pending_unique",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject} ({self.status})"
+
+
+class OutboxThrottle(BaseModel):
+    """State shared by every outbox dispatcher, in one row per ``name``.
+
+    The send-rate token bucket and the lease of the running dispatcher
+    live here rather than in a per-process cache, so all workers draw on
+    the same tokens and only one of them dispatches at a time.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    tokens = models.FloatField(blank=True, null=True)
+    # time.time() of the last refill
+    refilled_at = models.FloatField(blank=True, null=True)
+    dispatching_until = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Outbox Throttle"
+        verbose_name_plural = "Outbox Throttles"
+        db_table = "email_outbox_throttle"
+
+    def __str__(self):
+        return self.name
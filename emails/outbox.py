@@ -0,0 +1,322 @@
+"""Persistent e-mail outbox.
+
+Notification tasks render their messages and store them with ``queue``
+instead of talking to the mail server. ``dispatch`` drains the table in
+batches over one connection per batch, at most ``EMAIL_OUTBOX_RATE``
+messages per second with bursts of up to ``EMAIL_OUTBOX_BURST``. A
+message that cannot be sent is retried with exponential backoff until
+it has been tried ``EMAIL_OUTBOX_MAX_ATTEMPTS`` times.
+
+Only one pending message is kept per recipient, template and object, so
+a notification queued twice before the dispatcher runs is sent once,
+with the content queued last.
+
+The rate limit and the lease of the running dispatcher are kept in one
+``OutboxThrottle`` row, shared by every worker.
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from emails.models import OutboxEmail, OutboxThrottle
+
+BATCH_SIZE = 50
+# A claimed message whose worker died is picked up again after this long.
+LEASE = timedelta(minutes=10)
+MAX_BACKOFF = timedelta(hours=6)
+# A dispatcher that died is taken over after this long.
+DISPATCH_LEASE = timedelta(minutes=5)
+THROTTLE_NAME = "outbox"
+# Replaced when a message is queued again while still pending.
+CONTENT_FIELDS = (
+    "subject",
+    "body",
+    "content_subtype",
+    "alternatives",
+    "from_email",
+    "attachments",
+    "updated_at",
+)
+
+
+def object_key(obj):
+    return f"{obj._meta.label_lower}:{obj.pk}" if obj is not None else ""
+
+
+def content_key(message):
+    digest = hashlib.sha1(
+        f"{message.subject}\n{message.body}".encode("utf-8")
+    ).hexdigest()
+    return f"sha1:{digest}"
+
+
+def store_attachments(message):
+    stored = []
+    for filename, content, mimetype in message.attachments:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        path = default_storage.save(f"outbox/{filename}", ContentFile(content))
+        stored.append([filename, path, mimetype])
+    return stored
+
+
+def queue(messages, template="", obj=None, attachments=()):
+    """Store ``EmailMessage`` objects in the outbox, one row per recipient,
+    with the alternative parts of ``EmailMultiAlternatives``.
+
+    Without ``obj`` the message is identified by its content, so only
+    identical messages to the same address are collapsed. ``attachments``
+    are files already in storage, as ``(filename, path, mimetype)``; they
+    are attached to every message without being copied.
+    """
+    rows = {}
+    for message in messages:
+        stored = store_attachments(message) + [list(item) for item in attachments]
+        key = object_key(obj) or content_key(message)
+        for recipient in message.to + message.cc + message.bcc:
+            # A later message for the same recipient and object wins.
+            rows[recipient, template, key] = OutboxEmail(
+                recipient=recipient,
+                template=template,
+                object_key=key,
+                subject=message.subject[:255],
+                body=message.body,
+                content_subtype=message.content_subtype,
+                alternatives=[
+                    list(item) for item in getattr(message, "alternatives", ())
+                ],
+                from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+                attachments=stored,
+            )
+    with transaction.atomic():
+        # Locked so that a dispatcher cannot claim them while they change; a
+        # row it claimed first is no longer pending and gets a successor.
+        pending = OutboxEmail.objects.select_for_update().filter(
+            status="pending",
+            recipient__in={recipient for recipient, _, _ in rows},
+            template=template,
+            object_key__in={key for _, _, key in rows},
+        )
+        replaced = []
+        for email in pending:
+            row = rows.pop((email.recipient, email.template, email.object_key), None)
+            if row is not None:
+                for name in CONTENT_FIELDS:
+                    setattr(email, name, getattr(row, name))
+                email.updated_at = timezone.now()
+                replaced.append(email)
+        OutboxEmail.objects.bulk_update(replaced, CONTENT_FIELDS)
+        OutboxEmail.objects.bulk_create(rows.values(), ignore_conflicts=True)
+    return len(replaced) + len(rows)
+
+
+def email_message(email, connection=None):
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.body,
+        email.from_email,
+        [email.recipient],
+        alternatives=[tuple(item) for item in email.alternatives],
+        connection=connection,
+    )
+    message.content_subtype = email.content_subtype
+    for filename, path, mimetype in email.attachments:
+        with default_storage.open(path, "rb") as attachment:
+            message.attach(filename, attachment.read(), mimetype)
+    return message
+
+
+class TokenBucket:
+    """Allow ``rate`` sends per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate, capacity, tokens=None, updated=None, clock=time.time):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity if tokens is None else tokens
+        self.updated = clock() if updated is None else updated
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + max(now - self.updated, 0) * self.rate
+        )
+        self.updated = now
+
+    def take(self, wanted):
+        """Take up to ``wanted`` whole tokens and return how many were taken."""
+        self.refill()
+        taken = min(int(self.tokens), wanted)
+        self.tokens -= taken
+        return taken
+
+    def give_back(self, count):
+        self.tokens = min(self.capacity, self.tokens + count)
+
+    def wait_time(self):
+        """Seconds until at least one token is available."""
+        self.refill()
+        return max(1 - self.tokens, 0) / self.rate
+
+
+def throttle_row():
+    """Return the locked ``OutboxThrottle`` row, creating it on first use."""
+    throttle = (
+        OutboxThrottle.objects.select_for_update().filter(name=THROTTLE_NAME).first()
+    )
+    if throttle is None:
+        try:
+            with transaction.atomic():
+                OutboxThrottle.objects.create(name=THROTTLE_NAME)
+        except IntegrityError:
+            # Created by another worker in the meantime.
+            pass
+        throttle = OutboxThrottle.objects.select_for_update().get(name=THROTTLE_NAME)
+    return throttle
+
+
+class SharedTokenBucket(TokenBucket):
+    """``TokenBucket`` whose level is kept in the ``OutboxThrottle`` row.
+
+    Every dispatcher, in any worker, draws from the same bucket, and a run
+    starting right after another one does not get a fresh burst.
+    """
+
+    def __init__(self, clock=time.time):
+        super().__init__(
+            settings.EMAIL_OUTBOX_RATE, settings.EMAIL_OUTBOX_BURST, clock=clock
+        )
+
+    def _locked(self, method, *args):
+        with transaction.atomic():
+            throttle = throttle_row()
+            if throttle.tokens is not None:
+                self.tokens = throttle.tokens
+                self.updated = throttle.refilled_at
+            result = method(self, *args)
+            throttle.tokens = self.tokens
+            throttle.refilled_at = self.updated
+            throttle.save(update_fields=["tokens", "refilled_at", "updated_at"])
+        return result
+
+    def take(self, wanted):
+        return self._locked(TokenBucket.take, wanted)
+
+    def give_back(self, count):
+        return self._locked(TokenBucket.give_back, count)
+
+    def wait_time(self):
+        return self._locked(TokenBucket.wait_time)
+
+
+def acquire_dispatch():
+    """Take the dispatcher lease; return False while another run holds it."""
+    now = timezone.now()
+    with transaction.atomic():
+        throttle = throttle_row()
+        if throttle.dispatching_until and throttle.dispatching_until > now:
+            return False
+        throttle.dispatching_until = now + DISPATCH_LEASE
+        throttle.save(update_fields=["dispatching_until", "updated_at"])
+    return True
+
+
+def release_dispatch():
+    OutboxThrottle.objects.filter(name=THROTTLE_NAME).update(dispatching_until=None)
+
+
+def claim(limit):
+    """Mark up to ``limit`` due messages as sending and return them.
+
+    Rows locked by another dispatcher are skipped rather than waited for.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["pending", "sending"], next_attempt_at__lte=now)
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        OutboxEmail.objects.filter(id__in=ids).update(
+            status="sending", attempts=F("attempts") + 1, next_attempt_at=now + LEASE
+        )
+    return list(OutboxEmail.objects.filter(id__in=ids).order_by("next_attempt_at"))
+
+
+def backoff(attempts):
+    delay = timedelta(seconds=settings.EMAIL_OUTBOX_BACKOFF * 2 ** (attempts - 1))
+    return min(delay, MAX_BACKOFF)
+
+
+def reschedule(email, error):
+    fields = {"last_error": str(error)[:1000]}
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        fields["status"] = "failed"
+    else:
+        fields["status"] = "pending"
+        fields["next_attempt_at"] = timezone.now() + backoff(email.attempts)
+    try:
+        with transaction.atomic():
+            OutboxEmail.objects.filter(id=email.id).update(**fields)
+    except IntegrityError:
+        # Queued again while being sent: the newer version replaces it.
+        fields.update(status="failed", last_error="Superseded by a newer message.")
+        fields.pop("next_attempt_at", None)
+        OutboxEmail.objects.filter(id=email.id).update(**fields)
+
+
+def deliver(emails, connection=None):
+    """Send claimed messages over one connection; return how many were sent."""
+    connection = connection or get_connection()
+    sent = []
+    failed = {}
+    try:
+        with connection:
+            for email in emails:
+                try:
+                    email_message(email, connection).send()
+                except Exception as e:
+                    failed[email.id] = e
+                else:
+                    sent.append(email.id)
+    except Exception as e:
+        # The connection could not be opened: nothing left was sent.
+        for email in emails:
+            if email.id not in sent:
+                failed.setdefault(email.id, e)
+    OutboxEmail.objects.filter(id__in=sent).update(
+        status="sent", sent_at=timezone.now(), last_error=""
+    )
+    for email in emails:
+        if email.id in failed:
+            reschedule(email, failed[email.id])
+    return len(sent)
+
+
+def dispatch(batch_size=BATCH_SIZE, max_seconds=None, bucket=None, connection=None):
+    """Send due messages until none are left or ``max_seconds`` have passed."""
+    if max_seconds is None:
+        max_seconds = settings.EMAIL_OUTBOX_RUN_SECONDS
+    deadline = time.monotonic() + max_seconds
+    bucket = bucket or SharedTokenBucket()
+    sent = 0
+    while time.monotonic() < deadline:
+        allowed = bucket.take(batch_size)
+        if not allowed:
+            time.sleep(min(bucket.wait_time(), max(deadline - time.monotonic(), 0)))
+            continue
+        emails = claim(allowed)
+        bucket.give_back(allowed - len(emails))
+        if not emails:
+            break
+        sent += deliver(emails, connection)
+    return sent
@@ -0,0 +1,16 @@
+from celery import Celery
+
+from emails.outbox import acquire_dispatch, dispatch, release_dispatch
+
+app = Celery("redis://")
+
+
+@app.task
+def dispatch_email_outbox():
+    """Drain the e-mail outbox; runs are skipped while another one is active."""
+    if not acquire_dispatch():
+        return 0
+    try:
+        return dispatch()
+    finally:
+        release_dispatch()
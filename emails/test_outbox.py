@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from common.models import Org
+from emails.models import OutboxEmail
+from emails.outbox import (
+    SharedTokenBucket,
+    TokenBucket,
+    acquire_dispatch,
+    dispatch,
+    queue,
+    release_dispatch,
+)
+from leads.tasks import send_email
+
+
+def message(to="agent@example.com", body="<p>hello</p>"):
+    msg = EmailMessage("Subject", body, "crm@example.com", [to])
+    msg.content_subtype = "html"
+    return msg
+
+
+@override_settings(
+    EMAIL_OUTBOX_RATE=1000, EMAIL_OUTBOX_BURST=1000, EMAIL_OUTBOX_MAX_ATTEMPTS=2
+)
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="outbox org")
+
+    def test_pending_duplicates_are_collapsed(self):
+        queue([message(), message(body="<p>updated</p>")], "t.html", obj=self.org)
+        queue([message(body="<p>latest</p>")], "t.html", obj=self.org)
+        queue([message(to="other@example.com")], "t.html", obj=self.org)
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+        email = OutboxEmail.objects.get(recipient="agent@example.com")
+        self.assertEqual(email.body, "<p>latest</p>")
+
+        self.assertEqual(dispatch(max_seconds=5, bucket=TokenBucket(1000, 1000)), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].content_subtype, "html")
+        self.assertEqual(OutboxEmail.objects.filter(status="sent").count(), 2)
+
+        # Once sent, the same notification can be queued again.
+        queue([message()], "t.html", obj=self.org)
+        self.assertEqual(OutboxEmail.objects.filter(status="pending").count(), 1)
+
+    def test_text_and_html_parts_are_kept(self):
+        send_email("Subject", "<p>hello</p>", "hello", recipients=["a@example.com"])
+        dispatch(max_seconds=5, bucket=TokenBucket(1000, 1000))
+        sent = mail.outbox[0]
+        self.assertEqual((sent.body, sent.content_subtype), ("hello", "plain"))
+        self.assertEqual(sent.alternatives, [("<p>hello</p>", "text/html")])
+
+    def test_failures_back_off_then_give_up(self):
+        queue([message()], "t.html", obj=self.org)
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=OSError("refused"),
+        ):
+            self.assertEqual(dispatch(max_seconds=5, bucket=TokenBucket(1000, 1000)), 0)
+            email = OutboxEmail.objects.get()
+            self.assertEqual((email.status, email.attempts), ("pending", 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertEqual(email.last_error, "refused")
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            dispatch(max_seconds=5, bucket=TokenBucket(1000, 1000))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("failed", 2))
+
+    def test_rate_limits_each_batch(self):
+        queue([message(to=f"agent{number}@example.com") for number in range(5)])
+        clock = mock.Mock(return_value=0.0)
+        bucket = TokenBucket(1, 2, clock=clock)
+        with mock.patch("emails.outbox.time.sleep"):
+            with mock.patch(
+                "emails.outbox.time.monotonic", side_effect=[0, 0, 0, 0, 99]
+            ):
+                self.assertEqual(dispatch(max_seconds=10, bucket=bucket), 2)
+        self.assertEqual(OutboxEmail.objects.filter(status="pending").count(), 3)
+
+    def test_bucket_is_shared_between_dispatchers(self):
+        clock = mock.Mock(return_value=0.0)
+        with override_settings(EMAIL_OUTBOX_RATE=1, EMAIL_OUTBOX_BURST=3):
+            self.assertEqual(SharedTokenBucket(clock=clock).take(2), 2)
+            # Another worker sees what the first one took.
+            self.assertEqual(SharedTokenBucket(clock=clock).take(5), 1)
+            clock.return_value = 1.0
+            self.assertEqual(SharedTokenBucket(clock=clock).take(5), 1)
+
+    def test_one_dispatcher_at_a_time(self):
+        self.assertTrue(acquire_dispatch())
+        self.assertFalse(acquire_dispatch())
+        release_dispatch()
+        self.assertTrue(acquire_dispatch())
+
+    def test_requeued_while_sending_replaces_the_failed_send(self):
+        queue([message()], "t.html", obj=self.org)
+
+        def requeue(messages):
+            if messages[0].body == "<p>hello</p>":
+                queue([message(body="<p>latest</p>")], "t.html", obj=self.org)
+            raise OSError("refused")
+
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=requeue,
+        ):
+            dispatch(max_seconds=5, bucket=TokenBucket(1000, 1000))
+        self.assertEqual(
+            list(
+                OutboxEmail.objects.order_by("created_at").values_list("status", "body")
+            ),
+            [("failed", "<p>hello</p>"), ("pending", "<p>latest</p>")],
+        )
@@ -0,0 +1,379 @@
+"""Unified calendar feed.
+
+``CalendarEntry`` keeps one row per profile for every event, planner
+event, task, opportunity task, case and property viewing that has a
+date, so the calendar of a profile over any window is one range query on
+``(profile, starts_at, ends_at)``. The receivers in ``events.signals``
+call ``refresh_entries`` when a source object or its assignees change;
+it rebuilds the rows of any number of objects of one source with a fixed
+number of queries. A recurring event series has a single row spanning
+the series and ``calendar_feed`` expands it within the window read.
+
+Only rows that actually changed are rewritten, and the ``CalendarVersion``
+of each profile whose calendar changed is bumped, so anything derived
+from a calendar (such as the ICS feed) can be cached per version.
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from cases.models import Case
+from common.models import Profile
+from events.models import CalendarEntry, CalendarVersion, Event
+from events.recurrence import event_interval, expand_occurrences
+from opportunity.models import Opportunity, OpportunityTask
+from planner.models import PlannerEvent
+from properties.models import PropertyViewing
+from tasks.models import Task
+
+BATCH_SIZE = 1000
+
+CalendarItem = namedtuple(
+    "CalendarItem", "source object_id title starts_at ends_at all_day original_date"
+)
+
+
+def day_bounds(first_day, last_day):
+    """Aware ``[start, end)`` covering whole local days."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(first_day, time.min), tz),
+        timezone.make_aware(
+            datetime.combine(last_day + timedelta(days=1), time.min), tz
+        ),
+    )
+
+
+def assigned_ids(model, field_name, object_ids):
+    """``{object_id: {related_id, ...}}`` read from one m2m through table."""
+    field = model._meta.get_field(field_name)
+    source = f"{field.m2m_field_name()}_id"
+    target = f"{field.m2m_reverse_field_name()}_id"
+    assigned = defaultdict(set)
+    rows = field.remote_field.through.objects.filter(
+        **{f"{source}__in": object_ids}
+    ).values_list(source, target)
+    for object_id, related_id in rows:
+        assigned[object_id].add(related_id)
+    return assigned
+
+
+def build_entries(source, obj, org_id, title, starts_at, ends_at, profile_ids,
+                  all_day=False, is_recurring=False):
+    return [
+        CalendarEntry(
+            profile_id=profile_id,
+            org_id=org_id,
+            source=source,
+            object_id=obj.pk,
+            title=title[:255],
+            starts_at=starts_at,
+            ends_at=ends_at,
+            all_day=all_day,
+            is_recurring=is_recurring,
+        )
+        for profile_id in profile_ids
+    ]
+
+
+def event_entries(object_ids):
+    events = list(
+        Event.objects.filter(id__in=object_ids, is_active=True).exclude(
+            status="Canceled"
+        )
+    )
+    assigned = assigned_ids(Event, "assigned_to", [event.id for event in events])
+    entries = []
+    for event in events:
+        if event.recurrence_rule:
+            starts_at, ends_at = day_bounds(event.start_date, event.end_date)
+        else:
+            starts_at, ends_at = event_interval(
+                event.start_date, event.start_time, event.end_date, event.end_time
+            )
+        profile_ids = set(assigned[event.id])
+        if event.created_by_id:
+            profile_ids.add(event.created_by_id)
+        entries += build_entries(
+            "event",
+            event,
+            event.org_id,
+            event.name,
+            starts_at,
+            ends_at,
+            profile_ids,
+            is_recurring=bool(event.recurrence_rule),
+        )
+    return entries
+
+
+def planner_entries(object_ids):
+    """Planner events belong to users, so every active profile of them sees it."""
+    events = list(PlannerEvent.objects.filter(id__in=object_ids))
+    event_ids = [event.id for event in events]
+    users = assigned_ids(PlannerEvent, "assigned_to", event_ids)
+    for event_id, user_ids in assigned_ids(
+        PlannerEvent, "attendees_user", event_ids
+    ).items():
+        users[event_id] |= user_ids
+    profiles = defaultdict(list)
+    for user_id, profile_id, org_id in Profile.objects.filter(
+        user_id__in=set().union(*users.values()), is_active=True
+    ).values_list("user_id", "id", "org_id"):
+        profiles[user_id].append((profile_id, org_id))
+    entries = []
+    for event in events:
+        last_day = max(event.close_date or event.start_date, event.start_date)
+        starts_at, ends_at = day_bounds(event.start_date, last_day)
+        for user_id in users[event.id]:
+            for profile_id, org_id in profiles[user_id]:
+                entries += build_entries(
+                    "planner", event, org_id, event.name, starts_at, ends_at,
+                    [profile_id], all_day=True,
+                )
+    return entries
+
+
+def task_entries(object_ids):
+    tasks = list(
+        Task.objects.filter(id__in=object_ids, due_date__isnull=False).exclude(
+            status="Completed"
+        )
+    )
+    assigned = assigned_ids(Task, "assigned_to", [task.id for task in tasks])
+    entries = []
+    for task in tasks:
+        starts_at, ends_at = day_bounds(task.due_date, task.due_date)
+        entries += build_entries(
+            "task", task, task.org_id, task.title, starts_at, ends_at,
+            assigned[task.id], all_day=True,
+        )
+    return entries
+
+
+def opportunity_task_entries(object_ids):
+    tasks = list(
+        OpportunityTask.objects.filter(
+            id__in=object_ids, deadline__isnull=False, completed=False
+        ).select_related("opportunity")
+    )
+    assigned = assigned_ids(
+        Opportunity, "assigned_to", {task.opportunity_id for task in tasks}
+    )
+    entries = []
+    for task in tasks:
+        starts_at, ends_at = day_bounds(task.deadline, task.deadline)
+        entries += build_entries(
+            "opportunity_task",
+            task,
+            task.org_id or task.opportunity.org_id,
+            f"{task.opportunity.name}: {task.name}",
+            starts_at,
+            ends_at,
+            assigned[task.opportunity_id],
+            all_day=True,
+        )
+    return entries
+
+
+def case_entries(object_ids):
+    cases = list(Case.objects.filter(id__in=object_ids, closed_on__isnull=False))
+    assigned = assigned_ids(Case, "assigned_to", [case.id for case in cases])
+    entries = []
+    for case in cases:
+        starts_at, ends_at = day_bounds(case.closed_on, case.closed_on)
+        entries += build_entries(
+            "case", case, case.org_id, case.name, starts_at, ends_at,
+            assigned[case.id], all_day=True,
+        )
+    return entries
+
+
+def viewing_entries(object_ids):
+    viewings = PropertyViewing.objects.filter(id__in=object_ids).exclude(
+        status="cancelled"
+    )
+    entries = []
+    for viewing in viewings.select_related("property"):
+        entries += build_entries(
+            "viewing",
+            viewing,
+            viewing.org_id,
+            f"Viewing: {viewing.property.title}",
+            viewing.starts_at,
+            viewing.ends_at,
+            [viewing.agent_id],
+        )
+    return entries
+
+
+SOURCES = {
+    "event": (Event, event_entries),
+    "planner": (PlannerEvent, planner_entries),
+    "task": (Task, task_entries),
+    "opportunity_task": (OpportunityTask, opportunity_task_entries),
+    "case": (Case, case_entries),
+    "viewing": (PropertyViewing, viewing_entries),
+}
+
+
+def opportunity_task_ids(opportunity_ids):
+    return OpportunityTask.objects.filter(
+        opportunity_id__in=opportunity_ids
+    ).values_list("id", flat=True)
+
+
+def bump_versions(profile_ids):
+    """Mark the calendars of ``profile_ids`` as changed."""
+    profile_ids = set(profile_ids)
+    if not profile_ids:
+        return
+    CalendarVersion.objects.bulk_create(
+        [CalendarVersion(profile_id=profile_id) for profile_id in profile_ids],
+        ignore_conflicts=True,
+    )
+    CalendarVersion.objects.filter(profile_id__in=profile_ids).update(
+        version=F("version") + 1
+    )
+
+
+def entry_values(entry):
+    return (
+        entry.title,
+        entry.starts_at,
+        entry.ends_at,
+        entry.all_day,
+        entry.is_recurring,
+        entry.org_id,
+    )
+
+
+def refresh_entries(source, object_ids):
+    """Rebuild the calendar rows of ``object_ids``; deleted objects lose theirs.
+
+    Returns how many rows the objects have now.
+    """
+    object_ids = list(object_ids)
+    if not object_ids:
+        return 0
+    model, entries = SOURCES[source]
+    with transaction.atomic():
+        # Refreshes of the same objects, e.g. from two saves racing in
+        # their requests, take turns; each then reads the rows the one
+        # before it wrote instead of inserting them a second time.
+        list(
+            model.objects.select_for_update()
+            .filter(pk__in=object_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        wanted = {
+            (entry.profile_id, entry.object_id): entry
+            for entry in entries(object_ids)
+        }
+        kept = 0
+        stale = []
+        for entry in CalendarEntry.objects.filter(
+            source=source, object_id__in=object_ids
+        ):
+            key = (entry.profile_id, entry.object_id)
+            if key in wanted and entry_values(wanted[key]) == entry_values(entry):
+                del wanted[key]
+                kept += 1
+            else:
+                stale.append(entry)
+        CalendarEntry.objects.filter(id__in=[entry.id for entry in stale]).delete()
+        CalendarEntry.objects.bulk_create(wanted.values(), batch_size=BATCH_SIZE)
+        changed = {entry.profile_id for entry in stale}
+        changed.update(profile_id for profile_id, _ in wanted)
+        # The rows of a series do not show its rule or times, so any change
+        # to the series may have changed the calendars that include it.
+        if source == "event":
+            changed.update(
+                CalendarEntry.objects.filter(
+                    source=source, object_id__in=object_ids, is_recurring=True
+                ).values_list("profile_id", flat=True)
+            )
+        bump_versions(changed)
+    return kept + len(wanted)
+
+
+def bump_event_versions(event_id):
+    """Bump the calendars showing an event, e.g. after one occurrence changed."""
+    bump_versions(
+        CalendarEntry.objects.filter(source="event", object_id=event_id).values_list(
+            "profile_id", flat=True
+        )
+    )
+
+
+def rebuild_entries(sources=None, batch_size=BATCH_SIZE):
+    """Rebuild every calendar row of ``sources`` (all of them by default)."""
+    built = {}
+    for source in sources or SOURCES:
+        model = SOURCES[source][0]
+        with transaction.atomic():
+            ids = list(model.objects.order_by("id").values_list("id", flat=True))
+            orphans = CalendarEntry.objects.filter(source=source).exclude(
+                object_id__in=model.objects.values("id")
+            )
+            bump_versions(orphans.values_list("profile_id", flat=True))
+            orphans.delete()
+            built[source] = sum(
+                refresh_entries(source, ids[start:start + batch_size])
+                for start in range(0, len(ids), batch_size)
+            )
+    return built
+
+
+def calendar_feed(profile, first_day, last_day):
+    """Everything on the calendar of ``profile`` between two days, by start."""
+    window_start, window_end = day_bounds(first_day, last_day)
+    items = []
+    series = []
+    for entry in CalendarEntry.objects.filter(
+        profile=profile, starts_at__lt=window_end, ends_at__gt=window_start
+    ).order_by("starts_at"):
+        if entry.is_recurring:
+            series.append(entry.object_id)
+            continue
+        items.append(
+            CalendarItem(
+                entry.source,
+                entry.object_id,
+                entry.title,
+                entry.starts_at,
+                entry.ends_at,
+                entry.all_day,
+                None,
+            )
+        )
+    if series:
+        for occurrence in expand_occurrences(
+            Event.objects.filter(id__in=series), first_day, last_day
+        ):
+            if occurrence.status == "Canceled":
+                continue
+            starts_at, ends_at = event_interval(
+                occurrence.start_date,
+                occurrence.start_time,
+                occurrence.end_date,
+                occurrence.end_time,
+            )
+            if starts_at < window_end and ends_at > window_start:
+                items.append(
+                    CalendarItem(
+                        "event",
+                        occurrence.event.id,
+                        occurrence.name,
+                        starts_at,
+                        ends_at,
+                        False,
+                        occurrence.original_date,
+                    )
+                )
+    items.sort(key=lambda item: (item.starts_at, item.ends_at))
+    return items
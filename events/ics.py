@@ -0,0 +1,190 @@
+"""iCalendar (RFC 5545) feed of a profile's calendar.
+
+The feed is built from the ``CalendarEntry`` rows of the profile. A
+recurring series is written once with its RRULE, cancelled occurrences
+as EXDATEs and edited ones as overrides with a RECURRENCE-ID, so the
+body does not depend on the day it is built. Bodies are cached per
+``CalendarVersion``: a calendar client polling an unchanged calendar
+costs one query, and nothing else when it sends back the ETag.
+"""
+import re
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from events.models import CalendarEntry, Event, EventOccurrenceException
+from events.recurrence import edited_occurrence, event_interval
+
+PRODID = "-//CRM Inmobiliario//Calendar//ES"
+# Past entries older than this are left out of the feed.
+FEED_HISTORY = timedelta(days=90)
+FEED_CACHE_TIMEOUT = 24 * 60 * 60
+UNTIL_RE = re.compile(r"UNTIL=(\d{8}T\d{6})(?!Z)")
+
+
+def feed_cache_key(profile_id, version):
+    return f"calendar_feed:{profile_id}:{version}"
+
+
+def feed_etag(version):
+    # Weak: the same version may be rebuilt later with fewer past entries.
+    return f'W/"{version}"'
+
+
+def escape(text):
+    return (
+        (text or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """Split ``line`` into chunks of at most 75 octets, as RFC 5545 asks."""
+    encoded = line.encode("utf-8")
+    chunks = []
+    # Continuation lines start with a space, which counts towards the 75.
+    while len(encoded) > (74 if chunks else 75):
+        cut = 74 if chunks else 75
+        # Do not cut a multi-byte character in two.
+        while encoded[cut] & 0xC0 == 0x80:
+            cut -= 1
+        chunks.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+    chunks.append(encoded.decode("utf-8"))
+    return "\r\n ".join(chunks)
+
+
+def utc_stamp(moment):
+    return moment.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def local_stamp(moment):
+    return timezone.localtime(moment).strftime("%Y%m%dT%H%M%S")
+
+
+def utc_rule(rule):
+    """The RRULE with a local UNTIL turned into UTC, as RFC 5545 requires."""
+
+    def to_utc(match):
+        until = timezone.make_aware(
+            datetime.strptime(match.group(1), "%Y%m%dT%H%M%S")
+        )
+        return f"UNTIL={utc_stamp(until)}"
+
+    return UNTIL_RE.sub(to_utc, rule.removeprefix("RRULE:"))
+
+
+def vevent(uid, stamp, summary, start, end, all_day=False, extra=()):
+    tzid = timezone.get_current_timezone_name()
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{utc_stamp(stamp)}"]
+    if all_day:
+        lines += [
+            f"DTSTART;VALUE=DATE:{timezone.localtime(start):%Y%m%d}",
+            f"DTEND;VALUE=DATE:{timezone.localtime(end):%Y%m%d}",
+        ]
+    else:
+        lines += [
+            f"DTSTART;TZID={tzid}:{local_stamp(start)}",
+            f"DTEND;TZID={tzid}:{local_stamp(end)}",
+        ]
+    lines += [f"SUMMARY:{escape(summary)}", *extra, "END:VEVENT"]
+    return lines
+
+
+def series_lines(entry, event, exceptions):
+    tzid = timezone.get_current_timezone_name()
+    uid = f"event-{event.id}@crm"
+    start, end = event_interval(
+        event.start_date, event.start_time, event.start_date, event.end_time
+    )
+    excluded = []
+    overrides = []
+    for exception in exceptions:
+        original, _ = event_interval(
+            exception.original_date, event.start_time, None, None
+        )
+        occurrence = edited_occurrence(event, exception)
+        if exception.is_cancelled or occurrence.status == "Canceled":
+            excluded.append(f"EXDATE;TZID={tzid}:{local_stamp(original)}")
+            continue
+        overrides += vevent(
+            uid,
+            exception.updated_at or entry.created_at,
+            occurrence.name,
+            *event_interval(
+                occurrence.start_date,
+                occurrence.start_time,
+                occurrence.end_date,
+                occurrence.end_time,
+            ),
+            extra=[f"RECURRENCE-ID;TZID={tzid}:{local_stamp(original)}"],
+        )
+    return (
+        vevent(
+            uid,
+            entry.created_at,
+            event.name,
+            start,
+            end,
+            extra=[f"RRULE:{utc_rule(event.recurrence_rule)}", *excluded],
+        )
+        + overrides
+    )
+
+
+def render_feed(profile_id):
+    """The ICS body of the calendar of ``profile_id``."""
+    entries = list(
+        CalendarEntry.objects.filter(
+            profile_id=profile_id, ends_at__gte=timezone.now() - FEED_HISTORY
+        ).order_by("starts_at")
+    )
+    series_ids = [entry.object_id for entry in entries if entry.is_recurring]
+    series = {}
+    exceptions = {}
+    if series_ids:
+        series = Event.objects.in_bulk(series_ids)
+        for exception in EventOccurrenceException.objects.filter(
+            event_id__in=series_ids
+        ):
+            exceptions.setdefault(exception.event_id, []).append(exception)
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        "X-WR-CALNAME:CRM",
+        f"X-WR-TIMEZONE:{timezone.get_current_timezone_name()}",
+    ]
+    for entry in entries:
+        if entry.is_recurring:
+            event = series.get(entry.object_id)
+            if event and event.recurrence_rule:
+                lines += series_lines(entry, event, exceptions.get(event.id, []))
+            continue
+        lines += vevent(
+            f"{entry.source}-{entry.object_id}@crm",
+            entry.created_at,
+            entry.title,
+            entry.starts_at,
+            entry.ends_at,
+            all_day=entry.all_day,
+        )
+    lines.append("END:VCALENDAR")
+    return "".join(f"{fold(line)}\r\n" for line in lines)
+
+
+def cached_feed(profile_id, version):
+    key = feed_cache_key(profile_id, version)
+    body = cache.get(key)
+    if body is None:
+        body = render_feed(profile_id)
+        cache.set(key, body, FEED_CACHE_TIMEOUT)
+    return body
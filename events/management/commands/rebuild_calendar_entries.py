@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from events.calendar import SOURCES, rebuild_entries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the calendar entries of events, tasks, cases and planner events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            action="append",
+            choices=list(SOURCES),
+            help="Only rebuild this source; may be given more than once.",
+        )
+
+    def handle(self, *args, **options):
+        for source, count in rebuild_entries(options["source"]).items():
+            self.stdout.write(f"{source}: {count} entries")
+        self.stdout.write(self.style.SUCCESS("Calendar entries rebuilt."))
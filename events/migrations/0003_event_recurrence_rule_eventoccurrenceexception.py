@@ -0,0 +1,52 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events', '0002_event_event_start_d_47556c_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_rule',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.CreateModel(
+            name='EventOccurrenceException',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('original_date', models.DateField()),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('name', models.CharField(blank=True, max_length=64, null=True, verbose_name='Event')),
+                ('status', models.CharField(blank=True, choices=[('Planned', 'Planned'), ('Held', 'Held'), ('Not Held', 'Not Held'), ('Not Started', 'Not Started'), ('Started', 'Started'), ('Completed', 'Completed'), ('Canceled', 'Canceled'), ('Deferred', 'Deferred')], max_length=64, null=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrence_exceptions', to='events.event')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Event Occurrence Exception',
+                'verbose_name_plural': 'Event Occurrence Exceptions',
+                'db_table': 'event_occurrence_exception',
+                'ordering': ('original_date',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='eventoccurrenceexception',
+            constraint=models.UniqueConstraint(fields=('event', 'original_date'), name='event_occurrence_exception_unique'),
+        ),
+    ]
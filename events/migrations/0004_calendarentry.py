@@ -0,0 +1,48 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('common', '0010_attachments_opportunity_task_and_more'),
+        ('events', '0003_event_recurrence_rule_eventoccurrenceexception'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarEntry',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('source', models.CharField(choices=[('event', 'Event'), ('planner', 'Planner event'), ('task', 'Task'), ('opportunity_task', 'Opportunity task'), ('case', 'Case')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('title', models.CharField(max_length=255)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('all_day', models.BooleanField(default=False)),
+                ('is_recurring', models.BooleanField(default=False)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('org', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='common.org')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_entries', to='common.profile')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Calendar Entry',
+                'verbose_name_plural': 'Calendar Entries',
+                'db_table': 'calendar_entry',
+                'ordering': ('starts_at',),
+                'indexes': [models.Index(fields=['profile', 'starts_at', 'ends_at'], name='calendar_entry_range_idx'), models.Index(fields=['source', 'object_id'], name='calendar_en_source_688bba_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='calendarentry',
+            constraint=models.UniqueConstraint(fields=('profile', 'source', 'object_id'), name='calendar_entry_unique'),
+        ),
+    ]
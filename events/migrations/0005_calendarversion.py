@@ -0,0 +1,40 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('common', '0010_attachments_opportunity_task_and_more'),
+        ('events', '0004_calendarentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='calendarentry',
+            name='source',
+            field=models.CharField(choices=[('event', 'Event'), ('planner', 'Planner event'), ('task', 'Task'), ('opportunity_task', 'Opportunity task'), ('case', 'Case'), ('viewing', 'Property viewing')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='CalendarVersion',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_version', to='common.profile')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Calendar Version',
+                'verbose_name_plural': 'Calendar Versions',
+                'db_table': 'calendar_version',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_calendarversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendarversion',
+            name='feed_token',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
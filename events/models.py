@@ -54,6 +54,9 @@ class Event(BaseModel):
     date_of_meeting = models.DateField(blank=True, null=True)
     teams = models.ManyToManyField(Teams, related_name="event_teams")
     org = models.ForeignKey(Org, on_delete=models.SET_NULL, null=True, blank=True)
+    # RFC 5545 RRULE of a recurring series; start_date and end_date then
+    # bound the series and the times apply to every occurrence.
+    recurrence_rule = models.CharField(max_length=500, blank=True, null=True)
 
     # tags = models.ManyToManyField(Tag)
 
@@ -62,6 +65,9 @@ class Event(BaseModel):
         verbose_name_plural = "Events"
         db_table = "event"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["start_date", "end_date"]),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -88,3 +94,112 @@ class Event(BaseModel):
         assigned_user_ids = list(self.assigned_to.values_list("id", flat=True))
         user_ids = set(assigned_user_ids) - set(team_user_ids)
         return Profile.objects.filter(id__in=list(user_ids))
+
+
+class EventOccurrenceException(BaseModel):
+    """An occurrence of a recurring event that was edited or cancelled.
+
+    Empty fields keep the value of the series; ``original_date`` is the
+    date the rule generated for the occurrence.
+    """
+
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="occurrence_exceptions"
+    )
+    original_date = models.DateField()
+    is_cancelled = models.BooleanField(default=False)
+    name = models.CharField(_("Event"), max_length=64, blank=True, null=True)
+    status = models.CharField(
+        choices=Event.EVENT_STATUS, max_length=64, blank=True, null=True
+    )
+    start_date = models.DateField(blank=True, null=True)
+    start_time = models.TimeField(blank=True, null=True)
+    end_date = models.DateField(blank=True, null=True)
+    end_time = models.TimeField(blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Event Occurrence Exception"
+        verbose_name_plural = "Event Occurrence Exceptions"
+        db_table = "event_occurrence_exception"
+        ordering = ("original_date",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "original_date"],
+                name="event_occurrence_exception_unique",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.event} ({self.original_date})"
+
+
+class CalendarEntry(BaseModel):
+    """One item on a profile's calendar, kept in sync by ``events.signals``.
+
+    Events, planner events, tasks, opportunity tasks, cases and property
+    viewings each get one row per profile that should see them. A recurring
+    series is stored once across its whole span and expanded when a window
+    is read.
+    """
+
+    SOURCE_CHOICES = (
+        ("event", "Event"),
+        ("planner", "Planner event"),
+        ("task", "Task"),
+        ("opportunity_task", "Opportunity task"),
+        ("case", "Case"),
+        ("viewing", "Property viewing"),
+    )
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="calendar_entries"
+    )
+    org = models.ForeignKey(Org, on_delete=models.CASCADE, null=True, blank=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    object_id = models.UUIDField()
+    title = models.CharField(max_length=255)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    all_day = models.BooleanField(default=False)
+    is_recurring = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "Calendar Entry"
+        verbose_name_plural = "Calendar Entries"
+        db_table = "calendar_entry"
+        ordering = ("starts_at",)
+        indexes = [
+            models.Index(
+                fields=["profile", "starts_at", "ends_at"],
+                name="calendar_entry_range_idx",
+            ),
+            models.Index(fields=["source", "object_id"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "source", "object_id"],
+                name="calendar_entry_unique",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.starts_at:%Y-%m-%d %H:%M})"
+
+
+class CalendarVersion(BaseModel):
+    """Bumped whenever anything on the calendar of ``profile`` changes."""
+
+    profile = models.OneToOneField(
+        Profile, on_delete=models.CASCADE, related_name="calendar_version"
+    )
+    version = models.PositiveIntegerField(default=0)
+    # Signed into the ICS feed URL: a new token revokes every URL given out.
+    feed_token = models.CharField(max_length=64, blank=True, default="")
+
+    class Meta:
+        verbose_name = "Calendar Version"
+        verbose_name_plural = "Calendar Versions"
+        db_table = "calendar_version"
+
+    def __str__(self):
+        return f"{self.profile} v{self.version}"
@@ -0,0 +1,217 @@
+"""Recurring event series.
+
+A recurring event is one ``Event`` row whose ``recurrence_rule`` holds an
+RFC 5545 RRULE. ``start_date`` and ``end_date`` bound the series and
+``start_time``/``end_time`` apply to each occurrence. Occurrences are
+expanded only for the date window being looked at, and an
+``EventOccurrenceException`` row exists only for an occurrence that was
+edited or cancelled. Expanding any number of events costs one query for
+their exceptions.
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from dateutil.rrule import rrulestr
+from django.db.models import Q
+from django.utils import timezone
+
+from events.models import EventOccurrenceException
+
+WEEKDAY_CODES = {
+    "Monday": "MO",
+    "Tuesday": "TU",
+    "Wednesday": "WE",
+    "Thursday": "TH",
+    "Friday": "FR",
+    "Saturday": "SA",
+    "Sunday": "SU",
+}
+
+# Events without an end time block this long from their start.
+DEFAULT_EVENT_DURATION = timedelta(hours=1)
+# Finer frequencies would expand into far too many occurrences per window.
+RULE_FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+MAX_RULE_COUNT = 1000
+
+Occurrence = namedtuple(
+    "Occurrence",
+    "event original_date name status start_date start_time end_date end_time "
+    "description is_exception",
+)
+
+
+def weekly_rule(weekdays, until):
+    """Weekly RRULE on the given weekday names, ending on ``until``."""
+    codes = [code for day, code in WEEKDAY_CODES.items() if day in weekdays]
+    if not codes:
+        raise ValueError("Choose atleast one recurring day")
+    return f"FREQ=WEEKLY;BYDAY={','.join(codes)};UNTIL={until:%Y%m%d}T235959"
+
+
+def with_until(rule, until):
+    """``rule`` ending on ``until`` instead of its own UNTIL or COUNT."""
+    parts = [
+        part
+        for part in rule.split(";")
+        if part.partition("=")[0].upper() not in ("UNTIL", "COUNT")
+    ]
+    return ";".join(parts + [f"UNTIL={until:%Y%m%d}T235959"])
+
+
+def parse_rule(rule, start_date, start_time=time.min):
+    """Parse one RRULE, raising ``ValueError`` for what a series cannot use."""
+    parts = rule.upper().removeprefix("RRULE:").split(";")
+    parts = dict(part.partition("=")[::2] for part in parts)
+    if parts.get("FREQ") not in RULE_FREQUENCIES:
+        raise ValueError(
+            "The recurrence rule must repeat daily, weekly, monthly or yearly."
+        )
+    if "COUNT" in parts and not 0 < int(parts["COUNT"]) <= MAX_RULE_COUNT:
+        raise ValueError(
+            f"The recurrence rule can repeat at most {MAX_RULE_COUNT} times."
+        )
+    return rrulestr(rule, dtstart=datetime.combine(start_date, start_time))
+
+
+def validate_rule(rule, start_date, end_date):
+    """Raise ``ValueError`` unless ``rule`` has an occurrence in the series."""
+    first = parse_rule(rule, start_date).after(
+        datetime.combine(start_date, time.min), inc=True
+    )
+    if first is None or first.date() > end_date:
+        raise ValueError("The recurrence rule has no occurrence in these dates.")
+    return rule
+
+
+def series_rule(rule, weekdays, start_date, end_date):
+    """The RRULE given for a new series, or a weekly one on ``weekdays``."""
+    if not rule:
+        rule = weekly_rule(weekdays or [], end_date)
+    return validate_rule(rule, start_date, end_date)
+
+
+def rule_weekdays(rule):
+    names = {code: day for day, code in WEEKDAY_CODES.items()}
+    for part in (rule or "").split(";"):
+        key, _, value = part.partition("=")
+        if key.upper() == "BYDAY":
+            # Drop ordinals such as the "1" of "1MO".
+            return [names[code[-2:]] for code in value.upper().split(",")]
+    return []
+
+
+def occurrence_dates(event, first_day, last_day):
+    """Dates the rule of ``event`` generates between two days, inclusive."""
+    first_day = max(first_day, event.start_date)
+    last_day = min(last_day, event.end_date)
+    if first_day > last_day:
+        return []
+    rule = parse_rule(event.recurrence_rule, event.start_date, event.start_time)
+    return [
+        moment.date()
+        for moment in rule.between(
+            datetime.combine(first_day, time.min),
+            datetime.combine(last_day, time.max),
+            inc=True,
+        )
+    ]
+
+
+def event_interval(start_date, start_time, end_date, end_time):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, start_time), tz)
+    end = timezone.make_aware(
+        datetime.combine(end_date or start_date, end_time or start_time), tz,
+    )
+    if end <= start:
+        end = start + DEFAULT_EVENT_DURATION
+    return start, end
+
+
+def single_occurrence(event):
+    return Occurrence(
+        event,
+        event.start_date,
+        event.name,
+        event.status,
+        event.start_date,
+        event.start_time,
+        event.end_date,
+        event.end_time,
+        event.description,
+        False,
+    )
+
+
+def generated_occurrence(event, day):
+    return Occurrence(
+        event,
+        day,
+        event.name,
+        event.status,
+        day,
+        event.start_time,
+        day,
+        event.end_time,
+        event.description,
+        False,
+    )
+
+
+def edited_occurrence(event, exception):
+    start_date = exception.start_date or exception.original_date
+    return Occurrence(
+        event,
+        exception.original_date,
+        exception.name or event.name,
+        exception.status or event.status,
+        start_date,
+        exception.start_time or event.start_time,
+        exception.end_date or start_date,
+        exception.end_time or event.end_time,
+        exception.description or event.description,
+        True,
+    )
+
+
+def load_exceptions(series, first_day, last_day):
+    """``{event_id: {original_date: exception}}`` touching the window."""
+    exceptions = defaultdict(dict)
+    if series:
+        for exception in EventOccurrenceException.objects.filter(
+            Q(original_date__range=(first_day, last_day))
+            | Q(start_date__range=(first_day, last_day)),
+            event__in=series,
+        ):
+            exceptions[exception.event_id][exception.original_date] = exception
+    return exceptions
+
+
+def expand_occurrences(events, first_day, last_day):
+    """Occurrences of ``events`` between two days, ordered by start."""
+    events = list(events)
+    exceptions = load_exceptions(
+        [event for event in events if event.recurrence_rule], first_day, last_day
+    )
+    occurrences = []
+    for event in events:
+        if not event.recurrence_rule:
+            if event.start_date <= last_day and event.end_date >= first_day:
+                occurrences.append(single_occurrence(event))
+            continue
+        edited = exceptions.get(event.id, {})
+        for day in occurrence_dates(event, first_day, last_day):
+            if day not in edited:
+                occurrences.append(generated_occurrence(event, day))
+        for exception in edited.values():
+            occurrence = edited_occurrence(event, exception)
+            if (
+                not exception.is_cancelled
+                and occurrence.start_date <= last_day
+                and occurrence.end_date >= first_day
+            ):
+                occurrences.append(occurrence)
+    occurrences.sort(
+        key=lambda occurrence: (occurrence.start_date, occurrence.start_time)
+    )
+    return occurrences
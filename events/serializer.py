@@ -10,7 +10,7 @@ from common.serializer import (
     UserSerializer
 )
 from contacts.serializer import ContactSerializer
-from events.models import Event
+from events.models import Event, EventOccurrenceException
 from teams.serializer import TeamsSerializer
 
 
@@ -38,6 +38,7 @@ class EventSerializer(serializers.ModelSerializer):
             "end_time",
             "description",
             "date_of_meeting",
+            "recurrence_rule",
             "created_by",
             "created_at",
             "contacts",
@@ -150,6 +151,72 @@ class EventCreateSwaggerSerializer(serializers.ModelSerializer):
             "recurring_days"
         )
 
+
+class EventOccurrenceRangeSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, data):
+        if data["end_date"] < data["start_date"]:
+            raise serializers.ValidationError(
+                {"end_date": "End Date cannot be less than start date"}
+            )
+        if (data["end_date"] - data["start_date"]).days > 366:
+            raise serializers.ValidationError(
+                {"end_date": "The range cannot be longer than a year."}
+            )
+        return data
+
+
+class CalendarRangeSerializer(EventOccurrenceRangeSerializer):
+    profile = serializers.UUIDField(required=False)
+
+
+class CalendarItemSerializer(serializers.Serializer):
+    source = serializers.CharField()
+    object_id = serializers.UUIDField()
+    title = serializers.CharField()
+    starts_at = serializers.DateTimeField()
+    ends_at = serializers.DateTimeField()
+    all_day = serializers.BooleanField()
+    original_date = serializers.DateField(allow_null=True)
+
+
+class EventOccurrenceSerializer(serializers.Serializer):
+    event_id = serializers.UUIDField(source="event.id")
+    original_date = serializers.DateField()
+    name = serializers.CharField()
+    status = serializers.CharField(allow_null=True)
+    start_date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_date = serializers.DateField()
+    end_time = serializers.TimeField(allow_null=True)
+    description = serializers.CharField(allow_null=True)
+    is_exception = serializers.BooleanField()
+
+
+class EventOccurrenceExceptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventOccurrenceException
+        fields = (
+            "name",
+            "status",
+            "start_date",
+            "start_time",
+            "end_date",
+            "end_time",
+            "description",
+        )
+
+    def validate(self, data):
+        start_date = data.get("start_date")
+        end_date = data.get("end_date")
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError(
+                {"end_date": "End Date cannot be less than start date"}
+            )
+        return data
+
 class EventDetailEditSwaggerSerializer(serializers.Serializer):
     comment = serializers.CharField()
     event_attachment = serializers.FileField()
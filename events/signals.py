@@ -0,0 +1,90 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from events.calendar import (
+    SOURCES,
+    bump_event_versions,
+    opportunity_task_ids,
+    refresh_entries,
+)
+from events.models import EventOccurrenceException
+from opportunity.models import Opportunity
+
+# Many-to-many fields that decide who sees an object on their calendar.
+ASSIGNEE_FIELDS = {
+    "event": ("assigned_to",),
+    "planner": ("assigned_to", "attendees_user"),
+    "task": ("assigned_to",),
+    "case": ("assigned_to",),
+}
+
+
+def object_saved(source):
+    def receiver(sender, instance, **kwargs):
+        refresh_entries(source, [instance.pk])
+
+    return receiver
+
+
+def occurrence_changed(sender, instance, **kwargs):
+    bump_event_versions(instance.event_id)
+
+
+def assignees_changed(source, model, field_name, object_ids=list):
+    """Refresh ``source`` rows when ``model.field_name`` changes on either side.
+
+    ``object_ids`` maps the changed ``model`` ids to the ids of ``source``.
+    """
+    field = model._meta.get_field(field_name)
+    through = field.remote_field.through
+    column = f"{field.m2m_field_name()}_id"
+    related_column = f"{field.m2m_reverse_field_name()}_id"
+
+    def receiver(sender, instance, action, reverse, pk_set, **kwargs):
+        if reverse and action == "pre_clear":
+            # The rows are gone once the clear is done, so note them first.
+            instance._calendar_cleared = list(
+                through.objects.filter(**{related_column: instance.pk}).values_list(
+                    column, flat=True
+                )
+            )
+            return
+        if action not in ("post_add", "post_remove", "post_clear"):
+            return
+        if not reverse:
+            changed = [instance.pk]
+        elif action == "post_clear":
+            changed = getattr(instance, "_calendar_cleared", [])
+        else:
+            changed = pk_set or []
+        refresh_entries(source, object_ids(changed))
+
+    return receiver
+
+
+def connect():
+    for source, (model, _) in SOURCES.items():
+        receiver = object_saved(source)
+        uid = f"calendar_{source}"
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        for field_name in ASSIGNEE_FIELDS.get(source, ()):
+            m2m_changed.connect(
+                assignees_changed(source, model, field_name),
+                sender=model._meta.get_field(field_name).remote_field.through,
+                weak=False,
+                dispatch_uid=f"calendar_{source}_{field_name}",
+            )
+    m2m_changed.connect(
+        assignees_changed(
+            "opportunity_task", Opportunity, "assigned_to", opportunity_task_ids
+        ),
+        sender=Opportunity.assigned_to.through,
+        weak=False,
+        dispatch_uid="calendar_opportunity_assigned_to",
+    )
+    for signal in (post_save, post_delete):
+        signal.connect(
+            occurrence_changed,
+            sender=EventOccurrenceException,
+            dispatch_uid="calendar_occurrence_exception",
+        )
@@ -35,3 +35,13 @@ event_comment_edit_params = [
     organization_params_in_header,
     OpenApiParameter("comment", OpenApiTypes.STR,OpenApiParameter.QUERY),
 ]
+
+event_occurrence_list_params = [
+    organization_params_in_header,
+    OpenApiParameter("start_date", OpenApiTypes.DATE, OpenApiParameter.QUERY),
+    OpenApiParameter("end_date", OpenApiTypes.DATE, OpenApiParameter.QUERY),
+]
+
+calendar_params = event_occurrence_list_params + [
+    OpenApiParameter("profile", OpenApiTypes.UUID, OpenApiParameter.QUERY),
+]
@@ -1,9 +1,7 @@
 from celery import Celery
 from django.conf import settings
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 
-from common.models import Profile
+from common.notifications import notify_profiles
 from events.models import Event
 
 app = Celery("redis://")
@@ -20,29 +18,26 @@ def send_email(event_id, recipients):
     context["event_date_of_meeting"] = event.date_of_meeting
     context["url"] = settings.DOMAIN_NAME
     # recipients = event.assigned_to.filter(is_active=True)
-    for profile_id in recipients:
-        recipients_list = []
-        profile = Profile.objects.filter(id=profile_id, is_active=True).first()
-        if profile:
-            recipients_list.append(profile.user.email)
-            event_members = event.assigned_to.filter(is_active=True)
+    members = list(
+        event.assigned_to.filter(is_active=True).values_list("id", "user__email")
+    )
 
-            context["other_members"] = list(
-                event_members.exclude(id=profile.id).values_list(
-                    "user__email", flat=True
-                )
-            )
-            if len(context["other_members"]) > 0:
-                context["other_members"] = ", ".join(context["other_members"])
-            else:
-                context["other_members"] = ""
-            context["user"] = profile.user.email
-            html_content = render_to_string(
-                "assigned_to_email_template_event.html", context=context
-            )
-            msg = EmailMessage(subject=subject, body=html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    def member_context(profile):
+        return {
+            "user": profile.user.email,
+            "other_members": ", ".join(
+                email for member_id, email in members if member_id != profile.id
+            ),
+        }
+
+    notify_profiles(
+        recipients,
+        "assigned_to_email_template_event.html",
+        subject,
+        context,
+        extra_context=member_context,
+        obj=event,
+    )
 
     # if recipients.count() > 0:
     #     for recipient in recipients:
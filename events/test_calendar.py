@@ -0,0 +1,122 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.models import Org, Profile, User
+from events.models import CalendarEntry, Event
+from events.views import CalendarView
+from tasks.models import Task
+from teams.models import Teams
+from teams.tasks import remove_users
+
+
+class CalendarTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="calendar org")
+        self.user = User.objects.create(email="owner@example.com")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role="ADMIN"
+        )
+        self.agent = Profile.objects.create(
+            user=User.objects.create(email="agent@example.com"), org=self.org
+        )
+
+    def feed(self, profile=None, start_date="2026-03-01", end_date="2026-03-31"):
+        request = APIRequestFactory().get(
+            "/api/events/calendar/",
+            {"start_date": start_date, "end_date": end_date}
+            | ({"profile": str(profile.id)} if profile else {}),
+        )
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        response = CalendarView.as_view()(request)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["entries"]
+
+    def create_event(self, **fields):
+        event = Event.objects.create(
+            **{
+                "name": "Viewing",
+                "event_type": "Non-Recurring",
+                "start_date": datetime.date(2026, 3, 10),
+                "end_date": datetime.date(2026, 3, 10),
+                "start_time": datetime.time(9),
+                "end_time": datetime.time(10),
+                "org": self.org,
+                **fields,
+            }
+        )
+        event.assigned_to.add(self.profile)
+        return event
+
+    def test_entries_follow_saves_and_assignments(self):
+        event = self.create_event()
+        event.assigned_to.add(self.agent)
+        task = Task.objects.create(
+            title="Call back",
+            status="New",
+            priority="High",
+            due_date=datetime.date(2026, 3, 5),
+            org=self.org,
+        )
+        task.assigned_to.add(self.agent)
+
+        entries = self.feed(self.agent)
+        self.assertEqual(
+            [(entry["source"], entry["title"]) for entry in entries],
+            [("task", "Call back"), ("event", "Viewing")],
+        )
+        self.assertTrue(entries[0]["all_day"])
+        self.assertEqual([entry["title"] for entry in self.feed()], ["Viewing"])
+
+        self.agent.event_assigned.clear()
+        task.status = "Completed"
+        task.save()
+        self.assertEqual(self.feed(self.agent), [])
+        event.delete()
+        self.assertFalse(CalendarEntry.objects.exists())
+
+    def test_series_is_expanded_within_the_window(self):
+        self.create_event(
+            name="Stand-up",
+            event_type="Recurring",
+            start_date=datetime.date(2026, 1, 1),
+            end_date=datetime.date(2026, 12, 31),
+            recurrence_rule="FREQ=WEEKLY;BYDAY=MO",
+        )
+        self.assertEqual(CalendarEntry.objects.count(), 1)
+        entries = self.feed(start_date="2026-03-01", end_date="2026-03-15")
+        self.assertEqual(
+            [entry["original_date"] for entry in entries],
+            ["2026-03-02", "2026-03-09"],
+        )
+
+    def test_team_removal_and_rebuild(self):
+        team = Teams.objects.create(name="sales", org=self.org)
+        event = self.create_event()
+        event.teams.add(team)
+        event.assigned_to.add(self.agent)
+        remove_users([str(self.agent.id)], str(team.id))
+        self.assertEqual(self.feed(self.agent), [])
+
+        CalendarEntry.objects.all().delete()
+        call_command("rebuild_calendar_entries", stdout=StringIO())
+        self.assertEqual(len(self.feed()), 1)
+
+    def test_other_profiles_need_admin(self):
+        self.profile.role = "USER"
+        self.profile.save()
+        request = APIRequestFactory().get(
+            "/api/events/calendar/",
+            {
+                "start_date": "2026-03-01",
+                "end_date": "2026-03-31",
+                "profile": str(self.agent.id),
+            },
+        )
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        self.assertEqual(CalendarView.as_view()(request).status_code, 403)
@@ -0,0 +1,118 @@
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.models import Org, Profile, User
+from common.utils import generate_calendar_feed_url
+from events.ics import fold
+from events.models import CalendarVersion, Event, EventOccurrenceException
+from events.views import CalendarFeedUrlView, CalendarFeedView
+from properties.models import Property, PropertyViewing
+
+
+class CalendarFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Org.objects.create(name="feed org")
+        self.profile = Profile.objects.create(
+            user=User.objects.create(email="agent@example.com"), org=self.org
+        )
+        self.day = timezone.localdate() + timedelta(days=14)
+        self.event = Event.objects.create(
+            name="Notary, signing",
+            event_type="Non-Recurring",
+            start_date=self.day,
+            start_time=time(12, 30),
+            end_date=self.day,
+            end_time=time(14),
+            org=self.org,
+        )
+        self.event.assigned_to.add(self.profile)
+
+    def get(self, etag=None, signature=None, url=None):
+        url = url or generate_calendar_feed_url(self.profile.id)
+        if signature:
+            url = url.split("?")[0] + f"?signature={signature}"
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = APIRequestFactory().get(url, **headers)
+        return CalendarFeedView.as_view()(request, profile_id=self.profile.id)
+
+    def version(self):
+        return CalendarVersion.objects.get(profile=self.profile).version
+
+    def test_feed_lists_events_and_viewings(self):
+        PropertyViewing.objects.create(
+            property=Property.objects.create(
+                reference="ICS-1", title="Flat", property_type="flat",
+                operation="sale", org=self.org,
+            ),
+            agent=self.profile,
+            starts_at=timezone.make_aware(datetime.combine(self.day, time(10))),
+            ends_at=timezone.make_aware(datetime.combine(self.day, time(11))),
+            org=self.org,
+        )
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = response.content.decode()
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertIn("SUMMARY:Viewing: Flat\r\n", body)
+        self.assertIn("SUMMARY:Notary\\, signing\r\n", body)
+        self.assertIn(f"DTSTART;TZID=Europe/Madrid:{self.day:%Y%m%d}T123000", body)
+        self.assertLess(body.index("Viewing: Flat"), body.index("Notary"))
+
+    def test_unchanged_calendar_polls_are_cheap(self):
+        etag = self.get()["ETag"]
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(etag).status_code, 304)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get().status_code, 200)
+
+        version = self.version()
+        self.event.description = "Not shown in the feed"
+        self.event.save()
+        self.assertEqual(self.version(), version)
+
+        self.event.end_time = time(15)
+        self.event.save()
+        self.assertEqual(self.version(), version + 1)
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_series_is_written_with_its_rule(self):
+        self.event.event_type = "Recurring"
+        self.event.end_date = self.day + timedelta(days=60)
+        self.event.recurrence_rule = "FREQ=WEEKLY;UNTIL=20991231T235959"
+        self.event.save()
+        EventOccurrenceException.objects.create(
+            event=self.event,
+            original_date=self.day + timedelta(days=7),
+            is_cancelled=True,
+        )
+        body = self.get().content.decode()
+        self.assertIn("RRULE:FREQ=WEEKLY;UNTIL=20991231T225959Z\r\n", body)
+        exdate = self.day + timedelta(days=7)
+        self.assertIn(f"EXDATE;TZID=Europe/Madrid:{exdate:%Y%m%d}T123000", body)
+
+    def test_bad_signature_is_refused(self):
+        self.assertEqual(self.get(signature="0" * 64).status_code, 403)
+
+    def test_regenerated_url_revokes_the_old_one(self):
+        request = APIRequestFactory().post("/api/events/calendar/feed/")
+        force_authenticate(request, user=self.profile.user)
+        request.profile = self.profile
+        url = CalendarFeedUrlView.as_view()(request).data["feed_url"]
+
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(url=url).status_code, 200)
+
+    def test_long_lines_are_folded(self):
+        folded = fold("SUMMARY:" + "ñ" * 80)
+        self.assertTrue(
+            all(len(line.encode()) <= 75 for line in folded.split("\r\n"))
+        )
+        self.assertEqual(folded.replace("\r\n ", ""), "SUMMARY:" + "ñ" * 80)
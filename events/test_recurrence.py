@@ -0,0 +1,188 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.models import Org, Profile, User
+from events.models import Event, EventOccurrenceException
+from events.recurrence import series_rule
+from events.views import (
+    EventDetailView,
+    EventListView,
+    EventOccurrenceListView,
+    EventOccurrenceView,
+)
+from properties.scheduling import busy_intervals
+
+
+class RecurringEventTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="events org")
+        self.user = User.objects.create(email="planner@example.com")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role="ADMIN"
+        )
+        self.agent = Profile.objects.create(
+            user=User.objects.create(email="agent@example.com"), org=self.org
+        )
+
+    def call(self, view, method, path, data=None, **kwargs):
+        factory = APIRequestFactory()
+        if method == "get":
+            request = factory.get(path, data)
+        else:
+            request = getattr(factory, method)(path, data, format="json")
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        return view.as_view()(request, **kwargs)
+
+    def create_series(self):
+        with mock.patch("events.views.send_email.delay") as delay:
+            response = self.call(
+                EventListView,
+                "post",
+                "/api/events/",
+                {
+                    "name": "Weekly review",
+                    "event_type": "Recurring",
+                    "start_date": "2026-01-05",
+                    "end_date": "2026-12-31",
+                    "start_time": "10:00:00",
+                    "end_time": "11:00:00",
+                    "description": "",
+                    "recurring_days": ["Monday", "Wednesday"],
+                    "assigned_to": [str(self.agent.id)],
+                },
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        delay.assert_called_once()
+        return Event.objects.get()
+
+    def occurrences(self, start_date, end_date):
+        response = self.call(
+            EventOccurrenceListView,
+            "get",
+            "/api/events/occurrences/",
+            {"start_date": start_date, "end_date": end_date},
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["occurrences"]
+
+    def test_series_is_one_row_expanded_per_window(self):
+        event = self.create_series()
+        self.assertEqual(
+            event.recurrence_rule, "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261231T235959"
+        )
+        occurrences = self.occurrences("2026-01-05", "2026-01-18")
+        self.assertEqual(
+            [occurrence["start_date"] for occurrence in occurrences],
+            ["2026-01-05", "2026-01-07", "2026-01-12", "2026-01-14"],
+        )
+        self.assertEqual(len(self.occurrences("2026-01-01", "2026-12-31")), 104)
+
+    def test_new_end_date_moves_the_rule_until(self):
+        event = self.create_series()
+        with mock.patch("events.views.send_email.delay"):
+            response = self.call(
+                EventDetailView,
+                "put",
+                f"/api/events/{event.id}/",
+                {
+                    "name": "Weekly review",
+                    "event_type": "Recurring",
+                    "start_date": "2026-01-05",
+                    "end_date": "2026-03-31",
+                    "start_time": "10:00:00",
+                    "end_time": "11:00:00",
+                    "description": "",
+                },
+                pk=event.id,
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        event.refresh_from_db()
+        self.assertEqual(
+            event.recurrence_rule, "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20260331T235959"
+        )
+
+    def test_rejected_rule_leaves_the_event_unchanged(self):
+        event = self.create_series()
+        with mock.patch("events.views.send_email.delay"):
+            response = self.call(
+                EventDetailView,
+                "put",
+                f"/api/events/{event.id}/",
+                {
+                    "name": "Renamed review",
+                    "event_type": "Recurring",
+                    "start_date": "2026-01-05",
+                    "end_date": "2026-01-06",
+                    "start_time": "10:00:00",
+                    "end_time": "11:00:00",
+                    "description": "",
+                    "recurring_days": ["Wednesday"],
+                },
+                pk=event.id,
+            )
+        self.assertEqual(response.status_code, 400)
+        event.refresh_from_db()
+        self.assertEqual(
+            (event.name, event.end_date), ("Weekly review", datetime.date(2026, 12, 31))
+        )
+
+    def test_only_daily_to_yearly_rules_with_a_bounded_count(self):
+        dates = (datetime.date(2026, 1, 5), datetime.date(2026, 12, 31))
+        for rule in ("FREQ=SECONDLY", "FREQ=HOURLY;COUNT=5", "FREQ=DAILY;COUNT=5000"):
+            with self.assertRaises(ValueError):
+                series_rule(rule, None, *dates)
+        self.assertEqual(
+            series_rule("FREQ=MONTHLY;COUNT=12", None, *dates), "FREQ=MONTHLY;COUNT=12"
+        )
+
+    def test_edited_and_cancelled_occurrences(self):
+        event = self.create_series()
+        response = self.call(
+            EventOccurrenceView,
+            "put",
+            "/",
+            {"start_date": "2026-01-08", "start_time": "16:00:00"},
+            pk=str(event.id),
+            date="2026-01-07",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        response = self.call(
+            EventOccurrenceView, "delete", "/", pk=str(event.id), date="2026-01-12"
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.call(
+            EventOccurrenceView, "delete", "/", pk=str(event.id), date="2026-01-13"
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(EventOccurrenceException.objects.count(), 2)
+
+        occurrences = self.occurrences("2026-01-05", "2026-01-14")
+        self.assertEqual(
+            [
+                (occurrence["start_date"], occurrence["start_time"])
+                for occurrence in occurrences
+            ],
+            [
+                ("2026-01-05", "10:00:00"),
+                ("2026-01-08", "16:00:00"),
+                ("2026-01-14", "10:00:00"),
+            ],
+        )
+        self.assertTrue(occurrences[1]["is_exception"])
+
+    def test_agents_are_busy_only_during_occurrences(self):
+        self.create_series()
+        tz = timezone.get_current_timezone()
+        window_start = timezone.make_aware(datetime.datetime(2026, 1, 5), tz)
+        busy = busy_intervals(
+            [self.agent.id], window_start, window_start + datetime.timedelta(days=7)
+        )
+        self.assertEqual(
+            [start.date().isoformat() for start, *_ in busy[self.agent.id]],
+            ["2026-01-05", "2026-01-07"],
+        )
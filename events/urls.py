@@ -6,7 +6,12 @@ app_name = "api_events"
 
 urlpatterns = [
     path("", views.EventListView.as_view()),
+    path("occurrences/", views.EventOccurrenceListView.as_view()),
+    path("calendar/", views.CalendarView.as_view()),
+    path("calendar/feed/", views.CalendarFeedUrlView.as_view()),
+    path("calendar/feed/<uuid:profile_id>/", views.CalendarFeedView.as_view()),
     path("<str:pk>/", views.EventDetailView.as_view()),
+    path("<str:pk>/occurrences/<str:date>/", views.EventOccurrenceView.as_view()),
     path("comment/<str:pk>/", views.EventCommentView.as_view()),
     path("attachment/<str:pk>/", views.EventAttachmentView.as_view()),
 ]
@@ -1,7 +1,8 @@
-import json
-from datetime import datetime, timedelta
+import secrets
+from datetime import datetime
 
 from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 
 from rest_framework import status
@@ -11,6 +12,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from common.models import Attachments, Comment, Profile, User
+from common.utils import generate_calendar_feed_url, verify_calendar_feed_signature
 
 #from common.external_auth import CustomDualAuthentication
 from common.serializer import (
@@ -21,8 +23,24 @@ from common.serializer import (
 from contacts.models import Contact
 from contacts.serializer import ContactSerializer
 from events import swagger_params1
-from events.models import Event
+from events.calendar import calendar_feed
+from events.ics import cached_feed, feed_etag
+from events.models import CalendarVersion, Event, EventOccurrenceException
+from events.recurrence import (
+    expand_occurrences,
+    occurrence_dates,
+    rule_weekdays,
+    series_rule,
+    with_until,
+)
 from events.serializer import EventCreateSerializer, EventSerializer, EventCreateSwaggerSerializer, EventDetailEditSwaggerSerializer, EventCommentEditSwaggerSerializer
+from events.serializer import (
+    CalendarItemSerializer,
+    CalendarRangeSerializer,
+    EventOccurrenceExceptionSerializer,
+    EventOccurrenceRangeSerializer,
+    EventOccurrenceSerializer,
+)
 from events.tasks import send_email
 from teams.models import Teams
 from teams.serializer import TeamsSerializer
@@ -99,105 +117,277 @@ class EventListView(APIView, LimitOffsetPagination):
         data = {}
         serializer = EventCreateSerializer(data=params, request_obj=request)
         if serializer.is_valid():
-            start_date = params.get("start_date")
-            end_date = params.get("end_date")
-            recurring_days = json.dumps(params.get("recurring_days"))
-            if params.get("event_type") == "Non-Recurring":
-                event_obj = serializer.save(
-                    created_by=request.profile.user,
-                    date_of_meeting=params.get("start_date"),
-                    is_active=True,
-                    disabled=False,
-                    org=request.profile.org,
+            recurrence_rule = None
+            if params.get("event_type") == "Recurring":
+                # One series row; occurrences are expanded when read.
+                try:
+                    recurrence_rule = series_rule(
+                        params.get("recurrence_rule"),
+                        params.get("recurring_days"),
+                        serializer.validated_data["start_date"],
+                        serializer.validated_data["end_date"],
+                    )
+                except ValueError as e:
+                    return Response(
+                        {"error": True, "errors": str(e)},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+            event_obj = serializer.save(
+                created_by=request.profile,
+                date_of_meeting=params.get("start_date"),
+                is_active=True,
+                disabled=False,
+                org=request.profile.org,
+                recurrence_rule=recurrence_rule,
+            )
+
+            if params.get("contacts"):
+                obj_contact = Contact.objects.filter(
+                    id=params.get("contacts"), org=request.profile.org
                 )
+                event_obj.contacts.add(*obj_contact)
 
-                if params.get("contacts"):
-                    obj_contact = Contact.objects.filter(
-                        id=params.get("contacts"), org=request.profile.org
-                    )
-                    event_obj.contacts.add(obj_contact)
+            if params.get("teams"):
+                teams_list = params.get("teams")
+                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
+                event_obj.teams.add(*teams)
 
-                if params.get("teams"):
-                    teams_list = params.get("teams")
-                    teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                    event_obj.teams.add(*teams)
+            if params.get("assigned_to"):
+                assinged_to_list = params.get("assigned_to")
+                profiles = Profile.objects.filter(
+                    id__in=assinged_to_list, org=request.profile.org
+                )
+                event_obj.assigned_to.add(*profiles)
 
-                if params.get("assigned_to"):
-                    assinged_to_list = params.get("assigned_to")
-                    profiles = Profile.objects.filter(
-                        id__in=assinged_to_list, org=request.profile.org
-                    )
-                    event_obj.assigned_to.add(*profiles)
+            assigned_to_list = list(
+                event_obj.assigned_to.all().values_list("id", flat=True)
+            )
+            # A single invitation covers every occurrence of a series.
+            send_email.delay(
+                event_obj.id,
+                assigned_to_list,
+            )
+            return Response(
+                {"error": False, "message": "Event Created Successfully"},
+                status=status.HTTP_200_OK,
+            )
+        return Response(
+            {"error": True, "errors": serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class EventOccurrenceListView(APIView):
+    """Occurrences of the visible events in a date range, series expanded."""
+
+    #authentication_classes = (CustomDualAuthentication,)
+    permission_classes = (IsAuthenticated,)
 
-                assigned_to_list = list(
-                    event_obj.assigned_to.all().values_list("id", flat=True)
+    @extend_schema(
+        tags=["Events"],
+        parameters=swagger_params1.event_occurrence_list_params,
+        responses=EventOccurrenceSerializer(many=True),
+    )
+    def get(self, request, *args, **kwargs):
+        serializer = EventOccurrenceRangeSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                {"error": True, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        start_date = serializer.validated_data["start_date"]
+        end_date = serializer.validated_data["end_date"]
+        queryset = Event.objects.filter(
+            org=request.profile.org,
+            is_active=True,
+            start_date__lte=end_date,
+            end_date__gte=start_date,
+        )
+        if request.profile.role != "ADMIN" and not request.profile.is_admin:
+            queryset = queryset.filter(
+                Q(assigned_to__in=[request.profile]) | Q(created_by=request.profile)
+            ).distinct()
+        occurrences = expand_occurrences(queryset, start_date, end_date)
+        return Response(
+            {"occurrences": EventOccurrenceSerializer(occurrences, many=True).data}
+        )
+
+
+class CalendarView(APIView):
+    """Events, planner events, tasks, opportunity tasks and cases of a profile.
+
+    Admins may read the calendar of another profile of the org with
+    ``profile``.
+    """
+
+    #authentication_classes = (CustomDualAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=["Events"],
+        parameters=swagger_params1.calendar_params,
+        responses=CalendarItemSerializer(many=True),
+    )
+    def get(self, request, *args, **kwargs):
+        serializer = CalendarRangeSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                {"error": True, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        profile = request.profile
+        profile_id = serializer.validated_data.get("profile")
+        if profile_id and profile_id != profile.id:
+            if profile.role != "ADMIN" and not profile.is_admin:
+                return Response(
+                    {
+                        "error": True,
+                        "errors": "You don't have Permission to perform this action",
+                    },
+                    status=status.HTTP_403_FORBIDDEN,
                 )
-                send_email.delay(
-                    event_obj.id,
-                    assigned_to_list,
+            profile = Profile.objects.filter(id=profile_id, org=profile.org).first()
+            if not profile:
+                return Response(
+                    {"error": True, "errors": "Profile not found"},
+                    status=status.HTTP_404_NOT_FOUND,
                 )
-            if params.get("event_type") == "Recurring":
-                recurring_days = params.get("recurring_days")
-                if not recurring_days:
-                    return Response(
-                        {"error": True, "errors": "Choose atleast one recurring day"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-                start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-
-                delta = end_date - start_date
-                required_dates = []
-
-                for day in range(delta.days + 1):
-                    each_date = start_date + timedelta(days=day)
-                    if each_date.strftime("%A") in recurring_days:
-                        required_dates.append(each_date)
-
-                for each in required_dates:
-                    each = datetime.strptime(str(each), "%Y-%m-%d").date()
-                    data = serializer.validated_data
-
-                    event = Event.objects.create(
-                        created_by=request.profile.user,
-                        start_date=start_date,
-                        end_date=end_date,
-                        name=data["name"],
-                        event_type=data["event_type"],
-                        description=data["description"],
-                        start_time=data["start_time"],
-                        end_time=data["end_time"],
-                        date_of_meeting=each,
-                        org=request.profile.org,
-                    )
+        items = calendar_feed(
+            profile,
+            serializer.validated_data["start_date"],
+            serializer.validated_data["end_date"],
+        )
+        return Response({"entries": CalendarItemSerializer(items, many=True).data})
 
-                    if params.get("contacts"):
-                        obj_contact = Contact.objects.filter(
-                            id=params.get("contacts"), org=request.profile.org
-                        )
-                        event.contacts.add(obj_contact)
-
-                    if params.get("teams"):
-                        teams_list = params.get("teams")
-                        teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                        event.teams.add(*teams)
-
-                    if params.get("assigned_to"):
-                        assinged_to_list = params.get("assigned_to")
-                        profiles = Profile.objects.filter(
-                            id__in=assinged_to_list, org=request.profile.org
-                        )
-                        event.assigned_to.add(*profiles)
-
-                    assigned_to_list = list(
-                        event.assigned_to.all().values_list("id", flat=True)
-                    )
-                    send_email.delay(
-                        event.id,
-                        assigned_to_list,
-                    )
+
+class CalendarFeedUrlView(APIView):
+    """The signed URL calendar apps subscribe to for the profile's ICS feed.
+
+    POST replaces the URL with a new one; every URL given out before stops
+    working, e.g. after one has leaked.
+    """
+
+    #authentication_classes = (CustomDualAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def feed_url(self, request, token):
+        url = generate_calendar_feed_url(request.profile.id, token)
+        return Response({"feed_url": request.build_absolute_uri(url)})
+
+    @extend_schema(tags=["Events"], parameters=swagger_params1.organization_params)
+    def get(self, request, *args, **kwargs):
+        token = (
+            CalendarVersion.objects.filter(profile=request.profile)
+            .values_list("feed_token", flat=True)
+            .first()
+        )
+        return self.feed_url(request, token or "")
+
+    @extend_schema(tags=["Events"], parameters=swagger_params1.organization_params)
+    def post(self, request, *args, **kwargs):
+        token = secrets.token_urlsafe(32)
+        CalendarVersion.objects.update_or_create(
+            profile=request.profile, defaults={"feed_token": token}
+        )
+        return self.feed_url(request, token)
+
+
+class CalendarFeedView(APIView):
+    """ICS feed of one profile, authenticated by the signature in its URL.
+
+    Calendar apps poll it every few minutes. An unchanged calendar costs
+    one query, plus a cache read unless the client sends back the ETag.
+    """
+
+    authentication_classes = ()
+    permission_classes = ()
+
+    @extend_schema(tags=["Events"], exclude=True)
+    def get(self, request, profile_id, **kwargs):
+        row = (
+            Profile.objects.filter(id=profile_id, is_active=True)
+            .values_list("calendar_version__version", "calendar_version__feed_token")
+            .first()
+        )
+        version, token = row or (None, None)
+        if not verify_calendar_feed_signature(
+            profile_id, request.GET.get("signature"), token or ""
+        ):
+            return Response({"error": "Invalid link"}, status=403)
+        if row is None:
+            return Response({"error": "Calendar not found"}, status=404)
+        version = version or 0
+        etag = feed_etag(version)
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+        if etag.removeprefix("W/") in [
+            tag.strip().removeprefix("W/")
+            for tag in request.headers.get("If-None-Match", "").split(",")
+        ]:
+            return HttpResponseNotModified(headers=headers)
+        return HttpResponse(
+            cached_feed(profile_id, version),
+            content_type="text/calendar; charset=utf-8",
+            headers=headers,
+        )
+
+
+class EventOccurrenceView(APIView):
+    """Edit or cancel one occurrence of a recurring event."""
+
+    #authentication_classes = (CustomDualAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_occurrence(self, request, pk, date):
+        event = Event.objects.filter(pk=pk, org=request.profile.org).first()
+        if not event or not event.recurrence_rule:
+            return None, None, Response(
+                {"error": True, "errors": "Recurring event not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if request.profile.role != "ADMIN" and not request.profile.is_admin:
+            if not (
+                request.profile == event.created_by
+                or event.assigned_to.filter(id=request.profile.id).exists()
+            ):
+                return None, None, Response(
+                    {
+                        "error": True,
+                        "errors": "You don't have Permission to perform this action",
+                    },
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+        try:
+            original_date = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            original_date = None
+        if original_date is None or original_date not in occurrence_dates(
+            event, original_date, original_date
+        ):
+            return None, None, Response(
+                {"error": True, "errors": "The event has no occurrence on this date"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        exception = EventOccurrenceException.objects.filter(
+            event=event, original_date=original_date
+        ).first() or EventOccurrenceException(event=event, original_date=original_date)
+        return event, exception, None
+
+    @extend_schema(
+        tags=["Events"],
+        parameters=swagger_params1.organization_params,
+        request=EventOccurrenceExceptionSerializer,
+    )
+    def put(self, request, pk, date, **kwargs):
+        event, exception, error = self.get_occurrence(request, pk, date)
+        if error:
+            return error
+        serializer = EventOccurrenceExceptionSerializer(
+            exception, data=request.data, partial=True
+        )
+        if serializer.is_valid():
+            serializer.save(is_cancelled=False)
             return Response(
-                {"error": False, "message": "Event Created Successfully"},
+                {"error": False, "message": "Occurrence updated Successfully"},
                 status=status.HTTP_200_OK,
             )
         return Response(
@@ -205,6 +395,18 @@ class EventListView(APIView, LimitOffsetPagination):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @extend_schema(tags=["Events"], parameters=swagger_params1.organization_params)
+    def delete(self, request, pk, date, **kwargs):
+        event, exception, error = self.get_occurrence(request, pk, date)
+        if error:
+            return error
+        exception.is_cancelled = True
+        exception.save()
+        return Response(
+            {"error": False, "message": "Occurrence cancelled Successfully"},
+            status=status.HTTP_200_OK,
+        )
+
 
 class EventDetailView(APIView):
     model = Event
@@ -268,12 +470,17 @@ class EventDetailView(APIView):
         users_excluding_team_id = set(all_user_ids) - set(team_ids)
         users_excluding_team = Profile.objects.filter(id__in=users_excluding_team_id)
 
-        selected_recurring_days = Event.objects.filter(
-            name=self.event_obj.name
-        ).values_list("date_of_meeting", flat=True)
-        selected_recurring_days = set(
-            [day.strftime("%A") for day in selected_recurring_days]
-        )
+        if self.event_obj.recurrence_rule:
+            selected_recurring_days = set(
+                rule_weekdays(self.event_obj.recurrence_rule)
+            )
+        else:
+            selected_recurring_days = Event.objects.filter(
+                name=self.event_obj.name
+            ).values_list("date_of_meeting", flat=True)
+            selected_recurring_days = set(
+                [day.strftime("%A") for day in selected_recurring_days]
+            )
         context.update(
             {
                 "event_obj": EventSerializer(self.event_obj).data,
@@ -374,13 +581,37 @@ class EventDetailView(APIView):
                 {"error": True, "errors": "User company doesnot match with header...."},
                 status=status.HTTP_403_FORBIDDEN,
             )
+        previous_end_date = self.event_obj.end_date
         serializer = EventCreateSerializer(
             data=params,
             instance=self.event_obj,
             request_obj=request,
         )
         if serializer.is_valid():
-            event_obj = serializer.save()
+            recurrence_rule = self.event_obj.recurrence_rule
+            start_date = serializer.validated_data.get(
+                "start_date", self.event_obj.start_date
+            )
+            end_date = serializer.validated_data.get("end_date", previous_end_date)
+            recurring_days = params.get("recurring_days")
+            # Checked before saving so that a bad rule leaves the event as it was.
+            if recurrence_rule and (recurring_days or end_date != previous_end_date):
+                try:
+                    # New weekdays make a new weekly rule; otherwise the
+                    # current rule is kept, ending on the new end date.
+                    until_rule = with_until(recurrence_rule, end_date)
+                    recurrence_rule = series_rule(
+                        None if recurring_days else until_rule,
+                        recurring_days,
+                        start_date,
+                        end_date,
+                    )
+                except ValueError as e:
+                    return Response(
+                        {"error": True, "errors": str(e)},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+            event_obj = serializer.save(recurrence_rule=recurrence_rule)
             previous_assigned_to_users = list(
                 event_obj.assigned_to.all().values_list("id", flat=True)
             )
@@ -0,0 +1,130 @@
+"""Versions of an invoice stored as field-level diffs.
+
+Each ``InvoiceHistory`` row holds only the tracked fields that changed
+since the previous version; every ``CHECKPOINT_INTERVAL``-th version also
+holds the full state. A version is rebuilt from its nearest checkpoint
+and the diffs after it, in one query over at most that many rows. Values
+are kept in their JSON form: model fields as Django's serializers write
+them, and ``assigned_to`` as the sorted list of user ids.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils.encoding import is_protected_type
+
+from invoices.models import Invoice, InvoiceHistory
+
+TRACKED_FIELDS = (
+    "invoice_title",
+    "invoice_number",
+    "from_address",
+    "to_address",
+    "name",
+    "email",
+    "phone",
+    "quantity",
+    "rate",
+    "tax",
+    "total_amount",
+    "currency",
+    "amount_due",
+    "amount_paid",
+    "is_email_sent",
+    "status",
+    "details",
+    "due_date",
+)
+
+
+def field_value(obj, field):
+    value = field.value_from_object(obj)
+    return value if is_protected_type(value) else field.value_to_string(obj)
+
+
+def invoice_state(invoice):
+    state = {
+        name: field_value(invoice, Invoice._meta.get_field(name))
+        for name in TRACKED_FIELDS
+    }
+    state["assigned_to"] = sorted(
+        str(pk) for pk in invoice.assigned_to.values_list("id", flat=True)
+    )
+    # Round-trip so the state compares equal to one read back from the table.
+    return json.loads(json.dumps(state, cls=DjangoJSONEncoder))
+
+
+def diff(old, new):
+    return {name: value for name, value in new.items() if old.get(name, ()) != value}
+
+
+def describe(changes):
+    """The summary shown in the history, e.g. "Rate and Status have changed."."""
+    names = [" ".join(name.split("_")).title() for name in changes]
+    if len(names) > 1:
+        return ", ".join(names[:-1]) + " and " + names[-1] + " have changed."
+    if names:
+        return names[0] + " has changed."
+    return None
+
+
+def version_state(invoice_id, version=None):
+    """Return ``(version, state)`` of a version of the invoice, by default
+    the latest one, or ``(None, None)`` when it has no such version."""
+    checkpoints = InvoiceHistory.objects.filter(
+        invoice_id=invoice_id, snapshot__isnull=False
+    )
+    rows = InvoiceHistory.objects.filter(invoice_id=invoice_id)
+    if version is not None:
+        checkpoints = checkpoints.filter(version__lte=version)
+        rows = rows.filter(version__lte=version)
+    rows = rows.filter(
+        version__gte=Subquery(
+            checkpoints.order_by("-version").values("version")[:1]
+        )
+    ).order_by("version")
+    found = None
+    state = None
+    for row in rows.values("version", "changes", "snapshot"):
+        found = row["version"]
+        if row["snapshot"] is not None:
+            state = dict(row["snapshot"])
+        else:
+            state.update(row["changes"])
+    if version is not None and found != version:
+        return None, None
+    return found, state
+
+
+def record_version(invoice, updated_by=None, details=None):
+    """Store the current state of ``invoice`` as a new version, unless it
+    is the same as the latest one. Return the new ``InvoiceHistory``."""
+    with transaction.atomic():
+        # Versions of one invoice are numbered one writer at a time, from
+        # the state as stored rather than as held in memory.
+        invoice = (
+            Invoice.objects.select_for_update()
+            .only(*TRACKED_FIELDS)
+            .get(pk=invoice.pk)
+        )
+        last_version, previous = version_state(invoice.pk)
+        state = invoice_state(invoice)
+        changes = diff(previous or {}, state)
+        if last_version and not changes:
+            return None
+        version = (last_version or 0) + 1
+        checkpoint = (version - 1) % InvoiceHistory.CHECKPOINT_INTERVAL == 0
+        history = InvoiceHistory(
+            invoice=invoice,
+            version=version,
+            changes=changes if last_version else {},
+            snapshot=state if checkpoint else None,
+            updated_by=updated_by,
+            details=details
+            or (describe(changes) if last_version else "Invoice Created."),
+        )
+        # bulk_create skips BaseModel.save(), which would replace updated_by
+        # with the current user of the request, absent in a worker.
+        InvoiceHistory.objects.bulk_create([history])
+    return history
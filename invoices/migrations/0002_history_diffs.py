@@ -0,0 +1,176 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:47
+
+import json
+
+import django.core.serializers.json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+from django.utils.encoding import is_protected_type
+
+COPIED_FIELDS = (
+    "invoice_title",
+    "invoice_number",
+    "from_address",
+    "to_address",
+    "name",
+    "email",
+    "phone",
+    "quantity",
+    "rate",
+    "total_amount",
+    "currency",
+    "amount_due",
+    "amount_paid",
+    "is_email_sent",
+    "status",
+    "due_date",
+)
+# Tracked now but never copied into the history (its ``details`` is the
+# summary of the change); every migrated version takes the invoice's value.
+INVOICE_FIELDS = ("tax", "details")
+CHECKPOINT_INTERVAL = 10
+
+
+def field_value(obj, field):
+    value = field.value_from_object(obj)
+    return value if is_protected_type(value) else field.value_to_string(obj)
+
+
+def snapshots_to_diffs(apps, schema_editor):
+    """Turn the full copies of each invoice into a checkpoint every
+    CHECKPOINT_INTERVAL versions and field-level diffs in between."""
+    Invoice = apps.get_model("invoices", "Invoice")
+    InvoiceHistory = apps.get_model("invoices", "InvoiceHistory")
+    fields = [InvoiceHistory._meta.get_field(name) for name in COPIED_FIELDS]
+    invoice_fields = [Invoice._meta.get_field(name) for name in INVOICE_FIELDS]
+    rows = (
+        InvoiceHistory.objects.select_related("invoice")
+        .prefetch_related("assigned_to")
+        .order_by("invoice_id", "created_at", "id")
+    )
+    invoice_id = None
+    for row in rows.iterator(chunk_size=500):
+        if row.invoice_id != invoice_id:
+            invoice_id, version, previous = row.invoice_id, 0, {}
+            current = {
+                field.name: field_value(row.invoice, field)
+                for field in invoice_fields
+            }
+        state = {field.name: field_value(row, field) for field in fields}
+        state.update(current)
+        state["assigned_to"] = sorted(str(user.id) for user in row.assigned_to.all())
+        state = json.loads(json.dumps(state, cls=DjangoJSONEncoder))
+        version += 1
+        row.version = version
+        if version > 1:
+            row.changes = {
+                name: value
+                for name, value in state.items()
+                if previous.get(name) != value
+            }
+        row.snapshot = state if (version - 1) % CHECKPOINT_INTERVAL == 0 else None
+        row.save(update_fields=["version", "changes", "snapshot"])
+        previous = state
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='invoicehistory',
+            options={'ordering': ('-version',), 'verbose_name': 'InvoiceHistory', 'verbose_name_plural': 'InvoiceHistories'},
+        ),
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='changes',
+            field=models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='snapshot',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(snapshots_to_diffs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='amount_due',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='amount_paid',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='assigned_to',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='currency',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='due_date',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='email',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='from_address',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='invoice_number',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='invoice_title',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='is_email_sent',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='phone',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='quantity',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='rate',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='to_address',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='total_amount',
+        ),
+        migrations.AddConstraint(
+            model_name='invoicehistory',
+            constraint=models.UniqueConstraint(fields=('invoice', 'version'), name='invoice_history_version_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-19 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0003_bank_statements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_digest',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
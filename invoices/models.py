@@ -1,13 +1,14 @@
-import datetime
-
 import arrow
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
 
 from accounts.models import Account
 from common.models import Address, Org, User
 from common.base import BaseModel
+from common.sequences import next_values
 from common.utils import CURRENCY_CODES
 from teams.models import Teams
 
@@ -69,6 +70,8 @@ class Invoice(BaseModel):
 
     org = models.ForeignKey(Org, on_delete=models.SET_NULL, null=True, blank=True)
     tax = models.DecimalField(blank=True, null=True, max_digits=12, decimal_places=2)
+    # Content hash of the last PDF rendered, see invoices.pdf
+    pdf_digest = models.CharField(max_length=64, blank=True, editable=False)
 
     class Meta:
         verbose_name = "Invoice"
@@ -81,20 +84,44 @@ class Invoice(BaseModel):
         return f"{self.invoice_number}"
 
     def save(self, *args, **kwargs):
-        if not self.invoice_number:
+        if self.invoice_number:
+            return super(Invoice, self).save(*args, **kwargs)
+        # Numbering and saving in one transaction: a failed save hands the
+        # number back instead of leaving a gap.
+        with transaction.atomic():
             self.invoice_number = self.invoice_id_generator()
-            while Invoice.objects.filter(invoice_number=self.invoice_number).exists():
-                self.invoice_number = self.invoice_id_generator(
-                    prev_invoice_number=self.invoice_number
-                )
-        super(Invoice, self).save(*args, **kwargs)
-
-    def invoice_id_generator(self, prev_invoice_number=None):
-        if prev_invoice_number:
-            prev_invoice_number += 1
-            return prev_invoice_number
-        date = datetime.datetime.now().strftime("%d%m%Y")
-        return int(date + "0001")
+            super(Invoice, self).save(*args, **kwargs)
+
+    def invoice_id_generator(self):
+        return Invoice.invoice_numbers(self.org_id)[0]
+
+    @staticmethod
+    def invoice_numbers(org_id, count=1):
+        """Reserve ``count`` invoice numbers of today for an org.
+
+        Numbers are the date followed by a daily counter, e.g. 190120260001.
+        Bulk jobs should reserve all their numbers with one call, inside the
+        transaction that saves the invoices.
+        """
+        period = timezone.localdate().strftime("%d%m%Y")
+
+        def numbered_today():
+            numbers = Invoice.objects.filter(
+                org_id=org_id, invoice_number__startswith=period
+            ).values_list("invoice_number", flat=True)
+            return max(
+                (int(number[len(period):]) for number in numbers
+                 if number[len(period):].isdigit()),
+                default=0,
+            )
+
+        return [
+            f"{period}{value:04d}"
+            for value in next_values(
+                "invoice", org=org_id, period=period, count=count,
+                initial=numbered_today,
+            )
+        ]
 
     def formatted_total_amount(self):
         return self.currency + " " + str(self.total_amount)
@@ -155,90 +182,142 @@ class Invoice(BaseModel):
 
 class InvoiceHistory(BaseModel):
     """Model definition for InvoiceHistory.
-    This model is used to track/keep a record of the updates made to original invoice object."""
+    A version of an invoice, stored as the fields that changed since the
+    previous version. Every ``CHECKPOINT_INTERVAL`` versions the full state
+    is kept as well, so any version is rebuilt from a handful of rows (see
+    ``invoices.history``)."""
+
+    CHECKPOINT_INTERVAL = 10
 
-    INVOICE_STATUS = (
-        ("Draft", "Draft"),
-        ("Sent", "Sent"),
-        ("Paid", "Paid"),
-        ("Pending", "Pending"),
-        ("Cancelled", "Cancel"),
-    )
     invoice = models.ForeignKey(
         Invoice, on_delete=models.CASCADE, related_name="invoice_history"
     )
-    invoice_title = models.CharField(_("Invoice Title"), max_length=50)
-    invoice_number = models.CharField(_("Invoice Number"), max_length=50)
-    from_address = models.ForeignKey(
-        Address,
-        related_name="invoice_history_from_address",
-        on_delete=models.SET_NULL,
-        null=True,
-    )
-    to_address = models.ForeignKey(
-        Address,
-        related_name="invoice_history_to_address",
-        on_delete=models.SET_NULL,
-        null=True,
-    )
-    name = models.CharField(_("Name"), max_length=100)
-    email = models.EmailField(_("Email"))
-    assigned_to = models.ManyToManyField(
-        User, related_name="invoice_history_assigned_to"
-    )
-    # quantity is the number of hours worked
-    quantity = models.PositiveIntegerField(default=0)
-    # rate is the rate charged
-    rate = models.DecimalField(default=0, max_digits=12, decimal_places=2)
-    # total amount is product of rate and quantity
-    total_amount = models.DecimalField(
-        blank=True, null=True, max_digits=12, decimal_places=2
-    )
-    currency = models.CharField(
-        max_length=3, choices=CURRENCY_CODES, blank=True, null=True
-    )
-    phone = PhoneNumberField(null=True, blank=True)
-    # created_by = models.ForeignKey(
-    #     User, related_name='invoice_history_created_by',
-    #     on_delete=models.SET_NULL, null=True)
+    version = models.PositiveIntegerField()
+    # field name -> new value, in the JSON form of ``invoices.history``
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # the full state, on checkpoint versions only
+    snapshot = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
     updated_by = models.ForeignKey(
         User,
         related_name="invoice_history_created_by",
         on_delete=models.SET_NULL,
         null=True,
     )
-
-    amount_due = models.DecimalField(
-        blank=True, null=True, max_digits=12, decimal_places=2
-    )
-    amount_paid = models.DecimalField(
-        blank=True, null=True, max_digits=12, decimal_places=2
-    )
-    is_email_sent = models.BooleanField(default=False)
-    status = models.CharField(choices=INVOICE_STATUS, max_length=15, default="Draft")
     # details or description here stores the fields changed in the original invoice object
     details = models.TextField(_("Details"), null=True, blank=True)
-    due_date = models.DateField(blank=True, null=True)
 
     class Meta:
         verbose_name = "InvoiceHistory"
         verbose_name_plural = "InvoiceHistories"
         db_table = "invoice_history"
-        ordering = ("-created_at",)
+        ordering = ("-version",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invoice", "version"], name="invoice_history_version_unique"
+            )
+        ]
 
     def __str__(self):
-        """Unicode representation of Invoice."""
-        return self.invoice_number
+        """Unicode representation of InvoiceHistory."""
+        return f"{self.invoice_id} v{self.version}"
 
-    def formatted_total_amount(self):
-        return self.currency + " " + str(self.total_amount)
-
-    def formatted_rate(self):
-        return str(self.rate) + " " + self.currency
-
-    def formatted_total_quantity(self):
-        return str(self.quantity) + " " + "Hours"
+    @property
+    def is_checkpoint(self):
+        return self.snapshot is not None
 
     @property
     def created_on_arrow(self):
         return arrow.get(self.created_at).humanize()
+
+
+class BankStatement(BaseModel):
+    """A bank statement uploaded to reconcile invoices with the payments
+    received (see ``invoices.reconciliation``)."""
+
+    FORMATS = (
+        ("norma43", "Norma 43"),
+        ("csv", "CSV"),
+    )
+    IMPORT_STATUS = (
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    )
+    file = models.FileField(max_length=1001, upload_to="bank_statements/%Y/%m/")
+    file_format = models.CharField(max_length=10, choices=FORMATS)
+    status = models.CharField(max_length=20, choices=IMPORT_STATUS, default="pending")
+    message = models.TextField(blank=True, null=True)
+    movements_count = models.PositiveIntegerField(default=0)
+    proposed_count = models.PositiveIntegerField(default=0)
+    reconciled_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="bank_statements"
+    )
+
+    class Meta:
+        verbose_name = "Bank Statement"
+        verbose_name_plural = "Bank Statements"
+        db_table = "bank_statement"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.get_file_format_display()} {self.created_at:%Y-%m-%d}"
+
+
+class BankMovement(BaseModel):
+    """A payment received, as read from a ``BankStatement``, and the invoice
+    it was matched with."""
+
+    MATCH_METHODS = (
+        ("number", "Invoice number"),
+        ("amount_payer", "Amount and payer"),
+        ("amount", "Amount"),
+        ("fuzzy", "Similar payer"),
+    )
+    MOVEMENT_STATUS = (
+        ("unmatched", "Unmatched"),
+        ("proposed", "Proposed"),
+        ("reconciled", "Reconciled"),
+    )
+    statement = models.ForeignKey(
+        BankStatement, on_delete=models.CASCADE, related_name="movements"
+    )
+    booking_date = models.DateField()
+    value_date = models.DateField(blank=True, null=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(
+        max_length=3, choices=CURRENCY_CODES, blank=True, null=True
+    )
+    reference = models.CharField(max_length=255, blank=True, default="")
+    payer_name = models.CharField(max_length=255, blank=True, default="")
+    invoice = models.ForeignKey(
+        Invoice,
+        on_delete=models.SET_NULL,
+        related_name="bank_movements",
+        blank=True,
+        null=True,
+    )
+    match_method = models.CharField(
+        max_length=20, choices=MATCH_METHODS, blank=True, default=""
+    )
+    match_score = models.FloatField(default=0)
+    status = models.CharField(
+        max_length=20, choices=MOVEMENT_STATUS, default="unmatched"
+    )
+
+    class Meta:
+        verbose_name = "Bank Movement"
+        verbose_name_plural = "Bank Movements"
+        db_table = "bank_movement"
+        ordering = ("booking_date", "created_at")
+        indexes = [
+            models.Index(
+                fields=["statement", "status"], name="bank_movement_status_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_date} {self.amount} {self.payer_name}"
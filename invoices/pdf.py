@@ -0,0 +1,120 @@
+"""PDF copies of invoices.
+
+A PDF is stored under the SHA-256 of the HTML it is rendered from, so an
+invoice whose printable content has not changed is never rendered again,
+and two invoices that print the same share one file. Rendering is done
+with xhtml2pdf, a pure-Python renderer, and only ever in a Celery worker:
+web requests look the PDF up by the hash of the HTML and, when it is not
+there yet, queue ``invoices.tasks.render_invoice_pdf``.
+
+Each invoice remembers the hash of its last PDF, so when a change makes a
+new one the old file is deleted, unless another invoice or an unsent
+e-mail still uses it. ``prune_pdfs`` sweeps up what that leaves behind,
+e.g. files kept for an e-mail that has been sent since.
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from xhtml2pdf import pisa
+
+from emails.models import OutboxEmail
+from invoices.models import Invoice
+
+TEMPLATE = "invoice_download_pdf.html"
+PDF_DIR = "invoices/pdf"
+UNSENT_STATUSES = ("pending", "sending")
+
+
+class PdfRenderError(Exception):
+    pass
+
+
+def invoice_queryset():
+    return Invoice.objects.select_related("from_address", "to_address")
+
+
+def invoice_html(invoice):
+    return render_to_string(TEMPLATE, context={"invoice": invoice})
+
+
+def content_hash(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def pdf_path(digest):
+    return f"{PDF_DIR}/{digest}.pdf"
+
+
+def pdf_filename(invoice):
+    return f"Invoice-{invoice.invoice_number or invoice.id}.pdf"
+
+
+def stored_pdf(invoice):
+    """The storage path of the current PDF of ``invoice``, or None."""
+    path = pdf_path(content_hash(invoice_html(invoice)))
+    return path if default_storage.exists(path) else None
+
+
+def html_to_pdf(html):
+    output = BytesIO()
+    result = pisa.CreatePDF(html, dest=output, encoding="utf-8")
+    if result.err:
+        raise PdfRenderError(f"{result.err} error(s) rendering the PDF")
+    return output.getvalue()
+
+
+def render_pdf(invoice):
+    """Render ``invoice`` unless its PDF is stored; return the storage path."""
+    html = invoice_html(invoice)
+    digest = content_hash(html)
+    previous = invoice.pdf_digest
+    if previous != digest:
+        # Recorded first, so that a concurrent cleanup sees the file in use.
+        Invoice.objects.filter(pk=invoice.pk).update(pdf_digest=digest)
+        invoice.pdf_digest = digest
+    path = pdf_path(digest)
+    if not default_storage.exists(path):
+        saved = default_storage.save(path, ContentFile(html_to_pdf(html)))
+        if saved != path:
+            # Another worker stored the same content first.
+            default_storage.delete(saved)
+    if previous and previous != digest:
+        delete_unused_pdf(previous)
+    return path
+
+
+def delete_unused_pdf(digest):
+    """Delete the PDF stored under ``digest`` unless it is still in use."""
+    path = pdf_path(digest)
+    if Invoice.objects.filter(pdf_digest=digest).exists():
+        return
+    if OutboxEmail.objects.filter(
+        status__in=UNSENT_STATUSES, attachments__icontains=path
+    ).exists():
+        return
+    default_storage.delete(path)
+
+
+def prune_pdfs():
+    """Delete every stored PDF that is no longer in use; return how many."""
+    if not default_storage.exists(PDF_DIR):
+        return 0
+    # Listed first: a PDF rendered afterwards is recorded before it is stored.
+    paths = [f"{PDF_DIR}/{name}" for name in default_storage.listdir(PDF_DIR)[1]]
+    in_use = {
+        pdf_path(digest)
+        for digest in Invoice.objects.exclude(pdf_digest="").values_list(
+            "pdf_digest", flat=True
+        )
+    }
+    for attachments in OutboxEmail.objects.filter(
+        status__in=UNSENT_STATUSES
+    ).values_list("attachments", flat=True):
+        in_use.update(path for _, path, _ in attachments)
+    unused = [path for path in paths if path not in in_use]
+    for path in unused:
+        default_storage.delete(path)
+    return len(unused)
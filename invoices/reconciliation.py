@@ -0,0 +1,390 @@
+"""Bank statement import and invoice reconciliation.
+
+Statements in the Spanish Norma 43 (AEB Cuaderno 43) format or as CSV are
+read line by line, keeping only the credits: the payments received. Each
+movement is matched against the org's open invoices, which are loaded
+once per statement into dictionaries keyed by invoice number, outstanding
+amount and normalized payer name, so a match costs a few hash lookups:
+
+1. an invoice number found in the movement's reference;
+2. the amount, when exactly one invoice of that amount is due from the
+   payer;
+3. the amount, when exactly one open invoice is due for it;
+4. a payer name similar to the invoice's customer or account name
+   (``difflib``, among the names sharing the start of a word with it),
+   for invoices of at least the amount received.
+
+Matches are stored as proposals, in batches with ``bulk_create``. Once
+they are confirmed, ``reconcile`` books them on the invoices with one
+``bulk_update``, after checking them again against the locked invoices.
+"""
+import csv
+import difflib
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from invoices.history import record_version
+from invoices.models import BankMovement, Invoice
+from invoices.reports import invalidate_reports
+
+BATCH_SIZE = 1000
+FUZZY_CUTOFF = 0.85
+CLOSED_STATUSES = ("Paid", "Cancelled")
+CENT = Decimal("0.01")
+# ISO 4217 numeric codes of the Norma 43 account header.
+NORMA43_CURRENCIES = {"978": "EUR", "840": "USD", "826": "GBP", "756": "CHF"}
+CSV_HEADERS = {
+    "date": ("date", "booking date", "fecha", "fecha operacion"),
+    "value_date": ("value date", "fecha valor"),
+    "amount": ("amount", "importe"),
+    "currency": ("currency", "divisa", "moneda"),
+    "reference": ("reference", "concept", "description", "concepto", "descripcion"),
+    "payer": ("payer", "name", "ordenante", "nombre"),
+}
+CSV_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y")
+LEGAL_SUFFIXES = {"SL", "SLU", "SA", "SAU", "SC", "SCP", "CB", "SLL"}
+TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9/_.-]*")
+
+Movement = namedtuple(
+    "Movement", "booking_date value_date amount currency reference payer_name"
+)
+
+
+def strip_accents(text):
+    return "".join(
+        char
+        for char in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(char)
+    )
+
+
+def normalize_name(name):
+    words = re.sub(r"[^A-Z0-9 ]", " ", strip_accents(name or "").upper()).split()
+    return " ".join(word for word in words if word not in LEGAL_SUFFIXES)
+
+
+def normalize_number(number):
+    return re.sub(r"[^A-Z0-9]", "", (number or "").upper())
+
+
+def name_keys(name):
+    return {word[:4] for word in name.split() if len(word) >= 3}
+
+
+def parse_amount(value):
+    value = (value or "").strip().replace(" ", "")
+    if "," in value and ("." not in value or value.rindex(",") > value.rindex(".")):
+        value = value.replace(".", "").replace(",", ".")
+    else:
+        value = value.replace(",", "")
+    try:
+        return Decimal(value).quantize(CENT)
+    except InvalidOperation:
+        return None
+
+
+def parse_date(value, formats):
+    for date_format in formats:
+        try:
+            return datetime.strptime(value.strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def norma43_movements(lines):
+    """Credits of a Norma 43 file: record 11 opens an account, 22 is a
+    movement and the 23 records after it carry its free-text concepts,
+    the first of which names the payer."""
+    currency = None
+    movement = None
+    for line in lines:
+        line = line.rstrip("\r\n").ljust(80)
+        code = line[:2]
+        if code == "23":
+            if movement:
+                concepts = [line[4:42].strip(), line[42:80].strip()]
+                if not movement.payer_name:
+                    movement = movement._replace(payer_name=concepts[0])
+                reference = " ".join(filter(None, [movement.reference, *concepts]))
+                movement = movement._replace(reference=reference[:255])
+            continue
+        if movement:
+            yield movement
+            movement = None
+        if code == "11":
+            currency = NORMA43_CURRENCIES.get(line[47:50])
+        elif code == "22" and line[27] == "2" and line[28:42].isdigit():
+            # 1 is a debit, 2 a credit; the amount is in cents.
+            references = [line[52:64].strip(), line[64:80].strip()]
+            movement = Movement(
+                booking_date=parse_date(line[10:16], ("%y%m%d",)),
+                value_date=parse_date(line[16:22], ("%y%m%d",)),
+                amount=Decimal(line[28:42]).scaleb(-2),
+                currency=currency,
+                reference=" ".join(filter(None, references)),
+                payer_name="",
+            )
+            if movement.booking_date is None:
+                movement = None
+    if movement:
+        yield movement
+
+
+def csv_movements(lines):
+    """Credits of a CSV file with a header row; ``;``, ``,`` and tabs are
+    accepted as delimiters and ``1.234,56`` as well as ``1234.56``."""
+    lines = iter(lines)
+    header = next(lines, "")
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=";,\t")
+    except csv.Error:
+        dialect = csv.excel
+    columns = {}
+    for index, name in enumerate(next(csv.reader([header], dialect))):
+        name = strip_accents(name).strip().lower()
+        for key, aliases in CSV_HEADERS.items():
+            if name in aliases:
+                columns.setdefault(key, index)
+
+    def cell(row, key):
+        index = columns.get(key)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    for row in csv.reader(lines, dialect):
+        amount = parse_amount(cell(row, "amount"))
+        booking_date = parse_date(cell(row, "date"), CSV_DATE_FORMATS)
+        if not amount or amount <= 0 or booking_date is None:
+            continue
+        yield Movement(
+            booking_date=booking_date,
+            value_date=parse_date(cell(row, "value_date"), CSV_DATE_FORMATS),
+            amount=amount,
+            currency=cell(row, "currency").upper()[:3] or None,
+            reference=cell(row, "reference")[:255],
+            payer_name=cell(row, "payer")[:255],
+        )
+
+
+PARSERS = {
+    "norma43": (norma43_movements, "latin-1"),
+    "csv": (csv_movements, "utf-8-sig"),
+}
+
+
+def outstanding(invoice):
+    if invoice.amount_due is not None:
+        return invoice.amount_due
+    return (invoice.total_amount or 0) - (invoice.amount_paid or 0)
+
+
+class InvoiceMatcher:
+    """Hash lookups of an org's open invoices by number, amount and payer.
+
+    An invoice is proposed for one movement at most.
+    """
+
+    def __init__(self, org_id):
+        invoices = (
+            Invoice.objects.filter(org_id=org_id)
+            .exclude(status__in=CLOSED_STATUSES)
+            .only(
+                "invoice_number",
+                "name",
+                "currency",
+                "amount_due",
+                "amount_paid",
+                "total_amount",
+            )
+        )
+        account_names = defaultdict(list)
+        for invoice_id, name in Invoice.accounts.through.objects.filter(
+            invoice__org_id=org_id
+        ).exclude(invoice__status__in=CLOSED_STATUSES).values_list(
+            "invoice_id", "account__name"
+        ):
+            account_names[invoice_id].append(name)
+        self.by_number = {}
+        self.by_amount = defaultdict(list)
+        self.by_name = defaultdict(list)
+        # Names by the first letters of their words, so the similar names
+        # are looked for among a few candidates instead of all of them.
+        self.name_keys = defaultdict(set)
+        self.names = {}
+        self.taken = set()
+        for invoice in invoices:
+            self.by_number[normalize_number(invoice.invoice_number)] = invoice
+            self.by_amount[Decimal(outstanding(invoice)).quantize(CENT)].append(
+                invoice
+            )
+            names = {
+                normalize_name(name)
+                for name in [invoice.name, *account_names[invoice.id]]
+            }
+            self.names[invoice.id] = names - {""}
+            for name in self.names[invoice.id]:
+                self.by_name[name].append(invoice)
+                for key in name_keys(name):
+                    self.name_keys[key].add(name)
+
+    def available(self, invoices, movement):
+        return [
+            invoice
+            for invoice in invoices
+            if invoice.id not in self.taken
+            and not (
+                movement.currency
+                and invoice.currency
+                and movement.currency != invoice.currency
+            )
+        ]
+
+    def find(self, movement):
+        for token in TOKEN_RE.findall(movement.reference):
+            invoice = self.by_number.get(normalize_number(token))
+            if invoice and self.available([invoice], movement):
+                return invoice, "number", 1.0
+        same_amount = self.available(self.by_amount.get(movement.amount, []), movement)
+        payer = normalize_name(movement.payer_name)
+        if payer:
+            from_payer = [
+                invoice for invoice in same_amount if payer in self.names[invoice.id]
+            ]
+            if len(from_payer) == 1:
+                return from_payer[0], "amount_payer", 0.9
+        if len(same_amount) == 1:
+            return same_amount[0], "amount", 0.6
+        if not payer:
+            return None, "", 0
+        candidates = set()
+        for key in name_keys(payer):
+            candidates |= self.name_keys.get(key, set())
+        best = (None, "", 0)
+        for name in difflib.get_close_matches(
+            payer, candidates, n=3, cutoff=FUZZY_CUTOFF
+        ):
+            score = difflib.SequenceMatcher(None, payer, name).ratio() * 0.8
+            for invoice in self.available(self.by_name[name], movement):
+                if outstanding(invoice) >= movement.amount and score > best[2]:
+                    best = (invoice, "fuzzy", round(score, 2))
+        return best
+
+    def match(self, movement):
+        invoice, method, score = self.find(movement)
+        if invoice:
+            self.taken.add(invoice.id)
+        return invoice, method, score
+
+
+def import_statement(statement):
+    """Read the movements of ``statement`` and propose their invoices."""
+    statement.status = "running"
+    statement.started_at = timezone.now()
+    statement.save(update_fields=["status", "started_at"])
+    parse, encoding = PARSERS[statement.file_format]
+    matcher = InvoiceMatcher(statement.org_id)
+    batch = []
+    movements_count = proposed_count = 0
+    try:
+        with statement.file.open("rb") as statement_file:
+            lines = (line.decode(encoding) for line in statement_file)
+            for movement in parse(lines):
+                invoice, method, score = matcher.match(movement)
+                batch.append(
+                    BankMovement(
+                        statement=statement,
+                        invoice=invoice,
+                        match_method=method,
+                        match_score=score,
+                        status="proposed" if invoice else "unmatched",
+                        **movement._asdict(),
+                    )
+                )
+                movements_count += 1
+                proposed_count += invoice is not None
+                if len(batch) >= BATCH_SIZE:
+                    BankMovement.objects.bulk_create(batch)
+                    batch = []
+        BankMovement.objects.bulk_create(batch)
+    except (UnicodeDecodeError, csv.Error) as error:
+        statement.status = "failed"
+        statement.message = f"The statement could not be read: {error}"
+    else:
+        statement.status = "completed"
+    statement.movements_count = movements_count
+    statement.proposed_count = proposed_count
+    statement.finished_at = timezone.now()
+    statement.save(
+        update_fields=[
+            "status",
+            "message",
+            "movements_count",
+            "proposed_count",
+            "finished_at",
+        ]
+    )
+    return statement
+
+
+def reconcile(statement, movement_ids=None, user=None):
+    """Book the proposed movements of ``statement`` (or those of them in
+    ``movement_ids``) as payments of their invoices; return how many were
+    booked.
+
+    A proposal whose invoice was closed since, or now has less outstanding
+    than the movement (another statement paid it, or it was updated by
+    hand), is not booked: the movement goes back to unmatched instead.
+    """
+    movements = statement.movements.filter(status="proposed", invoice__isnull=False)
+    if movement_ids is not None:
+        movements = movements.filter(id__in=movement_ids)
+    with transaction.atomic():
+        movements = list(movements.select_for_update())
+        invoices = Invoice.objects.select_for_update().in_bulk(
+            {movement.invoice_id for movement in movements}
+        )
+        paid = {}
+        for movement in movements:
+            invoice = invoices[movement.invoice_id]
+            if (
+                invoice.status in CLOSED_STATUSES
+                or outstanding(invoice) < movement.amount
+            ):
+                movement.invoice = None
+                movement.match_method = ""
+                movement.match_score = 0
+                movement.status = "unmatched"
+                continue
+            due = outstanding(invoice) - movement.amount
+            invoice.amount_paid = (invoice.amount_paid or 0) + movement.amount
+            invoice.amount_due = max(due, Decimal("0"))
+            if due <= 0:
+                invoice.status = "Paid"
+            movement.status = "reconciled"
+            paid[invoice.id] = invoice
+        Invoice.objects.bulk_update(
+            paid.values(),
+            ["amount_paid", "amount_due", "status"],
+            batch_size=BATCH_SIZE,
+        )
+        BankMovement.objects.bulk_update(
+            movements,
+            ["invoice", "match_method", "match_score", "status"],
+            batch_size=BATCH_SIZE,
+        )
+        booked = sum(movement.status == "reconciled" for movement in movements)
+        statement.proposed_count -= len(movements)
+        statement.reconciled_count += booked
+        statement.save(update_fields=["proposed_count", "reconciled_count"])
+    # bulk_update sends no signals: do what saving each invoice would have.
+    if paid:
+        invalidate_reports(statement.org_id)
+    for invoice in paid.values():
+        record_version(invoice, updated_by=user)
+    return booked
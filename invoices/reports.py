@@ -0,0 +1,158 @@
+"""Accounts-receivable aging and monthly revenue of an org.
+
+Both reports come from one conditional-aggregation query over the org's
+invoices, grouped by account and currency: each aging bucket and each
+month's billed and collected totals is a ``Sum`` with its own filter.
+Draft and cancelled invoices are left out. An invoice billed to several
+accounts is counted under each of them.
+
+Invoices carry no payment dates, so "collected" is the amount paid on
+the invoices billed in that month, and invoices are billed in the month
+they were created.
+
+Results are cached per org. Saving or deleting an invoice bumps the
+org's report version (see ``invoices.signals``), which retires every
+cached report of that org at once. The version is bumped again when the
+transaction commits, as another process may have cached a report of the
+old rows meanwhile; it only reaches other processes when the cache is
+shared (see ``CACHES`` in the settings).
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from invoices.models import Invoice
+
+REPORT_CACHE_TIMEOUT = 60 * 60
+EXCLUDED_STATUSES = ("Draft", "Cancelled")
+# (key, first day overdue, last day overdue)
+AGING_BUCKETS = (
+    ("current", None, 0),
+    ("1_30", 1, 30),
+    ("31_60", 31, 60),
+    ("61_90", 61, 90),
+    ("over_90", 91, None),
+)
+AGING_KEYS = [key for key, _, _ in AGING_BUCKETS] + ["total"]
+ZERO = Value(Decimal("0"), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def version_key(org_id):
+    return f"invoice_reports:{org_id}:version"
+
+
+def report_version(org_id):
+    return cache.get_or_set(version_key(org_id), 1, None)
+
+
+def bump_report_version(org_id):
+    try:
+        cache.incr(version_key(org_id))
+    except ValueError:
+        # Never read yet (or evicted): nothing cached under it either.
+        pass
+
+
+def invalidate_reports(org_id):
+    bump_report_version(org_id)
+    transaction.on_commit(lambda: bump_report_version(org_id))
+
+
+def report_months(as_of, months):
+    """The first day of the ``months`` months up to the one of ``as_of``."""
+    first = as_of.replace(day=1)
+    result = [first]
+    for _ in range(months - 1):
+        first = (first - timedelta(days=1)).replace(day=1)
+        result.append(first)
+    return result[::-1]
+
+
+def month_end(first):
+    return (first + timedelta(days=32)).replace(day=1)
+
+
+def aging_filter(as_of, first_day, last_day):
+    if first_day is None:
+        return Q(due_date__isnull=True) | Q(due_date__gte=as_of)
+    condition = Q(due_date__lte=as_of - timedelta(days=first_day))
+    if last_day is not None:
+        condition &= Q(due_date__gte=as_of - timedelta(days=last_day))
+    return condition
+
+
+def compute_reports(org_id, as_of, months):
+    outstanding = Coalesce(
+        "amount_due",
+        F("total_amount") - Coalesce("amount_paid", ZERO),
+        ZERO,
+        output_field=ZERO.output_field,
+    )
+    receivable = ~Q(status="Paid")
+    aggregates = {
+        f"aging_{key}": Sum(
+            outstanding, filter=receivable & aging_filter(as_of, first, last)
+        )
+        for key, first, last in AGING_BUCKETS
+    }
+    aggregates["aging_total"] = Sum(outstanding, filter=receivable)
+    for first in months:
+        in_month = Q(
+            created_at__date__gte=first, created_at__date__lt=month_end(first)
+        )
+        aggregates[f"billed_{first:%Y_%m}"] = Sum("total_amount", filter=in_month)
+        aggregates[f"collected_{first:%Y_%m}"] = Sum("amount_paid", filter=in_month)
+    rows = (
+        Invoice.objects.filter(org_id=org_id)
+        .exclude(status__in=EXCLUDED_STATUSES)
+        .values("accounts", "accounts__name", "currency")
+        .annotate(**aggregates)
+        .order_by("accounts__name", "currency")
+    )
+    return [
+        {
+            "account": (
+                {"id": row["accounts"], "name": row["accounts__name"]}
+                if row["accounts"]
+                else None
+            ),
+            "currency": row["currency"],
+            "aging": {
+                key: row[f"aging_{key}"] or Decimal("0")
+                for key in AGING_KEYS
+            },
+            "revenue": [
+                {
+                    "month": f"{first:%Y-%m}",
+                    "billed": row[f"billed_{first:%Y_%m}"] or Decimal("0"),
+                    "collected": row[f"collected_{first:%Y_%m}"] or Decimal("0"),
+                }
+                for first in months
+            ],
+        }
+        for row in rows
+    ]
+
+
+def invoice_reports(org_id, as_of=None, months=12):
+    """AR aging on ``as_of`` and revenue of the ``months`` months up to it."""
+    as_of = as_of or timezone.localdate()
+    month_list = report_months(as_of, months)
+    key = (
+        f"invoice_reports:{org_id}:{report_version(org_id)}:"
+        f"{as_of.isoformat()}:{months}"
+    )
+    rows = cache.get(key)
+    if rows is None:
+        rows = compute_reports(org_id, as_of, month_list)
+        cache.set(key, rows, REPORT_CACHE_TIMEOUT)
+    return {
+        "as_of": as_of,
+        "months": [f"{first:%Y-%m}" for first in month_list],
+        "rows": rows,
+    }
@@ -5,7 +5,7 @@ from common.serializer import (
     OrganizationSerializer,
     UserSerializer,
 )
-from invoices.models import Invoice, InvoiceHistory
+from invoices.models import BankMovement, BankStatement, Invoice, InvoiceHistory
 from teams.serializer import TeamsSerializer
 
 
@@ -54,21 +54,9 @@ class InvoiceHistorySerializer(serializers.ModelSerializer):
         model = InvoiceHistory
         fields = (
             "id",
-            "invoice_title",
-            "invoice_number",
-            "status",
-            "due_date",
-            "name",
-            "email",
-            "phone",
+            "version",
+            "changes",
             "created_at",
-            "currency",
-            "quantity",
-            "rate",
-            "total_amount",
-            "amount_due",
-            "amount_paid",
-            "is_email_sent",
             "details",
             "updated_by",
         )
@@ -157,3 +145,69 @@ class InvoiceSwaggerSerailizer(serializers.ModelSerializer):
         )
 
 
+
+
+class InvoiceReportQuerySerializer(serializers.Serializer):
+    as_of = serializers.DateField(required=False)
+    months = serializers.IntegerField(required=False, min_value=1, max_value=24)
+
+
+class BankStatementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BankStatement
+        fields = (
+            "id",
+            "file_format",
+            "status",
+            "message",
+            "movements_count",
+            "proposed_count",
+            "reconciled_count",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
+
+
+class BankStatementUploadSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    # Guessed from the file name when not given: .csv files are CSV.
+    file_format = serializers.ChoiceField(
+        choices=BankStatement.FORMATS, required=False
+    )
+
+    def validate(self, data):
+        if "file_format" not in data:
+            is_csv = data["file"].name.lower().endswith(".csv")
+            data["file_format"] = "csv" if is_csv else "norma43"
+        return data
+
+
+class BankMovementSerializer(serializers.ModelSerializer):
+    invoice_number = serializers.CharField(
+        source="invoice.invoice_number", default=None, read_only=True
+    )
+
+    class Meta:
+        model = BankMovement
+        fields = (
+            "id",
+            "booking_date",
+            "value_date",
+            "amount",
+            "currency",
+            "reference",
+            "payer_name",
+            "invoice",
+            "invoice_number",
+            "match_method",
+            "match_score",
+            "status",
+        )
+
+
+class BankReconcileSerializer(serializers.Serializer):
+    # All the proposed movements of the statement when not given.
+    movements = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False
+    )
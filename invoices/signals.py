@@ -0,0 +1,31 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from invoices.models import Invoice
+from invoices.pdf import delete_unused_pdf
+from invoices.reports import invalidate_reports
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invoice_changed(sender, instance, **kwargs):
+    if instance.org_id:
+        invalidate_reports(instance.org_id)
+
+
+@receiver(post_delete, sender=Invoice)
+def invoice_deleted(sender, instance, **kwargs):
+    if instance.pdf_digest:
+        transaction.on_commit(partial(delete_unused_pdf, instance.pdf_digest))
+
+
+@receiver(m2m_changed, sender=Invoice.accounts.through)
+def invoice_accounts_changed(sender, instance, action, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    # With reverse, instance is an account, which belongs to the same org.
+    if instance.org_id:
+        invalidate_reports(instance.org_id)
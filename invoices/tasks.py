@@ -5,7 +5,11 @@ from django.shortcuts import reverse
 from django.template.loader import render_to_string
 
 from common.models import User
-from invoices.models import Invoice, InvoiceHistory
+from emails.outbox import queue
+from invoices.history import record_version
+from invoices.models import BankStatement, Invoice
+from invoices.pdf import invoice_queryset, pdf_filename, prune_pdfs, render_pdf
+from invoices.reconciliation import import_statement, reconcile
 
 app = Celery("redis://")
 
@@ -37,7 +41,7 @@ def send_email(invoice_id, recipients, domain="demo.django-crm.io", protocol="ht
             )
             msg = EmailMessage(subject=subject, body=html_content, to=recipients_list)
             msg.content_subtype = "html"
-            msg.send()
+            queue([msg], "assigned_to_email_template.html", obj=invoice)
     recipients = invoice.accounts.filter(status="open")
     if recipients.count() > 0:
         subject = "Shared an invoice with you."
@@ -64,12 +68,12 @@ def send_email(invoice_id, recipients, domain="demo.django-crm.io", protocol="ht
                 ],
             )
             msg.content_subtype = "html"
-            msg.send()
+            queue([msg], "assigned_to_email_template.html", obj=invoice)
 
 
 @app.task
 def send_invoice_email(invoice_id, domain="demo.django-crm.io", protocol="http"):
-    invoice = Invoice.objects.filter(id=invoice_id).first()
+    invoice = invoice_queryset().filter(id=invoice_id).first()
     if invoice:
         subject = "CRM Invoice : {0}".format(invoice.invoice_title)
         recipients = [invoice.email]
@@ -84,7 +88,20 @@ def send_invoice_email(invoice_id, domain="demo.django-crm.io", protocol="http")
         html_content = render_to_string("invoice_detail_email.html", context=context)
         msg = EmailMessage(subject=subject, body=html_content, to=recipients)
         msg.content_subtype = "html"
-        msg.send()
+        pdf = (pdf_filename(invoice), render_pdf(invoice), "application/pdf")
+        queue([msg], "invoice_detail_email.html", obj=invoice, attachments=[pdf])
+
+
+@app.task
+def render_invoice_pdf(invoice_id):
+    invoice = invoice_queryset().filter(id=invoice_id).first()
+    if invoice:
+        render_pdf(invoice)
+
+
+@app.task
+def prune_invoice_pdfs():
+    return prune_pdfs()
 
 
 @app.task
@@ -104,48 +121,31 @@ def send_invoice_email_cancel(invoice_id, domain="demo.django-crm.io", protocol=
         html_content = render_to_string("invoice_cancelled.html", context=context)
         msg = EmailMessage(subject=subject, body=html_content, to=recipients)
         msg.content_subtype = "html"
-        msg.send()
+        queue([msg], "invoice_cancelled.html", obj=invoice)
 
 
 @app.task
 def create_invoice_history(original_invoice_id, updated_by_user_id, changed_fields):
-    """original_invoice_id, updated_by_user_id, changed_fields"""
-    original_invoice = Invoice.objects.filter(id=original_invoice_id).first()
-    created_by = original_invoice.created_by
-    updated_by_user = User.objects.get(id=updated_by_user_id)
-    changed_data = [(" ".join(field.split("_")).title()) for field in changed_fields]
-    if len(changed_data) > 1:
-        changed_data = (
-            ", ".join(changed_data[:-1]) + " and " + changed_data[-1] + " have changed."
-        )
-    elif len(changed_data) == 1:
-        changed_data = ", ".join(changed_data) + " has changed."
-    else:
-        changed_data = None
+    """original_invoice_id, updated_by_user_id, changed_fields
 
-    if original_invoice.invoice_history.count() == 0:
-        changed_data = "Invoice Created."
+    The stored diff is computed from the invoice itself (see
+    invoices.history); ``changed_fields`` is kept for existing callers."""
+    original_invoice = Invoice.objects.filter(id=original_invoice_id).first()
     if original_invoice:
-        invoice_history = InvoiceHistory()
-        invoice_history.invoice = original_invoice
-        invoice_history.invoice_title = original_invoice.invoice_title
-        invoice_history.invoice_number = original_invoice.invoice_number
-        invoice_history.from_address = original_invoice.from_address
-        invoice_history.to_address = original_invoice.to_address
-        invoice_history.name = original_invoice.name
-        invoice_history.email = original_invoice.email
-        invoice_history.quantity = original_invoice.quantity
-        invoice_history.rate = original_invoice.rate
-        invoice_history.total_amount = original_invoice.total_amount
-        invoice_history.currency = original_invoice.currency
-        invoice_history.phone = original_invoice.phone
-        invoice_history.updated_by = updated_by_user
-        invoice_history.created_by = original_invoice.created_by
-        invoice_history.amount_due = original_invoice.amount_due
-        invoice_history.amount_paid = original_invoice.amount_paid
-        invoice_history.is_email_sent = original_invoice.is_email_sent
-        invoice_history.status = original_invoice.status
-        invoice_history.details = changed_data
-        invoice_history.due_date = original_invoice.due_date
-        invoice_history.save()
-        invoice_history.assigned_to.set(original_invoice.assigned_to.all())
+        updated_by_user = User.objects.filter(id=updated_by_user_id).first()
+        record_version(original_invoice, updated_by=updated_by_user)
+
+
+@app.task
+def import_bank_statement(statement_id):
+    statement = BankStatement.objects.filter(id=statement_id, status="pending").first()
+    if statement:
+        import_statement(statement)
+
+
+@app.task
+def reconcile_bank_statement(statement_id, movement_ids=None, user_id=None):
+    statement = BankStatement.objects.filter(id=statement_id).first()
+    if statement:
+        user = User.objects.filter(id=user_id).first() if user_id else None
+        reconcile(statement, movement_ids, user=user)
@@ -0,0 +1,104 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.models import Org, Profile, User
+from invoices.history import invoice_state, record_version, version_state
+from invoices.models import Invoice, InvoiceHistory
+from invoices.tasks import create_invoice_history
+from invoices.views import InvoiceHistoryListView, InvoiceHistoryVersionView
+
+
+class InvoiceHistoryTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="history org")
+        self.user = User.objects.create(email="admin@example.com")
+        self.profile = Profile.objects.create(user=self.user, org=self.org, role="ADMIN")
+        self.invoice = Invoice.objects.create(
+            invoice_title="Rent",
+            name="Tenant",
+            email="tenant@example.com",
+            rate=800,
+            currency="EUR",
+            org=self.org,
+        )
+        self.invoice.refresh_from_db()
+
+    def edit(self, **fields):
+        for name, value in fields.items():
+            setattr(self.invoice, name, value)
+        self.invoice.save()
+        self.invoice.refresh_from_db()
+        return record_version(self.invoice, updated_by=self.user)
+
+    def get(self, view, url, **kwargs):
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        return view.as_view()(request, pk=self.invoice.id, **kwargs)
+
+    def test_versions_store_only_what_changed(self):
+        first = record_version(self.invoice, updated_by=self.user)
+        self.assertEqual((first.version, first.details), (1, "Invoice Created."))
+        self.assertTrue(first.is_checkpoint)
+        self.assertIsNone(record_version(self.invoice))
+
+        second = self.edit(rate=900, status="Sent")
+        self.assertEqual(second.changes, {"rate": "900.00", "status": "Sent"})
+        self.assertEqual(second.details, "Rate and Status have changed.")
+        self.assertFalse(second.is_checkpoint)
+
+        self.invoice.assigned_to.add(self.user)
+        third = record_version(self.invoice)
+        self.assertEqual(third.changes, {"assigned_to": [str(self.user.id)]})
+
+    def test_any_version_is_rebuilt_from_its_checkpoint(self):
+        states = {1: invoice_state(self.invoice)}
+        record_version(self.invoice)
+        for quantity in range(1, 15):
+            history = self.edit(quantity=quantity)
+            states[history.version] = invoice_state(self.invoice)
+        self.assertEqual(
+            list(
+                InvoiceHistory.objects.filter(snapshot__isnull=False)
+                .order_by("version")
+                .values_list("version", flat=True)
+            ),
+            [1, 11],
+        )
+        for version, state in states.items():
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    version_state(self.invoice.id, version), (version, state)
+                )
+        self.assertEqual(version_state(self.invoice.id), (15, states[15]))
+        self.assertEqual(version_state(self.invoice.id, 16), (None, None))
+
+    def test_history_list_reads_only_the_diffs(self):
+        create_invoice_history(self.invoice.id, self.user.id, [])
+        self.edit(name="New tenant")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(
+                InvoiceHistoryListView, f"/api/invoices/{self.invoice.id}/history/"
+            )
+        self.assertEqual(response.data["history_count"], 2)
+        latest, created = response.data["invoice_history"]
+        self.assertEqual(latest["changes"], {"name": "New tenant"})
+        self.assertEqual(created["updated_by"]["email"], "admin@example.com")
+        history_sql = [q["sql"] for q in queries if "invoice_history" in q["sql"]]
+        self.assertTrue(history_sql)
+        self.assertFalse(any("snapshot" in sql for sql in history_sql))
+
+        response = self.get(
+            InvoiceHistoryVersionView,
+            f"/api/invoices/{self.invoice.id}/history/1/",
+            version=1,
+        )
+        self.assertEqual(response.data["invoice"]["name"], "Tenant")
+        response = self.get(
+            InvoiceHistoryVersionView,
+            f"/api/invoices/{self.invoice.id}/history/3/",
+            version=3,
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,130 @@
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.models import Org, Profile, User
+from emails.models import OutboxEmail
+from invoices import pdf
+from invoices.models import Invoice
+from invoices.tasks import send_invoice_email
+from invoices.views import InvoicePdfFileView, InvoicePdfView
+
+
+class InvoicePdfTest(TestCase):
+    def setUp(self):
+        media = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        media.enable()
+        self.addCleanup(media.disable)
+        self.org = Org.objects.create(name="pdf org")
+        self.user = User.objects.create(email="admin@example.com")
+        self.profile = Profile.objects.create(user=self.user, org=self.org, role="ADMIN")
+        self.invoice = Invoice.objects.create(
+            invoice_title="Rent",
+            name="Tenant",
+            email="tenant@example.com",
+            rate=800,
+            total_amount=800,
+            currency="EUR",
+            org=self.org,
+        )
+        # As the view and the worker see it, with the amounts as decimals.
+        self.invoice.refresh_from_db()
+
+    def request_pdf(self):
+        request = APIRequestFactory().get(f"/api/invoices/{self.invoice.id}/pdf/")
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        return InvoicePdfView.as_view()(request, pk=self.invoice.id)
+
+    def test_pdf_is_rendered_once_per_content(self):
+        with mock.patch("invoices.pdf.html_to_pdf", wraps=pdf.html_to_pdf) as render:
+            path = pdf.render_pdf(self.invoice)
+            self.assertEqual(pdf.render_pdf(self.invoice), path)
+            self.assertEqual(render.call_count, 1)
+            with default_storage.open(path, "rb") as stored:
+                self.assertTrue(stored.read().startswith(b"%PDF"))
+
+            self.invoice.rate = 900
+            self.invoice.save()
+            self.assertIsNone(pdf.stored_pdf(self.invoice))
+            self.assertNotEqual(pdf.render_pdf(self.invoice), path)
+            self.assertEqual(render.call_count, 2)
+
+    def test_outdated_pdf_is_deleted_once_unused(self):
+        old_path = pdf.render_pdf(self.invoice)
+        OutboxEmail.objects.create(
+            recipient="tenant@example.com",
+            object_key="invoice",
+            attachments=[["Invoice.pdf", old_path, "application/pdf"]],
+        )
+        self.invoice.rate = 900
+        self.invoice.save()
+        path = pdf.render_pdf(self.invoice)
+        # Still attached to an e-mail waiting to be sent.
+        self.assertTrue(default_storage.exists(old_path))
+
+        OutboxEmail.objects.update(status="sent")
+        self.invoice.rate = 1000
+        self.invoice.save()
+        latest_path = pdf.render_pdf(self.invoice)
+        self.assertFalse(default_storage.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.invoice.delete()
+        self.assertFalse(default_storage.exists(latest_path))
+
+    def test_prune_keeps_only_pdfs_in_use(self):
+        path = pdf.render_pdf(self.invoice)
+        stale = default_storage.save(pdf.pdf_path("0" * 64), ContentFile(b"%PDF"))
+        self.assertEqual(pdf.prune_pdfs(), 1)
+        self.assertTrue(default_storage.exists(path))
+        self.assertFalse(default_storage.exists(stale))
+
+    def test_request_queues_rendering_then_serves_a_signed_url(self):
+        with mock.patch("invoices.views.render_invoice_pdf.delay") as delay:
+            response = self.request_pdf()
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(self.invoice.id)
+
+        pdf.render_pdf(self.invoice)
+        with mock.patch("invoices.views.render_invoice_pdf.delay") as delay:
+            response = self.request_pdf()
+        self.assertEqual(response.status_code, 200)
+        delay.assert_not_called()
+
+        url = response.data["pdf_url"].removeprefix("http://testserver")
+        digest = url.split("/")[5]
+        response = InvoicePdfFileView.as_view()(
+            APIRequestFactory().get(url), pk=self.invoice.id, digest=digest
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            f'filename="Invoice-{self.invoice.invoice_number}.pdf"',
+            response["Content-Disposition"],
+        )
+        response.close()
+
+        forged = url.replace(digest, "0" * 64)
+        response = InvoicePdfFileView.as_view()(
+            APIRequestFactory().get(forged), pk=self.invoice.id, digest="0" * 64
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_invoice_email_carries_the_stored_pdf(self):
+        with mock.patch("invoices.tasks.reverse", return_value="/invoices/"):
+            send_invoice_email(self.invoice.id)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(
+            email.attachments,
+            [
+                [
+                    f"Invoice-{self.invoice.invoice_number}.pdf",
+                    pdf.stored_pdf(self.invoice),
+                    "application/pdf",
+                ]
+            ],
+        )
@@ -0,0 +1,187 @@
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.models import Org, Profile, User
+from invoices.models import BankMovement, BankStatement, Invoice
+from invoices.reconciliation import csv_movements, import_statement, reconcile
+from invoices.views import BankStatementListView
+
+
+def norma43(*movements):
+    day = f"{timezone.localdate():%y%m%d}"
+    lines = [f"1100491500012345678926010126123120{'0' * 13}9783EMPRESA".ljust(80)]
+    for amount, reference, payer, credit in movements:
+        lines.append(
+            f"22    1500{day}{day}02000{'2' if credit else '1'}"
+            f"{int(amount * 100):014d}{'0' * 10}{reference[:12]:<12}{'':<16}"
+        )
+        lines.append(f"2301{payer:<38}{'':<38}")
+    lines.append("88" + "9" * 18 + "0" * 60)
+    return ("\r\n".join(lines) + "\r\n").encode("latin-1")
+
+
+class BankReconciliationTest(TestCase):
+    def setUp(self):
+        media = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        media.enable()
+        self.addCleanup(media.disable)
+        self.org = Org.objects.create(name="bank org")
+        self.user = User.objects.create(email="admin@example.com")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role="ADMIN"
+        )
+        self.by_number = self.invoice("Inmobiliaria García SL", 100)
+        self.by_payer = self.invoice("Pedro Ruiz", 250)
+        self.by_amount = self.invoice("Ana López", 250)
+        self.fuzzy = self.invoice("Construcciones Martínez SA", 999)
+        self.invoice("Pedro Ruiz", 300, status="Paid")
+
+    def invoice(self, name, total, status="Sent"):
+        return Invoice.objects.create(
+            invoice_title="Rent",
+            name=name,
+            email="customer@example.com",
+            total_amount=total,
+            amount_due=total,
+            currency="EUR",
+            status=status,
+            org=self.org,
+        )
+
+    def statement(self, content, file_format="norma43"):
+        return BankStatement.objects.create(
+            file=SimpleUploadedFile("statement.n43", content),
+            file_format=file_format,
+            org=self.org,
+        )
+
+    def test_movements_are_matched_and_reconciled(self):
+        statement = self.statement(
+            norma43(
+                (Decimal("100"), self.by_number.invoice_number, "OTRO PAGADOR", True),
+                (Decimal("250"), "", "PEDRO RUIZ", True),
+                (Decimal("250"), "", "TRANSFERENCIA", True),
+                (Decimal("500"), "", "CONSTRUCCIONES MARTINES", True),
+                (Decimal("300"), "", "PEDRO RUIZ", False),
+                (Decimal("77"), "", "NADIE", True),
+            )
+        )
+        # Status, invoices, account names, one insert, counters.
+        with self.assertNumQueries(5):
+            import_statement(statement)
+        self.assertEqual((statement.movements_count, statement.proposed_count), (5, 4))
+        matches = {
+            movement.invoice_id: movement.match_method
+            for movement in BankMovement.objects.filter(status="proposed")
+        }
+        self.assertEqual(
+            matches,
+            {
+                self.by_number.id: "number",
+                self.by_payer.id: "amount_payer",
+                self.by_amount.id: "amount",
+                self.fuzzy.id: "fuzzy",
+            },
+        )
+        unmatched = BankMovement.objects.get(status="unmatched")
+        self.assertEqual(
+            (unmatched.amount, unmatched.payer_name), (Decimal("77"), "NADIE")
+        )
+
+        fuzzy = BankMovement.objects.get(invoice=self.fuzzy)
+        self.assertEqual(reconcile(statement, [fuzzy.id]), 1)
+        self.fuzzy.refresh_from_db()
+        self.assertEqual(self.fuzzy.amount_paid, Decimal("500"))
+        self.assertEqual(self.fuzzy.amount_due, Decimal("499"))
+        self.assertEqual(self.fuzzy.status, "Sent")
+
+        self.assertEqual(reconcile(statement), 3)
+        self.assertEqual(
+            Invoice.objects.filter(org=self.org, status="Paid").count(), 4
+        )
+        statement.refresh_from_db()
+        self.assertEqual((statement.proposed_count, statement.reconciled_count), (0, 4))
+        self.assertEqual(reconcile(statement), 0)
+
+    def test_invoices_paid_or_closed_since_the_import_are_not_booked(self):
+        first = self.statement(b"")
+        second = self.statement(b"")
+        for statement in (first, second):
+            BankMovement.objects.create(
+                statement=statement,
+                booking_date=timezone.localdate(),
+                amount=Decimal("250"),
+                invoice=self.by_amount,
+                match_method="amount",
+                status="proposed",
+            )
+        BankMovement.objects.create(
+            statement=second,
+            booking_date=timezone.localdate(),
+            amount=Decimal("250"),
+            invoice=self.by_payer,
+            match_method="amount_payer",
+            status="proposed",
+        )
+        BankStatement.objects.filter(id=first.id).update(proposed_count=1)
+        BankStatement.objects.filter(id=second.id).update(proposed_count=2)
+        Invoice.objects.filter(id=self.by_payer.id).update(status="Cancelled")
+
+        first.refresh_from_db()
+        self.assertEqual(reconcile(first), 1)
+        # by_amount was paid by the first statement, by_payer cancelled.
+        second.refresh_from_db()
+        self.assertEqual(reconcile(second), 0)
+        second.refresh_from_db()
+        self.assertEqual((second.proposed_count, second.reconciled_count), (0, 0))
+        self.assertEqual(
+            list(second.movements.values_list("status", "invoice")),
+            [("unmatched", None), ("unmatched", None)],
+        )
+        self.by_amount.refresh_from_db()
+        self.assertEqual(
+            (self.by_amount.amount_paid, self.by_amount.status),
+            (Decimal("250"), "Paid"),
+        )
+
+    def test_csv_statement(self):
+        lines = [
+            "Fecha;Importe;Concepto;Ordenante",
+            "19/10/2026;1.234,56;Pago alquiler;Juan Pérez",
+            "20/10/2026;-50,00;Comisión;Banco",
+            "not a date;10,00;;",
+        ]
+        self.assertEqual(
+            list(csv_movements(lines)),
+            [
+                (
+                    timezone.datetime(2026, 10, 19).date(),
+                    None,
+                    Decimal("1234.56"),
+                    None,
+                    "Pago alquiler",
+                    "Juan Pérez",
+                )
+            ],
+        )
+
+    def test_upload_starts_the_import(self):
+        request = APIRequestFactory().post(
+            "/api/invoices/bank-statements/",
+            {"file": SimpleUploadedFile("october.csv", b"date,amount\n")},
+            format="multipart",
+        )
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        with mock.patch("invoices.views.import_bank_statement.delay") as delay:
+            response = BankStatementListView.as_view()(request)
+        self.assertEqual(response.status_code, 202)
+        statement = BankStatement.objects.get()
+        self.assertEqual(statement.file_format, "csv")
+        delay.assert_called_once_with(str(statement.id))
@@ -6,7 +6,8 @@ from django.urls import reverse
 
 from accounts.models import Account
 from common.models import Address, Attachments, Comment, Company, User
-from invoices.models import Invoice, InvoiceHistory
+from invoices.history import record_version, version_state
+from invoices.models import Invoice
 from teams.models import Teams
 
 
@@ -101,17 +102,7 @@ class InvoiceCreateTest(object):
         self.invoice.assigned_to.add(self.user1.id)
         self.invoice.accounts.add(self.account.id)
 
-        self.invoice_history = InvoiceHistory.objects.create(
-            invoice_title="invoice title",
-            invoice_number="invoice number",
-            currency="USD",
-            email="invoiceTitle@email.com",
-            due_date=(datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d"),
-            total_amount="1000",
-            from_address=self.from_address,
-            to_address=self.to_address,
-            invoice=self.invoice,
-        )
+        self.invoice_history = record_version(self.invoice)
 
         self.invoice_1 = Invoice.objects.create(
             invoice_title="invoice title",
@@ -163,12 +154,11 @@ class InvoiceListTestCase(InvoiceCreateTest, TestCase):
         self.assertEqual(str(self.invoice.formatted_rate()), "0 USD")
         self.assertEqual(str(self.invoice.formatted_total_quantity()), "0 Hours")
 
-        self.assertEqual(str(self.invoice_history), "invoice number")
-        self.assertEqual(str(self.invoice_history.formatted_rate()), "0 USD")
-        self.assertEqual(
-            str(self.invoice_history.formatted_total_quantity()), "0 Hours"
-        )
-        self.assertEqual(str(self.invoice_history.formatted_total_amount()), "USD 1000")
+        self.assertEqual(str(self.invoice_history), f"{self.invoice.id} v1")
+        _, state = version_state(self.invoice.id, 1)
+        self.assertEqual(state["invoice_number"], "invoice number")
+        self.assertEqual(state["currency"], "USD")
+        self.assertEqual(state["total_amount"], "1000.00")
 
         # self.assertTrue(
         #     self.invoice_history.created_on_arrow in ["just now" or "seconds ago"]
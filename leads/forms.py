@@ -6,58 +6,46 @@ from django import forms
 email_regex = "^[_a-zA-Z0-9-]+(\.[_a-zA-Z0-9-]+)*@[a-zA-Z0-9-]+(\.[a-zA-Z0-9-]+)*(\.[a-zA-Z]{2,4})$"
 
 
+REQUIRED_HEADERS = ["title"]
+
+
+def decode_lines(document, encoding="iso-8859-1"):
+    """Yield the decoded lines of a file object one at a time."""
+    for line in document:
+        yield line.decode(encoding) if isinstance(line, bytes) else line
+
+
+def clean_headers(row):
+    return [header_name.strip().lower() for header_name in row]
+
+
+def validate_lead_row(row):
+    """Return the reason ``row`` cannot be imported, or ``None``."""
+    for header in REQUIRED_HEADERS:
+        if not row.get(header):
+            return "Missing required value %s" % header
+    if row.get("email") and re.match(email_regex, row["email"]) is None:
+        return "Invalid email %s" % row["email"]
+    return None
+
+
 def csv_doc_validate(document):
-    temp_row = []
-    invalid_row = []
-    # this stores all the failed csv contacts
-    failed_leads_csv = []
-    reader = csv.reader((document.read().decode("iso-8859-1")).splitlines())
-    # csv_headers = ["first name", "last name", "email"]
-    csv_headers = ["title"]
-    # required_headers = ["first name", "last name", "email"]
-    required_headers = ["title"]
-    for y_index, row in enumerate(reader):
-        each = {}
-        invalid_each = {}
-        if y_index == 0:
-            csv_headers = [header_name.lower() for header_name in row if header_name]
-            missing_headers = set(required_headers) - set([r.lower() for r in row])
-            if missing_headers:
-                missing_headers_str = ", ".join(missing_headers)
-                message = "Missing headers: %s" % (missing_headers_str)
-                return {"error": True, "message": message}
-            continue
-        elif not "".join(str(x) for x in row):
-            continue
-        else:
-            for x_index, cell_value in enumerate(row):
-                try:
-                    csv_headers[x_index]
-                except IndexError:
-                    continue
-                if csv_headers[x_index] in required_headers:
-                    if not cell_value:
-                        # message = 'Missing required value %s for row %s' % (
-                        #     csv_headers[x_index], y_index + 1)
-                        # return {"error": True, "message": message}
-                        invalid_each[csv_headers[x_index]] = cell_value
-                    else:
-                        if csv_headers[x_index] == "email":
-                            if re.match(email_regex, cell_value) is None:
-                                invalid_each[csv_headers[x_index]] = cell_value
-                each[csv_headers[x_index]] = cell_value
-        if invalid_each:
-            invalid_row.append(each)
-            failed_leads_csv.append(list(each.values()))
-        else:
-            temp_row.append(each)
-    return {
-        "error": False,
-        "validated_rows": temp_row,
-        "invalid_rows": invalid_row,
-        "headers": csv_headers,
-        "failed_leads_csv": failed_leads_csv,
-    }
+    """Check the header row of a CSV upload without reading the rest of it.
+
+    Rows are validated while they are imported, so the upload is never
+    held in memory.
+    """
+    reader = csv.reader(decode_lines(document))
+    try:
+        csv_headers = clean_headers(next(reader))
+    except StopIteration:
+        return {"error": True, "message": "The file is empty"}
+    missing_headers = set(REQUIRED_HEADERS) - set(csv_headers)
+    if missing_headers:
+        missing_headers_str = ", ".join(missing_headers)
+        message = "Missing headers: %s" % (missing_headers_str)
+        return {"error": True, "message": message}
+    return {"error": False, "headers": csv_headers}
 
 
 def import_document_validator(document):
@@ -94,11 +82,6 @@ class LeadListForm(forms.Form):
             data = import_document_validator(document)
             if data.get("error"):
                 raise forms.ValidationError(data.get("message"))
-            else:
-                self.validated_rows = data.get("validated_rows", [])
-                self.invalid_rows = data.get("invalid_rows", [])
-                if len(self.validated_rows) == 0:
-                    raise forms.ValidationError(
-                        "All the leads in the file are invalid."
-                    )
+            self.headers = data.get("headers", [])
+            document.seek(0)
         return document
@@ -0,0 +1,343 @@
+"""Streaming, sharded lead import.
+
+The stored upload is split into byte ranges that start and end on row
+boundaries, so each range can be imported by its own worker. Within a
+range, rows are read line by line, validated as they are parsed and
+inserted with ``bulk_create`` in batches. Duplicates are resolved by the
+database: each batch is checked against the org's existing titles and
+inserted with ``ON CONFLICT DO NOTHING`` on ``(org, import_key)``, which
+also covers ranges racing each other. Rejected rows go to an error CSV
+kept on the ``LeadImport`` record, which also tracks progress.
+"""
+import csv
+import io
+import tempfile
+
+from django.core.files import File
+from django.db.models import F
+from django.utils import timezone
+
+from leads.forms import REQUIRED_HEADERS, clean_headers, decode_lines, validate_lead_row
+from leads.models import Lead, LeadImport
+
+BATCH_SIZE = 1000
+CHUNK_BYTES = 8 * 1024 * 1024
+READ_BLOCK = 1024 * 1024
+
+
+def build_lead(row, org, user=None):
+    return Lead(
+        title=row.get("title", "")[:64],
+        first_name=row.get("first name", "")[:255],
+        last_name=row.get("last name", "")[:255],
+        website=row.get("website", "")[:255],
+        email=row.get("email") or None,
+        phone=row.get("phone") or None,
+        address_line=row.get("address", "")[:255],
+        city=row.get("city", "")[:255],
+        state=row.get("state", "")[:255],
+        postcode=row.get("postcode", "")[:64],
+        country=row.get("country", "")[:3],
+        description=row.get("description", ""),
+        status=row.get("status") or None,
+        account_name=row.get("account_name", "")[:255],
+        import_key=row.get("title", "")[:64],
+        created_from_site=False,
+        created_by=user,
+        org=org,
+    )
+
+
+class LeadRowImporter:
+    """Validate, deduplicate and batch-insert lead rows."""
+
+    def __init__(self, org, user=None, batch_size=BATCH_SIZE, on_flush=None):
+        self.org = org
+        self.user = user
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.pending = {}
+        self.processed = 0
+        self.created = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def add(self, row):
+        """Queue ``row`` for insertion; return the error when it is rejected."""
+        self.processed += 1
+        error = validate_lead_row(row)
+        if error:
+            self.errors += 1
+            return error
+        title = row["title"][:64]
+        if title in self.pending:
+            self.skipped += 1
+            return None
+        self.pending[title] = build_lead(row, self.org, self.user)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return None
+
+    def flush(self):
+        if self.pending:
+            existing = set(
+                Lead.objects.filter(
+                    org=self.org, title__in=list(self.pending)
+                ).values_list("title", flat=True)
+            )
+            leads = [
+                lead for title, lead in self.pending.items() if title not in existing
+            ]
+            Lead.objects.bulk_create(
+                leads, batch_size=self.batch_size, ignore_conflicts=True
+            )
+            # Primary keys are assigned client side, so rows skipped by the
+            # conflict clause are the ones that cannot be found afterwards.
+            created = Lead.objects.filter(id__in=[lead.id for lead in leads]).count()
+            self.created += created
+            self.skipped += len(self.pending) - created
+            self.pending = {}
+        if self.on_flush:
+            self.on_flush(self)
+
+
+class ErrorReport:
+    """Rejected rows, spooled to disk once they outgrow memory."""
+
+    def __init__(self, headers=None):
+        self.buffer = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        self.stream = io.TextIOWrapper(self.buffer, encoding="utf-8", newline="")
+        self.writer = csv.writer(self.stream)
+        self.rows = 0
+        if headers is not None:
+            self.writer.writerow(headers + ["line", "error"])
+
+    def add(self, line_number, values, error):
+        self.writer.writerow(list(values) + [line_number, error])
+        self.rows += 1
+
+    def append_raw(self, document):
+        self.stream.flush()
+        for block in iter(lambda: document.read(READ_BLOCK), b""):
+            self.buffer.write(block)
+
+    def save(self, storage, name):
+        self.stream.flush()
+        self.stream.detach()
+        self.buffer.seek(0)
+        try:
+            return storage.save(name, File(self.buffer))
+        finally:
+            self.buffer.close()
+
+
+def read_headers(document):
+    document.seek(0)
+    header_line = document.readline()
+    headers = clean_headers(next(csv.reader(decode_lines([header_line])), []))
+    missing_headers = set(REQUIRED_HEADERS) - set(headers)
+    if missing_headers:
+        raise ValueError("Missing headers: %s" % ", ".join(missing_headers))
+    return headers, len(header_line)
+
+
+def plan_chunks(document, size, chunk_bytes=CHUNK_BYTES):
+    """Split the rows of ``document`` into ``(start, end, first_line)`` ranges.
+
+    A newline only ends a row outside a quoted field, which is the case
+    when an even number of quote characters precede it. The file is
+    scanned for those two bytes only, without parsing any row.
+    """
+    headers, offset = read_headers(document)
+    starts = [(offset, 2)]
+    target = offset + chunk_bytes
+    quotes = 0
+    lines = 1
+    document.seek(offset)
+    while target < size:
+        block = document.read(READ_BLOCK)
+        if not block:
+            break
+        position = 0
+        while target < size:
+            newline = block.find(b"\n", max(target - offset, position))
+            if newline == -1:
+                break
+            position = newline + 1
+            if (quotes + block.count(b'"', 0, newline)) % 2:
+                continue
+            starts.append((offset + position, lines + block.count(b"\n", 0, position) + 1))
+            target = offset + position + chunk_bytes
+        quotes += block.count(b'"')
+        lines += block.count(b"\n")
+        offset += len(block)
+    ends = [start for start, _ in starts[1:]] + [size]
+    chunks = [
+        (start, end, first_line)
+        for (start, first_line), end in zip(starts, ends)
+        if end > start
+    ]
+    return headers, chunks
+
+
+def iter_range_lines(document, start, end):
+    """Yield the raw lines of ``document`` between two row boundaries."""
+    document.seek(start)
+    remaining = end - start
+    pending = b""
+    while remaining > 0:
+        block = document.read(min(READ_BLOCK, remaining))
+        if not block:
+            break
+        remaining -= len(block)
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if pending:
+        yield pending
+
+
+def iter_rows(reader, headers):
+    """Yield ``(line_number, values, row)`` for the non-blank data rows."""
+    for values in reader:
+        if not "".join(values).strip():
+            continue
+        row = {
+            header: value.strip()
+            for header, value in zip(headers, values)
+            if header
+        }
+        yield reader.line_num, values, row
+
+
+def _update(lead_import, **fields):
+    # Queryset updates keep BaseModel.save from clearing created_by in workers.
+    for name, value in fields.items():
+        setattr(lead_import, name, value)
+    LeadImport.objects.filter(pk=lead_import.pk).update(**fields)
+
+
+def start_lead_import(lead_import, chunk_bytes=CHUNK_BYTES):
+    """Mark the import as running and return its headers and row ranges."""
+    _update(lead_import, status="running", started_at=timezone.now())
+    try:
+        with lead_import.file.open("rb") as document:
+            return plan_chunks(document, lead_import.file.size, chunk_bytes)
+    except Exception as e:
+        _update(
+            lead_import, status="failed", message=str(e), finished_at=timezone.now()
+        )
+        raise
+
+
+def import_chunk(lead_import, headers, start, end, first_line, part=0):
+    """Import one row range; progress is added to the shared import record."""
+    read = {"bytes": 0, "reported": 0}
+    reported = {"processed": 0, "created": 0, "skipped": 0, "errors": 0}
+
+    def counted(lines):
+        for line in lines:
+            read["bytes"] += len(line)
+            yield line
+
+    def report(importer):
+        deltas = {
+            "processed_bytes": read["bytes"] - read["reported"],
+            "processed_rows": importer.processed - reported["processed"],
+            "created_count": importer.created - reported["created"],
+            "skipped_count": importer.skipped - reported["skipped"],
+            "error_count": importer.errors - reported["errors"],
+        }
+        LeadImport.objects.filter(pk=lead_import.pk).update(
+            **{name: F(name) + delta for name, delta in deltas.items()}
+        )
+        read["reported"] = read["bytes"]
+        reported.update(
+            processed=importer.processed,
+            created=importer.created,
+            skipped=importer.skipped,
+            errors=importer.errors,
+        )
+
+    importer = LeadRowImporter(
+        lead_import.org, user=lead_import.created_by, on_flush=report
+    )
+    errors = ErrorReport()
+    with lead_import.file.open("rb") as document:
+        reader = csv.reader(decode_lines(counted(iter_range_lines(document, start, end))))
+        for line_number, values, row in iter_rows(reader, headers):
+            error = importer.add(row)
+            if error:
+                errors.add(first_line - 1 + line_number, values, error)
+        importer.flush()
+
+    error_part = None
+    if errors.rows:
+        error_part = errors.save(
+            lead_import.error_file.storage,
+            f"lead_imports/errors/parts/{lead_import.id}_{part}.csv",
+        )
+    return {
+        "processed": importer.processed,
+        "created": importer.created,
+        "skipped": importer.skipped,
+        "errors": importer.errors,
+        "error_part": error_part,
+    }
+
+
+def finish_lead_import(lead_import, headers, results):
+    """Merge the results of every chunk into the import record."""
+    failures = [result["failed"] for result in results if result.get("failed")]
+    error_parts = [result["error_part"] for result in results if result.get("error_part")]
+    totals = {
+        name: sum(result.get(name, 0) for result in results)
+        for name in ("processed", "created", "skipped", "errors")
+    }
+
+    error_file = None
+    if error_parts:
+        storage = lead_import.error_file.storage
+        report = ErrorReport(headers)
+        for name in error_parts:
+            with storage.open(name, "rb") as part:
+                report.append_raw(part)
+        error_file = report.save(
+            storage,
+            lead_import.error_file.field.generate_filename(
+                lead_import, f"{lead_import.id}_errors.csv"
+            ),
+        )
+        for name in error_parts:
+            storage.delete(name)
+
+    message = None
+    if failures:
+        message = "; ".join(failures)
+    elif totals["errors"] and not totals["created"] and not totals["skipped"]:
+        message = "All the leads in the file are invalid."
+    fields = {
+        "status": "failed" if failures else "completed",
+        "message": message,
+        "error_file": error_file,
+        "processed_rows": totals["processed"],
+        "created_count": totals["created"],
+        "skipped_count": totals["skipped"],
+        "error_count": totals["errors"],
+        "finished_at": timezone.now(),
+    }
+    if not failures:
+        fields["processed_bytes"] = lead_import.total_bytes
+    _update(lead_import, **fields)
+    return lead_import
+
+
+def run_lead_import(lead_import, chunk_bytes=CHUNK_BYTES):
+    """Import every chunk of ``lead_import`` in the current process."""
+    headers, chunks = start_lead_import(lead_import, chunk_bytes)
+    results = [
+        import_chunk(lead_import, headers, start, end, first_line, part)
+        for part, (start, end, first_line) in enumerate(chunks)
+    ]
+    return finish_lead_import(lead_import, headers, results)
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.1 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0003_leadimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='import_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['org', 'title'], name='lead_org_id_ec1162_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='lead',
+            constraint=models.UniqueConstraint(fields=('org', 'import_key'), name='lead_org_import_key_unique'),
+        ),
+    ]
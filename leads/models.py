@@ -83,12 +83,23 @@ class Lead(BaseModel):
     organization = models.CharField(_("Organization"), max_length=255, null=True)
     probability = models.IntegerField(default=0, blank=True, null=True)
     close_date = models.DateField(default=None, null=True)
+    # Set only on imported leads; the unique constraint deduplicates rows
+    # across import chunks running in parallel.
+    import_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name = "Lead"
         verbose_name_plural = "Leads"
         db_table = "lead"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["org", "title"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["org", "import_key"], name="lead_org_import_key_unique"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -133,3 +144,47 @@ class Lead(BaseModel):
     #     close_leads = queryset.filter(status='closed')
     #     cache.set('admin_leads_open_queryset', open_leads, 60*60)
     #     cache.set('admin_leads_close_queryset', close_leads, 60*60)
+
+
+class LeadImport(BaseModel):
+    IMPORT_STATUS = (
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    )
+    file = models.FileField(max_length=1001, upload_to="lead_imports/%Y/%m/")
+    error_file = models.FileField(
+        max_length=1001, upload_to="lead_imports/errors/%Y/%m/", blank=True, null=True
+    )
+    source = models.CharField(max_length=255, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=IMPORT_STATUS, default="pending")
+    message = models.TextField(blank=True, null=True)
+    total_bytes = models.BigIntegerField(default=0)
+    processed_bytes = models.BigIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    org = models.ForeignKey(
+        Org, on_delete=models.SET_NULL, null=True, blank=True, related_name="lead_imports"
+    )
+
+    class Meta:
+        verbose_name = "Lead Import"
+        verbose_name_plural = "Lead Imports"
+        db_table = "lead_import"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.file.name} ({self.status})"
+
+    @property
+    def progress(self):
+        if self.status == "completed":
+            return 100
+        if not self.total_bytes:
+            return 0
+        return min(int(self.processed_bytes * 100 / self.total_bytes), 99)
@@ -9,7 +9,7 @@ from common.serializer import (
     UserSerializer,
 )
 from contacts.serializer import ContactSerializer
-from leads.models import Company, Lead
+from leads.models import Company, Lead, LeadImport
 from teams.serializer import TeamsSerializer
 
 
@@ -195,3 +195,22 @@ class LeadCommentEditSwaggerSerializer(serializers.Serializer):
 class LeadUploadSwaggerSerializer(serializers.Serializer):
     leads_file = serializers.FileField()
 
+
+
+class LeadImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LeadImport
+        fields = (
+            "id",
+            "status",
+            "message",
+            "progress",
+            "processed_rows",
+            "created_count",
+            "skipped_count",
+            "error_count",
+            "error_file",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
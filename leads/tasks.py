@@ -1,14 +1,20 @@
-import re
-
-from celery import Celery
+from celery import Celery, chord
 from django.conf import settings
 from django.core.cache import cache
-from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives
 from django.db.models import Q
 from django.template.loader import render_to_string
 
 from common.models import Org, Profile
-from leads.models import Lead
+from common.notifications import notify_profiles
+from emails.outbox import queue
+from leads.importer import (
+    LeadRowImporter,
+    finish_lead_import,
+    import_chunk,
+    start_lead_import,
+)
+from leads.models import Lead, LeadImport
 
 app = Celery("redis://")
 
@@ -37,11 +43,12 @@ def send_email(
     email = EmailMultiAlternatives(
         subject, text_content, from_email, recipients, bcc=bcc, cc=cc
     )
-    email.attach_alternative(html_content, "text/html")
+    if html_content:
+        email.attach_alternative(html_content, "text/html")
     for attachment in attachments:
         # Example: email.attach('design.png', img_data, 'image/png')
         email.attach(*attachment)
-    email.send()
+    queue([email])
 
 
 @app.task
@@ -52,86 +59,88 @@ def send_lead_assigned_emails(lead_id, new_assigned_to_list, site_address):
     if not (lead_instance and new_assigned_to_list):
         return False
 
-    users = Profile.objects.filter(id__in=new_assigned_to_list).distinct()
-    subject = "Lead '%s' has been assigned to you" % lead_instance
-    from_email = settings.DEFAULT_FROM_EMAIL
-    template_name = "lead_assigned.html"
-
     url = site_address
     url += "/leads/" + str(lead_instance.id) + "/view/"
-
     context = {
         "lead_instance": lead_instance,
         "lead_detail_url": url,
     }
-    mail_kwargs = {"subject": subject, "from_email": from_email}
-    for profile in users:
-        if profile.user.email:
-            context["user"] = profile.user
-            html_content = get_rendered_html(template_name, context)
-            mail_kwargs["html_content"] = html_content
-            mail_kwargs["recipients"] = [profile.user.email]
-            send_email.delay(**mail_kwargs)
+    notify_profiles(
+        new_assigned_to_list,
+        "lead_assigned.html",
+        "Lead '%s' has been assigned to you" % lead_instance,
+        context,
+        obj=lead_instance,
+    )
 
 
 @app.task
 def send_email_to_assigned_user(recipients, lead_id, source=""):
     """Send Mail To Users When they are assigned to a lead"""
     lead = Lead.objects.get(id=lead_id)
-    created_by = lead.created_by
-    for user in recipients:
-        recipients_list = []
-        profile = Profile.objects.filter(id=user, is_active=True).first()
-        if profile:
-            recipients_list.append(profile.user.email)
-            context = {}
-            context["url"] = settings.DOMAIN_NAME
-            context["user"] = profile.user
-            context["lead"] = lead
-            context["created_by"] = created_by
-            context["source"] = source
-            subject = "Assigned a lead for you. "
-            html_content = render_to_string(
-                "assigned_to/leads_assigned.html", context=context
-            )
-            msg = EmailMessage(subject, html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    context = {
+        "url": settings.DOMAIN_NAME,
+        "lead": lead,
+        "created_by": lead.created_by,
+        "source": source,
+    }
+    notify_profiles(
+        recipients,
+        "assigned_to/leads_assigned.html",
+        "Assigned a lead for you. ",
+        context,
+        obj=lead,
+    )
 
 
 @app.task
-def create_lead_from_file(validated_rows, invalid_rows, user_id, source, company_id):
+def import_leads_from_file(import_id):
+    """Parameters : import_id.
+    Splits the stored file of a LeadImport into row-aligned byte ranges and
+    imports them in parallel, merging the results once every range is done.
+    """
+    lead_import = LeadImport.objects.filter(id=import_id, status="pending").first()
+    if not lead_import:
+        return
+    headers, chunks = start_lead_import(lead_import)
+    chord(
+        import_leads_chunk.s(import_id, headers, start, end, first_line, part)
+        for part, (start, end, first_line) in enumerate(chunks)
+    )(finish_leads_import.s(import_id, headers))
+
+
+@app.task
+def import_leads_chunk(import_id, headers, start, end, first_line, part):
+    lead_import = LeadImport.objects.select_related("org", "created_by").get(
+        id=import_id
+    )
+    try:
+        return import_chunk(lead_import, headers, start, end, first_line, part)
+    except Exception as e:
+        # Report instead of raising so the chord callback still runs.
+        return {"failed": f"Bytes {start}-{end}: {e}"}
+
+
+@app.task
+def finish_leads_import(results, import_id, headers):
+    lead_import = LeadImport.objects.get(id=import_id)
+    finish_lead_import(lead_import, headers, results)
+
+
+@app.task
+def create_lead_from_file(
+    validated_rows, invalid_rows, user_id, source, company_id=None
+):
     """Parameters : validated_rows, invalid_rows, user_id.
-    This function is used to create leads from a given file.
+    Kept for rows already queued by the previous upload flow; new uploads
+    go through import_leads_from_file.
     """
-    email_regex = "^[_a-zA-Z0-9-]+(\.[_a-zA-Z0-9-]+)*@[a-zA-Z0-9-]+(\.[a-zA-Z0-9-]+)*(\.[a-zA-Z]{2,4})$"
-    profile = Profile.objects.get(id=user_id)
+    profile = Profile.objects.select_related("user").get(id=user_id)
     org = Org.objects.filter(id=company_id).first()
+    importer = LeadRowImporter(org, user=profile.user)
     for row in validated_rows:
-        if not Lead.objects.filter(title=row.get("title")).exists():
-            if re.match(email_regex, row.get("email")) is not None:
-                try:
-                    lead = Lead()
-                    lead.title = row.get("title", "")[:64]
-                    lead.first_name = row.get("first name", "")[:255]
-                    lead.last_name = row.get("last name", "")[:255]
-                    lead.website = row.get("website", "")[:255]
-                    lead.email = row.get("email", "")
-                    lead.phone = row.get("phone", "")
-                    lead.address_line = row.get("address", "")[:255]
-                    lead.city = row.get("city", "")[:255]
-                    lead.state = row.get("state", "")[:255]
-                    lead.postcode = row.get("postcode", "")[:64]
-                    lead.country = row.get("country", "")[:3]
-                    lead.description = row.get("description", "")
-                    lead.status = row.get("status", "")
-                    lead.account_name = row.get("account_name", "")[:255]
-                    lead.created_from_site = False
-                    lead.created_by = profile
-                    lead.org = org
-                    lead.save()
-                except Exception as e:
-                    print(e)
+        importer.add(row)
+    importer.flush()
 
 
 @app.task
@@ -0,0 +1,82 @@
+import csv
+import io
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from common.models import Org
+from leads.importer import plan_chunks, run_lead_import
+from leads.models import Lead, LeadImport
+
+CSV_CONTENT = (
+    "Title,First Name,Email\r\n"
+    "Existing,Ana,ana@example.com\r\n"
+    "New lead,Luis,luis@example.com\r\n"
+    ",Nobody,nobody@example.com\r\n"
+    "\r\n"
+    "Bad email,Eva,eva-at-example\r\n"
+    "New lead,Luis,luis@example.com\r\n"
+    "\"Multi\nline\",Mar,mar@example.com\r\n"
+)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class LeadImportTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="import org")
+        Lead.objects.create(title="Existing", org=self.org)
+        Lead.objects.create(title="New lead", org=Org.objects.create(name="other"))
+
+    def test_chunks_end_on_row_boundaries(self):
+        data = CSV_CONTENT.encode("iso-8859-1")
+        headers, chunks = plan_chunks(io.BytesIO(data), len(data), chunk_bytes=10)
+        self.assertEqual(headers, ["title", "first name", "email"])
+        self.assertEqual(chunks[0][0], data.index(b"\n") + 1)
+        self.assertEqual(chunks[-1][1], len(data))
+        for (start, end, first_line), following in zip(chunks, chunks[1:]):
+            self.assertEqual(end, following[0])
+            self.assertEqual(data[end - 1:end], b"\n")
+            self.assertEqual(data.count(b"\n", 0, following[0]) + 1, following[2])
+        # The quoted newline of the last row never starts a chunk.
+        self.assertNotIn(data.index(b'line",Mar'), [start for start, _, _ in chunks])
+
+    def test_streaming_import(self):
+        lead_import = LeadImport.objects.create(
+            file=ContentFile(CSV_CONTENT.encode("iso-8859-1"), name="leads.csv"),
+            total_bytes=len(CSV_CONTENT),
+            org=self.org,
+        )
+        run_lead_import(lead_import, chunk_bytes=40)
+        lead_import.refresh_from_db()
+
+        self.assertEqual(lead_import.status, "completed")
+        self.assertEqual(lead_import.progress, 100)
+        self.assertEqual(
+            (
+                lead_import.processed_rows,
+                lead_import.created_count,
+                lead_import.skipped_count,
+                lead_import.error_count,
+            ),
+            (6, 2, 2, 2),
+        )
+        self.assertEqual(
+            sorted(Lead.objects.filter(org=self.org).values_list("title", flat=True)),
+            ["Existing", "Multi\nline", "New lead"],
+        )
+        with lead_import.error_file.open("rb") as error_file:
+            rows = list(csv.reader(io.StringIO(error_file.read().decode("utf-8"))))
+        self.assertEqual(rows[0], ["title", "first name", "email", "line", "error"])
+        self.assertEqual([row[3] for row in rows[1:]], ["4", "6"])
+
+    def test_missing_headers_fail_the_job(self):
+        lead_import = LeadImport.objects.create(
+            file=ContentFile(b"name,email\r\nfoo,foo@example.com\r\n", name="leads.csv"),
+            org=self.org,
+        )
+        with self.assertRaises(ValueError):
+            run_lead_import(lead_import)
+        lead_import.refresh_from_db()
+        self.assertEqual(lead_import.status, "failed")
+        self.assertEqual(lead_import.message, "Missing headers: title")
@@ -9,6 +9,7 @@ from rest_framework.views import APIView
 
 from accounts.models import Account, Tags
 from common.models import APISettings, Attachments, Comment, Profile
+from common.export import export_format_param, export_response, requested_format
 
 #from common.external_auth import CustomDualAuthentication
 from common.serializer import (
@@ -23,11 +24,12 @@ from common.utils import COUNTRIES, INDCHOICES, LEAD_SOURCE, LEAD_STATUS
 from contacts.models import Contact
 from leads import swagger_params1
 from leads.forms import LeadListForm
-from leads.models import Company, Lead
+from leads.models import Company, Lead, LeadImport
 from leads.serializer import (
     CompanySerializer,
     CompanySwaggerSerializer,
     LeadCreateSerializer,
+    LeadImportSerializer,
     LeadSerializer,
     TagsSerializer,
     LeadCreateSwaggerSerializer,
@@ -38,7 +40,7 @@ from leads.serializer import (
 )
 from common.models import User
 from leads.tasks import (
-    create_lead_from_file,
+    import_leads_from_file,
     send_email_to_assigned_user,
     send_lead_assigned_emails,
 )
@@ -50,7 +52,7 @@ class LeadListView(APIView, LimitOffsetPagination):
     model = Lead
     permission_classes = (IsAuthenticated,)
 
-    def get_context_data(self, **kwargs):
+    def get_queryset(self):
         params = self.request.query_params
         queryset = (
             self.model.objects.filter(org=self.request.profile.org)
@@ -89,6 +91,10 @@ class LeadListView(APIView, LimitOffsetPagination):
                 queryset = queryset.filter(city__icontains=params.get("city"))
             if params.get("email"):
                 queryset = queryset.filter(email__icontains=params.get("email"))
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        queryset = self.get_queryset()
         context = {}
         queryset_open = queryset.exclude(status="closed")
         results_leads_open = self.paginate_queryset(
@@ -257,6 +263,49 @@ class LeadListView(APIView, LimitOffsetPagination):
         )
 
 
+LEAD_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("title", "title"),
+    ("first name", "first_name"),
+    ("last name", "last_name"),
+    ("email", "email"),
+    ("phone", "phone"),
+    ("status", "status"),
+    ("source", "source"),
+    ("account_name", "account_name"),
+    ("organization", "organization"),
+    ("address", "address_line"),
+    ("city", "city"),
+    ("state", "state"),
+    ("postcode", "postcode"),
+    ("country", "country"),
+    ("website", "website"),
+    ("opportunity_amount", "opportunity_amount"),
+    ("probability", "probability"),
+    ("close_date", "close_date"),
+    ("created_at", "created_at"),
+)
+
+
+class LeadExportView(LeadListView):
+    http_method_names = ["get", "options"]
+
+    @extend_schema(
+        tags=["Leads"],
+        parameters=swagger_params1.lead_list_get_params + [export_format_param],
+    )
+    def get(self, request, *args, **kwargs):
+        export_format = requested_format(request.query_params)
+        if export_format is None:
+            return Response(
+                {"error": True, "errors": "Unsupported export format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return export_response(
+            self.get_queryset().distinct(), LEAD_EXPORT_COLUMNS, "leads", export_format
+        )
+
+
 class LeadDetailView(APIView):
     model = Lead
     #authentication_classes = (CustomDualAuthentication,)
@@ -571,15 +620,20 @@ class LeadUploadView(APIView):
     def post(self, request, *args, **kwargs):
         lead_form = LeadListForm(request.POST, request.FILES)
         if lead_form.is_valid():
-            create_lead_from_file.delay(
-                lead_form.validated_rows,
-                lead_form.invalid_rows,
-                request.profile.id,
-                request.get_host(),
-                request.profile.org.id,
+            leads_file = lead_form.cleaned_data["leads_file"]
+            lead_import = LeadImport.objects.create(
+                file=leads_file,
+                total_bytes=leads_file.size,
+                source=request.get_host(),
+                org=request.profile.org,
             )
+            import_leads_from_file.delay(str(lead_import.id))
             return Response(
-                {"error": False, "message": "Leads created Successfully"},
+                {
+                    "error": False,
+                    "message": "Leads import started",
+                    "import": LeadImportSerializer(lead_import).data,
+                },
                 status=status.HTTP_200_OK,
             )
         return Response(
@@ -588,6 +642,18 @@ class LeadUploadView(APIView):
         )
 
 
+class LeadImportDetailView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Leads"], parameters=swagger_params1.organization_params)
+    def get(self, request, pk, format=None):
+        lead_import = get_object_or_404(LeadImport, pk=pk, org=request.profile.org)
+        return Response(
+            {"error": False, "import": LeadImportSerializer(lead_import).data},
+            status=status.HTTP_200_OK,
+        )
+
+
 class LeadCommentView(APIView):
     model = Comment
     #authentication_classes = (CustomDualAuthentication,)
@@ -0,0 +1,166 @@
+"""The opportunity pipeline as a kanban board.
+
+The board has one column per stage in ``OpportunityStages.ALL``. Each
+column has the number of opportunities in it, the sum of their amounts
+and the sum weighted by their probability, all from one grouped query,
+and its first cards, newest first. The first cards of every column come
+from one query that numbers the opportunities of each stage with a
+``RowNumber`` window and keeps the first ``page_size + 1`` of each.
+
+Each column is paged on its own with an opaque cursor: the
+``(created_at, id)`` of its last card, so that the next page starts
+after it however many cards are added to or moved out of the column in
+the meantime.
+"""
+import base64
+import json
+import uuid
+from decimal import Decimal
+
+from django.db.models import (
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Q,
+    Sum,
+    Value,
+    Window,
+)
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils.dateparse import parse_datetime
+
+from opportunity.constants import OpportunityStages
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+CARD_ORDERING = (F("created_at").desc(), F("id").desc())
+CARD_FIELDS = (
+    "id",
+    "name",
+    "stage",
+    "currency",
+    "amount",
+    "probability",
+    "closed_on",
+    "created_at",
+    "account__id",
+    "account__name",
+)
+AMOUNT = DecimalField(max_digits=14, decimal_places=2)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(card):
+    position = json.dumps([card["created_at"].isoformat(), str(card["id"])])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = parse_datetime(created_at)
+        pk = uuid.UUID(pk)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    if created_at is None:
+        raise InvalidCursor(cursor)
+    return created_at, pk
+
+
+def after_cursor(cursor):
+    created_at, pk = decode_cursor(cursor)
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+
+
+def stage_totals(queryset):
+    """``{stage: {"count", "amount", "weighted_amount"}}``, in one query."""
+    weighted = ExpressionWrapper(
+        F("amount") * Coalesce("probability", 0) / Value(Decimal("100")),
+        output_field=AMOUNT,
+    )
+    rows = (
+        queryset.order_by()
+        .values("stage")
+        .annotate(
+            # Named apart from the fields they sum, which they would shadow.
+            opportunities=Count("id"),
+            total=Sum("amount"),
+            weighted_total=Sum(weighted),
+        )
+    )
+    return {
+        row["stage"]: {
+            "count": row["opportunities"],
+            "amount": row["total"] or Decimal("0"),
+            "weighted_amount": (row["weighted_total"] or Decimal("0")).quantize(
+                Decimal("0.01")
+            ),
+        }
+        for row in rows
+    }
+
+
+def card(row):
+    account_id = row.pop("account__id")
+    account_name = row.pop("account__name")
+    row["account"] = {"id": account_id, "name": account_name} if account_id else None
+    return row
+
+
+def column_page(cards, page_size):
+    """The page of a column out of up to ``page_size + 1`` of its cards."""
+    cards = [card(row) for row in cards]
+    page = cards[:page_size]
+    return {
+        "cards": page,
+        "next": encode_cursor(page[-1]) if len(cards) > page_size else None,
+    }
+
+
+def first_cards(queryset, page_size):
+    """``{stage: rows}`` with the first ``page_size + 1`` cards of every
+    stage, in one query."""
+    rows = (
+        queryset.annotate(
+            position=Window(
+                RowNumber(), partition_by=F("stage"), order_by=CARD_ORDERING
+            )
+        )
+        .filter(position__lte=page_size + 1)
+        .order_by("stage", "position")
+        .values(*CARD_FIELDS)
+    )
+    by_stage = {}
+    for row in rows:
+        by_stage.setdefault(row["stage"], []).append(row)
+    return by_stage
+
+
+def board(queryset, page_size=DEFAULT_PAGE_SIZE):
+    """Every column of the board, each with its totals and first page."""
+    queryset = queryset.filter(stage__in=OpportunityStages.ALL)
+    totals = stage_totals(queryset)
+    cards = first_cards(queryset, page_size)
+    empty = {"count": 0, "amount": Decimal("0"), "weighted_amount": Decimal("0")}
+    return [
+        {
+            "stage": stage,
+            "label": OpportunityStages.LABELS[stage],
+            **totals.get(stage, empty),
+            **column_page(cards.get(stage, []), page_size),
+        }
+        for stage in OpportunityStages.ALL
+    ]
+
+
+def column(queryset, stage, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """The page of one column after ``cursor``, or its first page."""
+    queryset = queryset.filter(stage=stage)
+    if cursor:
+        queryset = queryset.filter(after_cursor(cursor))
+    rows = queryset.order_by(*CARD_ORDERING).values(*CARD_FIELDS)[: page_size + 1]
+    return {"stage": stage, **column_page(list(rows), page_size)}
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opportunity', '0007_alter_opportunitytask_stage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=models.Index(fields=['org', 'stage', '-created_at', '-id'], name='opportunity_kanban_idx'),
+        ),
+    ]
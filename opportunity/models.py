@@ -66,6 +66,13 @@ class Opportunity(BaseModel):
         verbose_name_plural = "Opportunities"
         db_table = "opportunity"
         ordering = ("-created_at",)
+        indexes = [
+            # Cards of a kanban column, newest first.
+            models.Index(
+                fields=["org", "stage", "-created_at", "-id"],
+                name="opportunity_kanban_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -4,6 +4,8 @@ from accounts.models import Tags
 from accounts.serializer import AccountSerializer
 from common.serializer import AttachmentsSerializer, ProfileSerializer,UserSerializer
 from contacts.serializer import ContactSerializer
+from opportunity.constants import OpportunityStages
+from opportunity.kanban import MAX_PAGE_SIZE
 from opportunity.models import Opportunity
 from teams.serializer import TeamsSerializer
 
@@ -152,3 +154,18 @@ class OpportunityTaskCreateSerializer(serializers.ModelSerializer):
         from opportunity.models import OpportunityTask
         model = OpportunityTask
         fields = ['stage', 'name', 'completed', 'deadline', 'notes', 'order']
+
+
+class OpportunityKanbanQuerySerializer(serializers.Serializer):
+    stage = serializers.ChoiceField(choices=OpportunityStages.ALL, required=False)
+    cursor = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_PAGE_SIZE
+    )
+
+    def validate(self, data):
+        if data.get("cursor") and not data.get("stage"):
+            raise serializers.ValidationError(
+                {"stage": "A cursor pages one stage, which must be given."}
+            )
+        return data
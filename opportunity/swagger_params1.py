@@ -33,3 +33,14 @@ opportunity_comment_edit_params = [
     organization_params_in_header,
     OpenApiParameter("comment", OpenApiTypes.STR,OpenApiParameter.QUERY),
 ]
+
+opportunity_kanban_get_params = [
+    organization_params_in_header,
+    OpenApiParameter("stage", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("cursor", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("page_size", OpenApiTypes.INT,OpenApiParameter.QUERY),
+    OpenApiParameter("name", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("account", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("lead_source", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("tags", OpenApiTypes.STR,OpenApiParameter.QUERY),
+]
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import Account
+from common.models import Org, Profile, User
+from opportunity.constants import OpportunityStages
+from opportunity.kanban import board, column
+from opportunity.models import Opportunity
+from opportunity.views import OpportunityKanbanView
+
+
+class OpportunityKanbanTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="sales org")
+        self.user = User.objects.create(email="agent@example.com")
+        self.profile = Profile.objects.create(user=self.user, org=self.org, role="USER")
+        self.account = Account.objects.create(
+            name="Acme", email="acme@example.com", org=self.org
+        )
+        self.now = timezone.now()
+        self.created = 0
+
+    def opportunity(self, stage, amount=100, probability=50, assigned=True):
+        opportunity = Opportunity.objects.create(
+            name=f"Deal {self.created}",
+            stage=stage,
+            amount=amount,
+            probability=probability,
+            account=self.account,
+            org=self.org,
+        )
+        # Distinct creation times, one minute apart, newest last.
+        self.created += 1
+        Opportunity.objects.filter(pk=opportunity.pk).update(
+            created_at=self.now + timedelta(minutes=self.created)
+        )
+        if assigned:
+            opportunity.assigned_to.add(self.profile)
+        return opportunity
+
+    def get(self, url):
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        return OpportunityKanbanView.as_view()(request)
+
+    def test_board_totals_and_first_cards_per_stage(self):
+        discovery = [
+            self.opportunity(OpportunityStages.STAGE_1, amount=100 * i, probability=10)
+            for i in range(1, 6)
+        ]
+        self.opportunity(OpportunityStages.CLOSED_WON, amount=Decimal("99.99"))
+        self.opportunity(OpportunityStages.STAGE_2, amount=None, probability=None)
+
+        # Totals, then cards.
+        with self.assertNumQueries(2):
+            columns = board(Opportunity.objects.filter(org=self.org), page_size=2)
+        self.assertEqual(
+            [column["stage"] for column in columns], OpportunityStages.ALL
+        )
+        columns = {column["stage"]: column for column in columns}
+        first = columns[OpportunityStages.STAGE_1]
+        self.assertEqual(
+            (first["count"], first["amount"], first["weighted_amount"]),
+            (5, Decimal("1500"), Decimal("150")),
+        )
+        self.assertEqual(
+            [card["id"] for card in first["cards"]],
+            [discovery[4].id, discovery[3].id],
+        )
+        self.assertEqual(
+            first["cards"][0]["account"], {"id": self.account.id, "name": "Acme"}
+        )
+        self.assertEqual(
+            columns[OpportunityStages.CLOSED_WON]["weighted_amount"], Decimal("50.00")
+        )
+        proposal = columns[OpportunityStages.STAGE_2]
+        self.assertEqual(
+            (proposal["count"], proposal["amount"], proposal["next"]),
+            (1, Decimal("0"), None),
+        )
+        self.assertEqual(columns[OpportunityStages.STAGE_3]["count"], 0)
+
+        # The cursor of a column pages through the rest of it only.
+        pages = [first["cards"]]
+        cursor = first["next"]
+        while cursor:
+            page = column(
+                Opportunity.objects.filter(org=self.org),
+                OpportunityStages.STAGE_1,
+                cursor=cursor,
+                page_size=2,
+            )
+            pages.append(page["cards"])
+            cursor = page["next"]
+        self.assertEqual(
+            [[card["id"] for card in cards] for cards in pages],
+            [
+                [discovery[4].id, discovery[3].id],
+                [discovery[2].id, discovery[1].id],
+                [discovery[0].id],
+            ],
+        )
+
+    def test_endpoint_shows_users_their_opportunities(self):
+        self.opportunity(OpportunityStages.STAGE_1)
+        self.opportunity(OpportunityStages.STAGE_1, assigned=False)
+        opportunity = self.opportunity(OpportunityStages.STAGE_1)
+        # A second assignee must not count the opportunity twice.
+        other = Profile.objects.create(
+            user=User.objects.create(email="other@example.com"), org=self.org
+        )
+        opportunity.assigned_to.add(other)
+
+        response = self.get("/api/opportunities/kanban/?page_size=1")
+        self.assertEqual(response.status_code, 200)
+        discovery = response.data["stages"][0]
+        self.assertEqual((discovery["count"], len(discovery["cards"])), (2, 1))
+
+        response = self.get(
+            "/api/opportunities/kanban/?stage=DISCOVERY&page_size=1"
+            f"&cursor={discovery['next']}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["next"], None)
+
+        self.profile.role = "ADMIN"
+        response = self.get("/api/opportunities/kanban/")
+        self.assertEqual(response.data["stages"][0]["count"], 3)
+
+    def test_invalid_queries(self):
+        url = "/api/opportunities/kanban/"
+        self.assertEqual(self.get(f"{url}?cursor=x").status_code, 400)
+        self.assertEqual(
+            self.get("/api/opportunities/kanban/?stage=DISCOVERY&cursor=x").status_code,
+            400,
+        )
+        self.assertEqual(
+            self.get("/api/opportunities/kanban/?page_size=500").status_code, 400
+        )
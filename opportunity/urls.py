@@ -6,6 +6,7 @@ app_name = "api_opportunities"
 
 urlpatterns = [
     path("", views.OpportunityListView.as_view()),
+    path("kanban/", views.OpportunityKanbanView.as_view()),
     path("<str:pk>/", views.OpportunityDetailView.as_view()),
     path("comment/<str:pk>/", views.OpportunityCommentView.as_view()),
     path("attachment/<str:pk>/", views.OpportunityAttachmentView.as_view()),
@@ -21,7 +21,7 @@ from common.serializer import (
 from common.utils import CURRENCY_CODES, SOURCES, STAGES
 from contacts.models import Contact
 from contacts.serializer import ContactSerializer
-from opportunity import swagger_params1
+from opportunity import kanban, swagger_params1
 from opportunity.models import Opportunity
 from opportunity.serializer import *
 from opportunity.tasks import send_email_to_assigned_user
@@ -238,6 +238,76 @@ class OpportunityListView(APIView, LimitOffsetPagination):
         )
 
 
+class OpportunityKanbanView(APIView):
+    """The pipeline board: per stage, its totals and a page of light cards.
+
+    Without a cursor it returns every column with its first page; with a
+    ``stage`` and the ``next`` cursor of that column, the column's next page.
+    """
+
+    #authentication_classes = (CustomDualAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = Opportunity.objects.filter(org=self.request.profile.org)
+        if self.request.profile.role != "ADMIN" and not self.request.user.is_superuser:
+            # A subquery rather than a join, which would repeat the rows
+            # counted and summed per stage.
+            assigned = Opportunity.assigned_to.through.objects.filter(
+                profile=self.request.profile
+            ).values("opportunity_id")
+            queryset = queryset.filter(
+                Q(created_by=self.request.profile.user) | Q(id__in=assigned)
+            )
+        if params.get("name"):
+            queryset = queryset.filter(name__icontains=params.get("name"))
+        if params.get("account"):
+            queryset = queryset.filter(account=params.get("account"))
+        if params.get("lead_source"):
+            queryset = queryset.filter(lead_source__contains=params.get("lead_source"))
+        if params.get("tags"):
+            tagged = Opportunity.tags.through.objects.filter(
+                tags__in=params.getlist("tags")
+            ).values("opportunity_id")
+            queryset = queryset.filter(id__in=tagged)
+        return queryset
+
+    @extend_schema(
+        tags=["Opportunities"],
+        parameters=swagger_params1.opportunity_kanban_get_params,
+    )
+    def get(self, request, *args, **kwargs):
+        serializer = OpportunityKanbanQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                {"error": True, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        stage = serializer.validated_data.get("stage")
+        page_size = serializer.validated_data.get(
+            "page_size", kanban.DEFAULT_PAGE_SIZE
+        )
+        queryset = self.get_queryset()
+        if not stage:
+            return Response(
+                {"error": False, "stages": kanban.board(queryset, page_size)}
+            )
+        try:
+            page = kanban.column(
+                queryset,
+                stage,
+                cursor=serializer.validated_data.get("cursor"),
+                page_size=page_size,
+            )
+        except kanban.InvalidCursor:
+            return Response(
+                {"error": True, "errors": {"cursor": ["Invalid cursor."]}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"error": False, **page})
+
+
 class OpportunityDetailView(APIView):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
@@ -1,8 +1,21 @@
 from django.contrib import admin
 
-from .models import  Reminder
+from .models import Reminder, ReminderNotification, ScheduledReminder
 
 # Register your models here.
 
 # admin.site.register(Event)
 admin.site.register(Reminder)
+
+
+@admin.register(ScheduledReminder)
+class ScheduledReminderAdmin(admin.ModelAdmin):
+    list_display = ("event", "reminder", "fire_at", "sent_at")
+    list_filter = ("sent_at",)
+    raw_id_fields = ("event", "reminder")
+
+
+@admin.register(ReminderNotification)
+class ReminderNotificationAdmin(admin.ModelAdmin):
+    list_display = ("profile", "event", "message", "read_at")
+    raw_id_fields = ("profile", "event")
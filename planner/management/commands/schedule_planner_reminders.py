@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from planner.models import PlannerEvent
+from planner.reminders import schedule_reminders
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Compute the fire time of every planner event reminder"
+
+    def handle(self, *args, **options):
+        ids = list(
+            PlannerEvent.objects.filter(reminders__isnull=False)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .distinct()
+        )
+        for start in range(0, len(ids), BATCH_SIZE):
+            schedule_reminders(ids[start:start + BATCH_SIZE])
+        self.stdout.write(
+            self.style.SUCCESS(f"Reminders scheduled for {len(ids)} events.")
+        )
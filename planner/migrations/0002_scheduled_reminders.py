@@ -0,0 +1,67 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('common', '0010_attachments_opportunity_task_and_more'),
+        ('planner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderNotification',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('message', models.CharField(max_length=255)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_notifications', to='planner.plannerevent')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_notifications', to='common.profile')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Reminder Notification',
+                'verbose_name_plural': 'Reminder Notifications',
+                'db_table': 'planner_reminder_notification',
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduledReminder',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('fire_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_reminders', to='planner.plannerevent')),
+                ('reminder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled', to='planner.reminder')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Scheduled Reminder',
+                'verbose_name_plural': 'Scheduled Reminders',
+                'db_table': 'planner_scheduled_reminder',
+                'ordering': ('fire_at',),
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['fire_at'], name='planner_reminder_due_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scheduledreminder',
+            constraint=models.UniqueConstraint(fields=('event', 'reminder'), name='planner_scheduled_reminder_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='remindernotification',
+            index=models.Index(fields=['profile', 'read_at'], name='planner_rem_profile_f0084f_idx'),
+        ),
+    ]
@@ -4,7 +4,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
 
-from common.models import User
+from common.models import Profile, User
 from common.base import BaseModel
 from common.utils import EVENT_PARENT_TYPE, EVENT_STATUS
 from contacts.models import Contact
@@ -104,3 +104,64 @@ class PlannerEvent(BaseModel):
 
     def __str__(self):
         return f"{self.name}"
+
+
+class ScheduledReminder(BaseModel):
+    """When one reminder of one planner event fires.
+
+    ``fire_at`` is kept in sync with the event start and the reminder time
+    by ``planner.signals``; ``sent_at`` is set once the reminder went out.
+    """
+
+    event = models.ForeignKey(
+        PlannerEvent, on_delete=models.CASCADE, related_name="scheduled_reminders"
+    )
+    reminder = models.ForeignKey(
+        Reminder, on_delete=models.CASCADE, related_name="scheduled"
+    )
+    fire_at = models.DateTimeField()
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Scheduled Reminder"
+        verbose_name_plural = "Scheduled Reminders"
+        db_table = "planner_scheduled_reminder"
+        ordering = ("fire_at",)
+        indexes = [
+            models.Index(
+                fields=["fire_at"],
+                name="planner_reminder_due_idx",
+                condition=models.Q(sent_at__isnull=True),
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "reminder"], name="planner_scheduled_reminder_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.event} at {self.fire_at}"
+
+
+class ReminderNotification(BaseModel):
+    """An in-app reminder shown to one profile until it is read."""
+
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="reminder_notifications"
+    )
+    event = models.ForeignKey(
+        PlannerEvent, on_delete=models.CASCADE, related_name="reminder_notifications"
+    )
+    message = models.CharField(max_length=255)
+    read_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Reminder Notification"
+        verbose_name_plural = "Reminder Notifications"
+        db_table = "planner_reminder_notification"
+        ordering = ("-created_at",)
+        indexes = [models.Index(fields=["profile", "read_at"])]
+
+    def __str__(self):
+        return self.message
@@ -0,0 +1,156 @@
+"""Planner event reminders.
+
+Every ``(event, reminder)`` pair has a ``ScheduledReminder`` row with the
+absolute time it fires, kept up to date by ``schedule_reminders`` when an
+event, its reminders or a reminder time change. ``dispatch_due_reminders``
+reads only the due rows through the partial ``fire_at`` index, claims
+them with ``SKIP LOCKED`` and delivers and marks them sent in the same
+transaction, so a reminder goes out once however many workers run.
+
+Planner events have a start date but no start time, so reminders count
+back from the start of that day in the project time zone. ``Email``
+reminders go through the e-mail outbox; any other type becomes an
+in-app ``ReminderNotification``.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from common.notifications import active_recipients, build_messages
+from emails.outbox import queue
+from events.models import CalendarEntry
+from planner.models import PlannerEvent, ReminderNotification, ScheduledReminder
+
+BATCH_SIZE = 100
+EMAIL_TEMPLATE = "reminders/planner_event.html"
+
+
+def fire_time(start_date, reminder_time):
+    start = timezone.make_aware(
+        datetime.combine(start_date, time.min), timezone.get_current_timezone()
+    )
+    return start - timedelta(seconds=reminder_time)
+
+
+def schedule_reminders(event_ids):
+    """Bring the scheduled reminders of ``event_ids`` in line with the events.
+
+    Moved reminders are rescheduled, removed ones dropped, and reminders of
+    events that already started are recorded as sent without firing.
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return
+    now = timezone.now()
+    today = timezone.localdate()
+    wanted = {}
+    for event_id, reminder_id, start_date, reminder_time in (
+        PlannerEvent.reminders.through.objects.filter(
+            plannerevent_id__in=event_ids, reminder__reminder_time__isnull=False
+        ).values_list(
+            "plannerevent_id",
+            "reminder_id",
+            "plannerevent__start_date",
+            "reminder__reminder_time",
+        )
+    ):
+        wanted[event_id, reminder_id] = (
+            fire_time(start_date, reminder_time),
+            now if start_date < today else None,
+        )
+    stale = []
+    moved = []
+    for scheduled in ScheduledReminder.objects.filter(event_id__in=event_ids):
+        key = (scheduled.event_id, scheduled.reminder_id)
+        if key not in wanted:
+            stale.append(scheduled.id)
+            continue
+        fire_at, sent_at = wanted.pop(key)
+        if scheduled.fire_at != fire_at:
+            scheduled.fire_at = fire_at
+            scheduled.sent_at = sent_at
+            moved.append(scheduled)
+    with transaction.atomic():
+        ScheduledReminder.objects.filter(id__in=stale).delete()
+        ScheduledReminder.objects.bulk_update(moved, ["fire_at", "sent_at"])
+        ScheduledReminder.objects.bulk_create(
+            [
+                ScheduledReminder(
+                    event_id=event_id,
+                    reminder_id=reminder_id,
+                    fire_at=fire_at,
+                    sent_at=sent_at,
+                )
+                for (event_id, reminder_id), (fire_at, sent_at) in wanted.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def recipients(event_ids):
+    """``{event_id: [profile_id, ...]}`` from the planner calendar entries."""
+    profiles = {}
+    for event_id, profile_id in CalendarEntry.objects.filter(
+        source="planner", object_id__in=event_ids
+    ).values_list("object_id", "profile_id"):
+        profiles.setdefault(event_id, []).append(profile_id)
+    return profiles
+
+
+def is_email(scheduled):
+    return (scheduled.reminder.reminder_type or "").lower() == "email"
+
+
+def deliver(due):
+    """Queue the e-mails and create the in-app notifications of ``due``."""
+    profiles = recipients({scheduled.event_id for scheduled in due})
+    email_profile_ids = {
+        profile_id
+        for scheduled in due
+        if is_email(scheduled)
+        for profile_id in profiles.get(scheduled.event_id, ())
+    }
+    active = {profile.id: profile for profile in active_recipients(email_profile_ids)}
+    notifications = []
+    for scheduled in due:
+        event = scheduled.event
+        if event.status == "Canceled" or not profiles.get(event.id):
+            continue
+        if is_email(scheduled):
+            messages = build_messages(
+                EMAIL_TEMPLATE,
+                f"Reminder: {event.name}",
+                [active[pk] for pk in profiles[event.id] if pk in active],
+                {"event": event},
+            )
+            queue(messages, template=EMAIL_TEMPLATE, obj=scheduled)
+            continue
+        message = f"{event.name} starts on {event.start_date:%d/%m/%Y}"
+        notifications += [
+            ReminderNotification(profile_id=profile_id, event=event, message=message)
+            for profile_id in profiles[event.id]
+        ]
+    ReminderNotification.objects.bulk_create(notifications)
+
+
+def dispatch_due_reminders(batch_size=BATCH_SIZE):
+    """Deliver every reminder that is due; returns how many were handled."""
+    handled = 0
+    while True:
+        with transaction.atomic():
+            due = list(
+                ScheduledReminder.objects.select_for_update(
+                    skip_locked=True, of=("self",)
+                )
+                .filter(sent_at__isnull=True, fire_at__lte=timezone.now())
+                .select_related("event", "reminder")
+                .order_by("fire_at")[:batch_size]
+            )
+            deliver(due)
+            ScheduledReminder.objects.filter(
+                id__in=[scheduled.id for scheduled in due]
+            ).update(sent_at=timezone.now())
+        handled += len(due)
+        if len(due) < batch_size:
+            return handled
@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+from planner.models import ReminderNotification
+
+
+class ReminderNotificationSerializer(serializers.ModelSerializer):
+    event_name = serializers.CharField(source="event.name", read_only=True)
+    start_date = serializers.DateField(source="event.start_date", read_only=True)
+
+    class Meta:
+        model = ReminderNotification
+        fields = (
+            "id",
+            "event",
+            "event_name",
+            "start_date",
+            "message",
+            "read_at",
+            "created_at",
+        )
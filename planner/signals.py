@@ -0,0 +1,29 @@
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from planner.models import PlannerEvent, Reminder, ScheduledReminder
+from planner.reminders import schedule_reminders
+
+
+@receiver(post_save, sender=PlannerEvent)
+def planner_event_saved(sender, instance, **kwargs):
+    schedule_reminders([instance.pk])
+
+
+@receiver(post_save, sender=Reminder)
+def reminder_saved(sender, instance, created, **kwargs):
+    if not created:
+        schedule_reminders(instance.plannerevent_set.values_list("id", flat=True))
+
+
+@receiver(m2m_changed, sender=PlannerEvent.reminders.through)
+def planner_event_reminders_changed(sender, instance, action, reverse, pk_set,
+                                    **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        schedule_reminders([instance.pk])
+    elif action == "post_clear":
+        ScheduledReminder.objects.filter(reminder=instance).delete()
+    else:
+        schedule_reminders(pk_set)
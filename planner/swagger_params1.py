@@ -0,0 +1,12 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+
+from common.swagger_params1 import (  # noqa: F401
+    organization_params,
+    organization_params_in_header,
+)
+
+reminder_list_params = [
+    organization_params_in_header,
+    OpenApiParameter("unread", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+]
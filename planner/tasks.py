@@ -0,0 +1,11 @@
+from celery import Celery
+
+from planner.reminders import dispatch_due_reminders
+
+app = Celery("redis://")
+
+
+@app.task
+def send_due_reminders():
+    """Deliver the planner reminders whose fire time has passed."""
+    return dispatch_due_reminders()
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.models import Org, Profile, User
+from emails.models import OutboxEmail
+from planner.models import (
+    PlannerEvent,
+    Reminder,
+    ReminderNotification,
+    ScheduledReminder,
+)
+from planner.reminders import dispatch_due_reminders, fire_time
+from planner.views import ReminderNotificationListView, ReminderNotificationReadView
+
+
+class PlannerReminderTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="planner org")
+        self.user = User.objects.create(email="agent@example.com")
+        self.profile = Profile.objects.create(user=self.user, org=self.org)
+        self.tomorrow = timezone.localdate() + timedelta(days=1)
+        self.event = PlannerEvent.objects.create(
+            name="Viewing", event_type="Meeting", start_date=self.tomorrow
+        )
+        self.event.assigned_to.add(self.user)
+
+    def add_reminder(self, reminder_type, seconds):
+        reminder = Reminder.objects.create(
+            reminder_type=reminder_type, reminder_time=seconds
+        )
+        self.event.reminders.add(reminder)
+        return reminder
+
+    def test_fire_time_follows_event_and_reminder(self):
+        reminder = self.add_reminder("Email", 3600)
+        scheduled = ScheduledReminder.objects.get()
+        self.assertEqual(scheduled.fire_at, fire_time(self.tomorrow, 3600))
+
+        self.event.start_date += timedelta(days=7)
+        self.event.save()
+        reminder.reminder_time = 7200
+        reminder.save()
+        scheduled.refresh_from_db()
+        self.assertEqual(
+            scheduled.fire_at, fire_time(self.tomorrow + timedelta(days=7), 7200)
+        )
+
+        self.event.reminders.remove(reminder)
+        self.assertFalse(ScheduledReminder.objects.exists())
+
+    def test_due_email_reminder_is_queued_once(self):
+        self.add_reminder("Email", 2 * 86400)
+        self.add_reminder("Email", 30 * 86400)
+        # Claim, recipients, profiles, one outbox lookup and insert (in a
+        # savepoint) per reminder, update.
+        with self.assertNumQueries(14):
+            self.assertEqual(dispatch_due_reminders(), 2)
+        self.assertEqual(
+            list(OutboxEmail.objects.values_list("recipient", flat=True)),
+            ["agent@example.com", "agent@example.com"],
+        )
+        self.assertEqual(dispatch_due_reminders(), 0)
+        self.assertFalse(ScheduledReminder.objects.filter(sent_at=None).exists())
+
+    def test_popup_reminder_is_shown_in_app(self):
+        self.add_reminder("Popup", 2 * 86400)
+        self.add_reminder("Popup", 60)  # not due yet
+        self.assertEqual(dispatch_due_reminders(), 1)
+        factory = APIRequestFactory()
+
+        request = factory.get("/api/planner/reminders/")
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        response = ReminderNotificationListView.as_view()(request)
+        self.assertEqual(response.data["reminders_count"], 1)
+        notification = ReminderNotification.objects.get()
+        self.assertEqual(response.data["reminders"][0]["event_name"], "Viewing")
+
+        request = factory.put(f"/api/planner/reminders/{notification.id}/")
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        response = ReminderNotificationReadView.as_view()(request, pk=notification.id)
+        self.assertEqual(response.status_code, 200)
+        notification.refresh_from_db()
+        self.assertIsNotNone(notification.read_at)
@@ -36,3 +36,14 @@
 #     url(r'^search/events/$', views.search_meetings, name='search_meetings'),
 
 # ]
+
+from django.urls import path
+
+from planner import views
+
+app_name = "api_planner"
+
+urlpatterns = [
+    path("reminders/", views.ReminderNotificationListView.as_view()),
+    path("reminders/<uuid:pk>/", views.ReminderNotificationReadView.as_view()),
+]
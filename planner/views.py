@@ -702,3 +702,69 @@
 #         return render(request, 'leads.html', {'leads': leads})
 #     else:
 #         return JsonResponse({'METHOD': 'INVALID'})
+
+
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from planner import swagger_params1
+from planner.models import ReminderNotification
+from planner.serializer import ReminderNotificationSerializer
+
+
+class ReminderNotificationListView(APIView, LimitOffsetPagination):
+    """In-app reminders of the current profile, newest first."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Planner"], parameters=swagger_params1.reminder_list_params)
+    def get(self, request, *args, **kwargs):
+        queryset = ReminderNotification.objects.filter(
+            profile=request.profile
+        ).select_related("event")
+        if request.query_params.get("unread", "true").lower() != "false":
+            queryset = queryset.filter(read_at__isnull=True)
+        results = self.paginate_queryset(queryset, request, view=self)
+        return Response(
+            {
+                "reminders_count": self.count,
+                "reminders": ReminderNotificationSerializer(results, many=True).data,
+            }
+        )
+
+    @extend_schema(tags=["Planner"], parameters=swagger_params1.organization_params)
+    def post(self, request, *args, **kwargs):
+        """Mark every unread reminder as read."""
+        ReminderNotification.objects.filter(
+            profile=request.profile, read_at__isnull=True
+        ).update(read_at=timezone.now())
+        return Response(
+            {"error": False, "message": "Reminders marked as read"},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ReminderNotificationReadView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Planner"], parameters=swagger_params1.organization_params)
+    def put(self, request, pk, **kwargs):
+        updated = ReminderNotification.objects.filter(
+            id=pk, profile=request.profile, read_at__isnull=True
+        ).update(read_at=timezone.now())
+        if not updated and not ReminderNotification.objects.filter(
+            id=pk, profile=request.profile
+        ).exists():
+            return Response(
+                {"error": True, "errors": "Reminder not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(
+            {"error": False, "message": "Reminder marked as read"},
+            status=status.HTTP_200_OK,
+        )
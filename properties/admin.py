@@ -2,12 +2,15 @@ from django.contrib import admin
 
 from .models import (
     Property,
+    PropertyBooking,
     PropertyDocument,
     PropertyFeature,
     PropertyFeatureCategory,
     PropertyFloorPlan,
     PropertyImage,
+    PropertyPriceChange,
     PropertyVideo,
+    PropertyViewing,
 )
 
 
@@ -65,3 +68,21 @@ class PropertyFloorPlanAdmin(admin.ModelAdmin):
 @admin.register(PropertyVideo)
 class PropertyVideoAdmin(admin.ModelAdmin):
     list_display = ("property", "title", "is_virtual_tour", "order")
+
+
+@admin.register(PropertyPriceChange)
+class PropertyPriceChangeAdmin(admin.ModelAdmin):
+    list_display = ("property", "market", "old_price", "new_price", "changed_at")
+    list_filter = ("market",)
+
+
+@admin.register(PropertyBooking)
+class PropertyBookingAdmin(admin.ModelAdmin):
+    list_display = ("property", "start_date", "end_date", "status")
+    list_filter = ("status",)
+
+
+@admin.register(PropertyViewing)
+class PropertyViewingAdmin(admin.ModelAdmin):
+    list_display = ("property", "agent", "starts_at", "ends_at", "status")
+    list_filter = ("status",)
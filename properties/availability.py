@@ -0,0 +1,67 @@
+"""Rental availability: booking overlap checks as indexed range queries.
+
+Bookings are half-open ``[start_date, end_date)`` intervals. Two intervals
+overlap when ``start < other_end and end > other_start``, which the
+``(property, start_date, end_date)`` index answers directly; on PostgreSQL
+the exclusion constraint on ``PropertyBooking`` enforces the same rule.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Property, PropertyBooking
+
+
+def overlapping_bookings(start_date, end_date):
+    return PropertyBooking.objects.filter(
+        start_date__lt=end_date, end_date__gt=start_date,
+    ).exclude(status="cancelled")
+
+
+def booking_conflicts(property_id, start_date, end_date, exclude_id=None):
+    conflicts = overlapping_bookings(start_date, end_date).filter(
+        property_id=property_id,
+    )
+    if exclude_id:
+        conflicts = conflicts.exclude(id=exclude_id)
+    return conflicts
+
+
+def filter_available(queryset, start_date, end_date):
+    """Restrict a ``Property`` queryset to those free for the whole stay."""
+    return queryset.filter(
+        ~Exists(overlapping_bookings(start_date, end_date).filter(
+            property_id=OuterRef("pk"),
+        )),
+    ).exclude(available_from__gt=start_date)
+
+
+def create_booking(serializer, property_obj, **extra):
+    """Save a validated booking unless it overlaps an existing one.
+
+    Returns ``(booking, conflicts)``; ``booking`` is ``None`` on conflict.
+    """
+    data = serializer.validated_data
+    with transaction.atomic():
+        # Serialize bookings of the same property on backends without the
+        # exclusion constraint.
+        Property.objects.select_for_update().filter(pk=property_obj.pk).first()
+        if data.get("status") != "cancelled":
+            conflicts = list(
+                booking_conflicts(
+                    property_obj.pk, data["start_date"], data["end_date"],
+                )
+            )
+            if conflicts:
+                return None, conflicts
+        try:
+            with transaction.atomic():
+                booking = serializer.save(property=property_obj, **extra)
+        except IntegrityError:
+            # Lost a race against a concurrent booking on PostgreSQL.
+            conflicts = list(
+                booking_conflicts(
+                    property_obj.pk, data["start_date"], data["end_date"],
+                )
+            )
+            return None, conflicts
+    return booking, []
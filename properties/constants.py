@@ -24,6 +24,11 @@ OPERATION_TYPES = (
     ("transfer", "Traspaso"),
 )
 
+PRICE_MARKETS = (
+    ("sale", "Venta"),
+    ("rent", "Alquiler"),
+)
+
 PROPERTY_STATUS = (
     ("available", "Disponible"),
     ("reserved", "Reservado"),
@@ -66,3 +71,17 @@ CURRENCY_CHOICES = (
     ("USD", "USD"),
     ("GBP", "GBP"),
 )
+
+BOOKING_STATUS = (
+    ("tentative", "Provisional"),
+    ("confirmed", "Confirmada"),
+    ("blocked", "Bloqueada"),
+    ("cancelled", "Cancelada"),
+)
+
+VIEWING_STATUS = (
+    ("scheduled", "Programada"),
+    ("done", "Realizada"),
+    ("no_show", "No presentado"),
+    ("cancelled", "Cancelada"),
+)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from properties.price_history import rebuild_zone_histograms
+
+
+class Command(BaseCommand):
+    help = "Recount the zone price histograms from the current property prices"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", help="Only rebuild the histograms of this org id")
+
+    def handle(self, *args, **options):
+        zones = rebuild_zone_histograms(org_id=options["org"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {zones} zone price histograms"))
@@ -0,0 +1,376 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:17
+
+from django.conf import settings
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import properties.models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0004_accountemail_send_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contacts', '0005_alter_contact_address'),
+        ('leads', '0004_lead_import_key_lead_lead_org_id_ec1162_idx_and_more'),
+        ('common', '0011_numbersequence'),
+        ('teams', '0003_alter_teams_created_by'),
+    ]
+
+    operations = [
+        # The exclusion constraints compare uuid columns with = in a GiST index.
+        BtreeGistExtension(),
+        migrations.CreateModel(
+            name='Property',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('reference', models.CharField(blank=True, db_index=True, max_length=50, unique=True, verbose_name='Reference')),
+                ('title', models.CharField(max_length=255, verbose_name='Title')),
+                ('slug', models.SlugField(blank=True, max_length=280, unique=True)),
+                ('property_type', models.CharField(choices=[('flat', 'Piso'), ('house', 'Casa'), ('chalet', 'Chalet'), ('duplex', 'Dúplex'), ('penthouse', 'Ático'), ('studio', 'Estudio'), ('villa', 'Villa'), ('townhouse', 'Adosado'), ('country_house', 'Casa Rural'), ('building', 'Edificio'), ('land', 'Terreno'), ('garage', 'Garaje'), ('storage', 'Trastero'), ('office', 'Oficina'), ('commercial', 'Local Comercial'), ('warehouse', 'Nave Industrial')], db_index=True, max_length=30)),
+                ('operation', models.CharField(choices=[('sale', 'Venta'), ('rent', 'Alquiler'), ('sale_rent', 'Venta y Alquiler'), ('transfer', 'Traspaso')], db_index=True, max_length=20)),
+                ('status', models.CharField(choices=[('available', 'Disponible'), ('reserved', 'Reservado'), ('sold', 'Vendido'), ('rented', 'Alquilado'), ('withdrawn', 'Retirado')], db_index=True, default='available', max_length=20)),
+                ('sale_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Sale Price')),
+                ('rent_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Rent Price/month')),
+                ('currency', models.CharField(choices=[('EUR', 'EUR'), ('USD', 'USD'), ('GBP', 'GBP')], default='EUR', max_length=3)),
+                ('community_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Community Fees')),
+                ('ibi_tax', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='IBI Annual Tax')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=7, max_digits=10, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=7, max_digits=10, null=True)),
+                ('zone', models.CharField(blank=True, default='', max_length=255, verbose_name='Zone/Neighborhood')),
+                ('built_area', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Built Area m²')),
+                ('usable_area', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Usable Area m²')),
+                ('plot_area', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Plot Area m²')),
+                ('terrace_area', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Terrace Area m²')),
+                ('bedrooms', models.PositiveIntegerField(default=0)),
+                ('bathrooms', models.PositiveIntegerField(default=0)),
+                ('floors', models.PositiveIntegerField(default=1, verbose_name='Number of floors')),
+                ('floor_number', models.CharField(blank=True, default='', max_length=10, verbose_name='Floor')),
+                ('year_built', models.PositiveIntegerField(blank=True, null=True)),
+                ('year_renovated', models.PositiveIntegerField(blank=True, null=True)),
+                ('orientation', models.CharField(blank=True, choices=[('north', 'Norte'), ('south', 'Sur'), ('east', 'Este'), ('west', 'Oeste'), ('northeast', 'Noreste'), ('northwest', 'Noroeste'), ('southeast', 'Sureste'), ('southwest', 'Suroeste')], default='', max_length=20)),
+                ('furnished', models.CharField(blank=True, choices=[('furnished', 'Amueblado'), ('partially', 'Parcialmente amueblado'), ('unfurnished', 'Sin amueblar')], default='', max_length=20)),
+                ('energy_rating', models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D'), ('E', 'E'), ('F', 'F'), ('G', 'G'), ('exempt', 'Exento'), ('pending', 'En trámite')], default='', max_length=10)),
+                ('energy_consumption', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='kWh/m²/year')),
+                ('co2_emissions', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='CO₂ kg/m²/year')),
+                ('description', models.TextField(blank=True, default='')),
+                ('internal_notes', models.TextField(blank=True, default='', verbose_name='Internal Notes (not public)')),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('is_published_web', models.BooleanField(default=False, verbose_name='Published on website')),
+                ('publish_idealista', models.BooleanField(default=False)),
+                ('publish_fotocasa', models.BooleanField(default=False)),
+                ('publish_habitaclia', models.BooleanField(default=False)),
+                ('available_from', models.DateField(blank=True, null=True)),
+                ('sold_date', models.DateField(blank=True, null=True)),
+                ('address', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='properties', to='common.address')),
+                ('assigned_to', models.ManyToManyField(blank=True, related_name='property_assigned_users', to='common.profile')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+            ],
+            options={
+                'verbose_name': 'Property',
+                'verbose_name_plural': 'Properties',
+                'db_table': 'property',
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyVideo',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('video_url', models.URLField(blank=True, default='')),
+                ('video_file', models.FileField(blank=True, upload_to='properties/videos/%Y/%m/')),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('is_virtual_tour', models.BooleanField(default=False)),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='videos', to='properties.property')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Property Video',
+                'verbose_name_plural': 'Property Videos',
+                'db_table': 'property_video',
+                'ordering': ('order',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyPriceChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('market', models.CharField(choices=[('sale', 'Venta'), ('rent', 'Alquiler')], max_length=4)),
+                ('old_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('new_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='property_price_changes', to='common.profile')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_changes', to='properties.property')),
+            ],
+            options={
+                'verbose_name': 'Property Price Change',
+                'verbose_name_plural': 'Property Price Changes',
+                'db_table': 'property_price_change',
+                'ordering': ('changed_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyImage',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('image', models.ImageField(upload_to='properties/images/%Y/%m/')),
+                ('thumbnail', models.ImageField(blank=True, upload_to='properties/thumbnails/%Y/%m/')),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('alt_text', models.CharField(blank=True, default='', max_length=255)),
+                ('is_primary', models.BooleanField(default=False)),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='properties.property')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Property Image',
+                'verbose_name_plural': 'Property Images',
+                'db_table': 'property_image',
+                'ordering': ('order', '-created_at'),
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyFloorPlan',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('file', models.FileField(upload_to='properties/floorplans/%Y/%m/')),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='floor_plans', to='properties.property')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Property Floor Plan',
+                'verbose_name_plural': 'Property Floor Plans',
+                'db_table': 'property_floor_plan',
+                'ordering': ('order',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyFeatureCategory',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('order', models.IntegerField(default=0)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('org', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feature_categories', to='common.org')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Feature Category',
+                'verbose_name_plural': 'Feature Categories',
+                'db_table': 'property_feature_category',
+                'ordering': ('order',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyFeature',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('icon', models.CharField(blank=True, default='', max_length=50)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='features', to='properties.propertyfeaturecategory')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('org', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='property_features', to='common.org')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Property Feature',
+                'verbose_name_plural': 'Property Features',
+                'db_table': 'property_feature',
+                'ordering': ('category__order', 'name'),
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyDocument',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('file', models.FileField(upload_to='properties/docs/%Y/%m/')),
+                ('title', models.CharField(max_length=255)),
+                ('is_private', models.BooleanField(default=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='properties.property')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Property Document',
+                'verbose_name_plural': 'Property Documents',
+                'db_table': 'property_document',
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyBooking',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('status', models.CharField(choices=[('tentative', 'Provisional'), ('confirmed', 'Confirmada'), ('blocked', 'Bloqueada'), ('cancelled', 'Cancelada')], default='confirmed', max_length=20)),
+                ('notes', models.TextField(blank=True, default='')),
+                ('contact', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='property_bookings', to='contacts.contact')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('org', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='property_bookings', to='common.org')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='properties.property')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Property Booking',
+                'verbose_name_plural': 'Property Bookings',
+                'db_table': 'property_booking',
+                'ordering': ('start_date',),
+            },
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='features',
+            field=models.ManyToManyField(blank=True, related_name='properties', to='properties.propertyfeature'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='org',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='property_org', to='common.org'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='owner_contact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='owned_properties', to='contacts.contact'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='property_tags', to='accounts.tags'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='teams',
+            field=models.ManyToManyField(blank=True, related_name='property_teams', to='teams.teams'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='updated_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By'),
+        ),
+        migrations.CreateModel(
+            name='ZonePriceTrend',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('market', models.CharField(choices=[('sale', 'Venta'), ('rent', 'Alquiler')], max_length=4)),
+                ('city', models.CharField(blank=True, default='', max_length=255)),
+                ('zone', models.CharField(blank=True, default='', max_length=255)),
+                ('week', models.DateField(help_text='Monday of the ISO week')),
+                ('median_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('listings', models.PositiveIntegerField(default=0)),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zone_price_trends', to='common.org')),
+            ],
+            options={
+                'db_table': 'zone_price_trend',
+                'ordering': ('week',),
+                'unique_together': {('org', 'market', 'city', 'zone', 'week')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ZonePriceHistogram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('market', models.CharField(choices=[('sale', 'Venta'), ('rent', 'Alquiler')], max_length=4)),
+                ('city', models.CharField(blank=True, default='', max_length=255)),
+                ('zone', models.CharField(blank=True, default='', max_length=255)),
+                ('buckets', models.JSONField(default=dict)),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zone_price_histograms', to='common.org')),
+            ],
+            options={
+                'db_table': 'zone_price_histogram',
+                'unique_together': {('org', 'market', 'city', 'zone')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyViewing',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('scheduled', 'Programada'), ('done', 'Realizada'), ('no_show', 'No presentado'), ('cancelled', 'Cancelada')], default='scheduled', max_length=20)),
+                ('notes', models.TextField(blank=True, default='')),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='property_viewings', to='common.profile')),
+                ('contact', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='property_viewings', to='contacts.contact')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('lead', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='property_viewings', to='leads.lead')),
+                ('org', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='property_viewings', to='common.org')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='viewings', to='properties.property')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Property Viewing',
+                'verbose_name_plural': 'Property Viewings',
+                'db_table': 'property_viewing',
+                'ordering': ('starts_at',),
+                'indexes': [models.Index(fields=['agent', 'starts_at', 'ends_at'], name='property_vi_agent_i_17e5fa_idx'), models.Index(fields=['property', 'starts_at'], name='property_vi_propert_14cf2f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='propertyviewing',
+            constraint=models.CheckConstraint(check=models.Q(('ends_at__gt', models.F('starts_at'))), name='property_viewing_end_after_start'),
+        ),
+        migrations.AddIndex(
+            model_name='propertypricechange',
+            index=models.Index(fields=['property', 'changed_at'], name='property_pr_propert_7a0b1d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertybooking',
+            index=models.Index(fields=['property', 'start_date', 'end_date'], name='property_bo_propert_9dc6cc_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='propertybooking',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gt', models.F('start_date'))), name='property_booking_end_after_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='propertybooking',
+            constraint=properties.models.PostgresExclusionConstraint(condition=models.Q(('status', 'cancelled'), _negated=True), expressions=[(properties.models.DateRange('start_date', 'end_date', models.Value('[)')), '&&'), ('property', '=')], name='property_booking_no_overlap'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['property_type', 'operation', 'status'], name='property_propert_853792_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['sale_price'], name='property_sale_pr_4365b7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['rent_price'], name='property_rent_pr_d1252b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['reference'], name='property_referen_ccb489_idx'),
+        ),
+    ]
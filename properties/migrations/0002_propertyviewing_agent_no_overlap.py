@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+import properties.models
+
+
+class Migration(migrations.Migration):
+
+    # 0001 installs btree_gist, needed for = on the uuid agent column.
+    dependencies = [
+        ('properties', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='propertyviewing',
+            constraint=properties.models.PostgresExclusionConstraint(condition=models.Q(('status', 'cancelled'), _negated=True), expressions=[(properties.models.TsTzRange('starts_at', 'ends_at', models.Value('[)')), '&&'), ('agent', '=')], name='property_viewing_agent_no_overlap'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+# As in properties.price_history when this migration was written; copied so
+# that later changes there cannot alter what this migration does.
+PRICE_FIELDS = {
+    "sale": "sale_price",
+    "rent": "rent_price",
+}
+LISTED_STATUSES = ("available", "reserved")
+BUCKET_BASE = math.log(1.01)
+
+
+def histogram_median(buckets):
+    total = sum(buckets.values())
+    seen = 0
+    for bucket in sorted(buckets, key=int):
+        seen += buckets[bucket]
+        if seen * 2 >= total:
+            price = Decimal(math.exp(int(bucket) * BUCKET_BASE))
+            return price.quantize(Decimal("0.01")), total
+    return None, total
+
+
+def seed_histograms(apps, schema_editor):
+    # Histograms only follow saves: count the listings that predate them.
+    Property = apps.get_model("properties", "Property")
+    ZonePriceHistogram = apps.get_model("properties", "ZonePriceHistogram")
+    ZonePriceTrend = apps.get_model("properties", "ZonePriceTrend")
+    rows = Property.objects.filter(
+        org__isnull=False, is_active=True, status__in=LISTED_STATUSES
+    ).values("org_id", *PRICE_FIELDS.values(), "zone", "address__city")
+    counted = {}
+    for row in rows.iterator(chunk_size=2000):
+        city = (row["address__city"] or "").strip().lower()
+        zone = (row["zone"] or "").strip().lower()
+        for market, field in PRICE_FIELDS.items():
+            if row[field]:
+                buckets = counted.setdefault((row["org_id"], market, city, zone), {})
+                bucket = str(round(math.log(float(row[field])) / BUCKET_BASE))
+                buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    today = timezone.localdate()
+    week = today - timedelta(days=today.weekday())
+    ZonePriceHistogram.objects.bulk_create(
+        ZonePriceHistogram(
+            org_id=org, market=market, city=city, zone=zone, buckets=buckets
+        )
+        for (org, market, city, zone), buckets in counted.items()
+    )
+    for (org, market, city, zone), buckets in counted.items():
+        median, listings = histogram_median(buckets)
+        ZonePriceTrend.objects.update_or_create(
+            org_id=org,
+            market=market,
+            city=city,
+            zone=zone,
+            week=week,
+            defaults={"median_price": median, "listings": listings},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_propertyviewing_agent_no_overlap'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_histograms, migrations.RunPython.noop),
+    ]
@@ -1,24 +1,75 @@
-from django.db import models
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import (
+    DateRangeField,
+    DateTimeRangeField,
+    RangeOperators,
+)
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Func, Q, Value
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
 from accounts.models import Tags
 from common.base import BaseModel
 from common.models import Address, Org, Profile
+from common.sequences import next_value
 from contacts.models import Contact
 from teams.models import Teams
 
 from .constants import (
+    BOOKING_STATUS,
     CURRENCY_CHOICES,
     ENERGY_RATINGS,
     FURNISHED_CHOICES,
     OPERATION_TYPES,
     ORIENTATION_CHOICES,
+    PRICE_MARKETS,
     PROPERTY_STATUS,
     PROPERTY_TYPES,
+    VIEWING_STATUS,
 )
 
 
+class DateRange(Func):
+    function = "DATERANGE"
+    output_field = DateRangeField()
+
+
+class TsTzRange(Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+class PostgresExclusionConstraint(ExclusionConstraint):
+    """Exclusion constraint that is skipped on databases other than PostgreSQL.
+
+    Needs the ``btree_gist`` extension for equality on non-range columns,
+    which the first migration of this app installs. Callers still run an
+    indexed overlap query first, which is the only guard on other backends.
+    """
+
+    def constraint_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return None
+        return super().constraint_sql(model, schema_editor)
+
+    def create_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return None
+        return super().create_sql(model, schema_editor)
+
+    def remove_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return None
+        return super().remove_sql(model, schema_editor)
+
+    def validate(self, model, instance, exclude=None, using=DEFAULT_DB_ALIAS):
+        if connections[using].vendor != "postgresql":
+            return
+        super().validate(model, instance, exclude=exclude, using=using)
+
+
 class PropertyFeatureCategory(BaseModel):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
@@ -64,8 +115,9 @@ class PropertyFeature(BaseModel):
 
 class Property(BaseModel):
     # -- Identification --
+    # Left blank, the next number of the "property" sequence is used.
     reference = models.CharField(
-        _("Reference"), max_length=50, unique=True, db_index=True,
+        _("Reference"), max_length=50, unique=True, db_index=True, blank=True,
     )
     title = models.CharField(_("Title"), max_length=255)
     slug = models.SlugField(max_length=280, unique=True, blank=True)
@@ -218,11 +270,37 @@ class Property(BaseModel):
         return f"{self.reference} - {self.title}"
 
     def save(self, *args, **kwargs):
+        if self.reference:
+            return self.save_with_slug(*args, **kwargs)
+        with transaction.atomic():
+            self.reference = self.reference_generator()
+            self.save_with_slug(*args, **kwargs)
+
+    def save_with_slug(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(f"{self.reference}-{self.title}")
             self.slug = base_slug[:280]
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def reference_generator():
+        # References are unique across orgs, so the sequence is shared.
+        year = timezone.localdate().year
+        prefix = f"REF-{year}-"
+
+        def numbered_this_year():
+            references = Property.objects.filter(
+                reference__startswith=prefix
+            ).values_list("reference", flat=True)
+            return max(
+                (int(reference[len(prefix):]) for reference in references
+                 if reference[len(prefix):].isdigit()),
+                default=0,
+            )
+
+        number = next_value("property", period=str(year), initial=numbered_this_year)
+        return f"{prefix}{number:05d}"
+
     @property
     def primary_image(self):
         return self.images.filter(is_primary=True).first()
@@ -323,3 +401,184 @@ class PropertyDocument(BaseModel):
 
     def __str__(self):
         return f"{self.title} - {self.property.reference}"
+
+
+class PropertyPriceChange(models.Model):
+    # Append-only log: one narrow row per actual price change, without the
+    # audit columns of BaseModel.
+    property = models.ForeignKey(
+        Property, related_name="price_changes", on_delete=models.CASCADE,
+    )
+    market = models.CharField(max_length=4, choices=PRICE_MARKETS)
+    old_price = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True,
+    )
+    new_price = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True,
+    )
+    changed_at = models.DateTimeField(default=timezone.now)
+    changed_by = models.ForeignKey(
+        Profile, related_name="property_price_changes",
+        on_delete=models.SET_NULL, null=True, blank=True,
+    )
+
+    class Meta:
+        db_table = "property_price_change"
+        ordering = ("changed_at",)
+        verbose_name = "Property Price Change"
+        verbose_name_plural = "Property Price Changes"
+        indexes = [
+            models.Index(fields=["property", "changed_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} {self.market}: {self.old_price} -> {self.new_price}"
+
+
+class ZonePriceHistogram(models.Model):
+    """Current asking prices of a zone as log-scale bucket counts."""
+
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="zone_price_histograms",
+    )
+    market = models.CharField(max_length=4, choices=PRICE_MARKETS)
+    city = models.CharField(max_length=255, blank=True, default="")
+    zone = models.CharField(max_length=255, blank=True, default="")
+    buckets = models.JSONField(default=dict)
+
+    class Meta:
+        db_table = "zone_price_histogram"
+        unique_together = ("org", "market", "city", "zone")
+
+    def __str__(self):
+        return f"{self.city}/{self.zone} ({self.market})"
+
+
+class ZonePriceTrend(models.Model):
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="zone_price_trends",
+    )
+    market = models.CharField(max_length=4, choices=PRICE_MARKETS)
+    city = models.CharField(max_length=255, blank=True, default="")
+    zone = models.CharField(max_length=255, blank=True, default="")
+    week = models.DateField(help_text="Monday of the ISO week")
+    median_price = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True,
+    )
+    listings = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "zone_price_trend"
+        ordering = ("week",)
+        unique_together = ("org", "market", "city", "zone", "week")
+
+    def __str__(self):
+        return f"{self.city}/{self.zone} {self.week}: {self.median_price}"
+
+
+class PropertyBooking(BaseModel):
+    property = models.ForeignKey(
+        Property, related_name="bookings", on_delete=models.CASCADE,
+    )
+    # Half-open interval: end_date is the check-out day and stays free.
+    start_date = models.DateField()
+    end_date = models.DateField()
+    status = models.CharField(
+        max_length=20, choices=BOOKING_STATUS, default="confirmed",
+    )
+    contact = models.ForeignKey(
+        Contact, related_name="property_bookings",
+        on_delete=models.SET_NULL, null=True, blank=True,
+    )
+    notes = models.TextField(blank=True, default="")
+    org = models.ForeignKey(
+        Org, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="property_bookings",
+    )
+
+    class Meta:
+        db_table = "property_booking"
+        ordering = ("start_date",)
+        verbose_name = "Property Booking"
+        verbose_name_plural = "Property Bookings"
+        indexes = [
+            models.Index(fields=["property", "start_date", "end_date"]),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(end_date__gt=models.F("start_date")),
+                name="property_booking_end_after_start",
+            ),
+            PostgresExclusionConstraint(
+                name="property_booking_no_overlap",
+                expressions=[
+                    (
+                        DateRange("start_date", "end_date", Value("[)")),
+                        RangeOperators.OVERLAPS,
+                    ),
+                    ("property", RangeOperators.EQUAL),
+                ],
+                condition=~Q(status="cancelled"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id}: {self.start_date} - {self.end_date}"
+
+
+class PropertyViewing(BaseModel):
+    property = models.ForeignKey(
+        Property, related_name="viewings", on_delete=models.CASCADE,
+    )
+    lead = models.ForeignKey(
+        "leads.Lead", related_name="property_viewings",
+        on_delete=models.SET_NULL, null=True, blank=True,
+    )
+    contact = models.ForeignKey(
+        Contact, related_name="property_viewings",
+        on_delete=models.SET_NULL, null=True, blank=True,
+    )
+    agent = models.ForeignKey(
+        Profile, related_name="property_viewings", on_delete=models.CASCADE,
+    )
+    # Half-open interval, so back-to-back viewings do not collide.
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    status = models.CharField(
+        max_length=20, choices=VIEWING_STATUS, default="scheduled",
+    )
+    notes = models.TextField(blank=True, default="")
+    org = models.ForeignKey(
+        Org, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="property_viewings",
+    )
+
+    class Meta:
+        db_table = "property_viewing"
+        ordering = ("starts_at",)
+        verbose_name = "Property Viewing"
+        verbose_name_plural = "Property Viewings"
+        indexes = [
+            models.Index(fields=["agent", "starts_at", "ends_at"]),
+            models.Index(fields=["property", "starts_at"]),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(ends_at__gt=models.F("starts_at")),
+                name="property_viewing_end_after_start",
+            ),
+            PostgresExclusionConstraint(
+                name="property_viewing_agent_no_overlap",
+                expressions=[
+                    (
+                        TsTzRange("starts_at", "ends_at", Value("[)")),
+                        RangeOperators.OVERLAPS,
+                    ),
+                    ("agent", RangeOperators.EQUAL),
+                ],
+                condition=~Q(status="cancelled"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id}: {self.starts_at} - {self.ends_at}"
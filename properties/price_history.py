@@ -0,0 +1,225 @@
+"""Property price-change log and incremental zone price trends.
+
+Each zone keeps its current asking prices as a histogram of log-scale
+buckets. A price change moves one listing between two buckets and
+re-derives the median of the current ISO week from the histogram, so
+weekly trends never rescan the change log or the property table.
+
+Only listed properties count: active ones in ``LISTED_STATUSES``. A
+property sold, rented, withdrawn or deactivated leaves its histograms
+and one listed again returns to them, like a price change would.
+
+Histograms only follow saves, so they start from a recount of the
+catalogue: a data migration counted the listings that predate them, and
+the ``rebuild_zone_price_histograms`` command (``rebuild_zone_histograms``)
+recounts them should the counts ever drift.
+"""
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Property, PropertyPriceChange, ZonePriceHistogram, ZonePriceTrend
+
+PRICE_FIELDS = {
+    "sale": "sale_price",
+    "rent": "rent_price",
+}
+LISTED_STATUSES = ("available", "reserved")
+# Bucket width of 1%: medians are exact to within half a percent.
+BUCKET_BASE = math.log(1.01)
+
+
+def price_bucket(price):
+    return str(round(math.log(float(price)) / BUCKET_BASE))
+
+
+def bucket_price(bucket):
+    return Decimal(math.exp(int(bucket) * BUCKET_BASE)).quantize(Decimal("0.01"))
+
+
+def histogram_median(buckets):
+    total = sum(buckets.values())
+    if not total:
+        return None, 0
+    seen = 0
+    for bucket in sorted(buckets, key=int):
+        seen += buckets[bucket]
+        if seen * 2 >= total:
+            return bucket_price(bucket), total
+    return None, total
+
+
+def week_start(moment):
+    day = timezone.localdate(moment)
+    return day - timedelta(days=day.weekday())
+
+
+def price_snapshot(property_obj):
+    """Capture the fields that price tracking compares after an update."""
+    snapshot = {field: getattr(property_obj, field) for field in PRICE_FIELDS.values()}
+    snapshot["zone"] = property_obj.zone
+    snapshot["city"] = property_obj.address.city if property_obj.address else ""
+    snapshot["listed"] = is_listed(property_obj)
+    return snapshot
+
+
+def is_listed(property_obj):
+    return property_obj.is_active and property_obj.status in LISTED_STATUSES
+
+
+def _zone_location(snapshot):
+    return (
+        (snapshot.get("city") or "").strip().lower(),
+        (snapshot.get("zone") or "").strip().lower(),
+    )
+
+
+def _move_in_histogram(org_id, market, location, old_price, new_price, moment):
+    city, zone = location
+    histogram, _ = ZonePriceHistogram.objects.select_for_update().get_or_create(
+        org_id=org_id, market=market, city=city, zone=zone,
+    )
+    buckets = histogram.buckets
+    if old_price:
+        bucket = price_bucket(old_price)
+        if buckets.get(bucket, 0) > 1:
+            buckets[bucket] -= 1
+        else:
+            buckets.pop(bucket, None)
+    if new_price:
+        bucket = price_bucket(new_price)
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+    histogram.save(update_fields=["buckets"])
+
+    median, listings = histogram_median(buckets)
+    ZonePriceTrend.objects.update_or_create(
+        org_id=org_id,
+        market=market,
+        city=city,
+        zone=zone,
+        week=week_start(moment),
+        defaults={"median_price": median, "listings": listings},
+    )
+
+
+def record_price_changes(property_obj, before=None, changed_by=None):
+    """Log price changes of ``property_obj`` against the ``before`` snapshot.
+
+    ``before`` is the ``price_snapshot`` taken prior to the update, or
+    ``None`` for a newly created property. Nothing is written when no price
+    changed and the property stayed listed in the same zone.
+    """
+    before = before or {}
+    after = price_snapshot(property_obj)
+    old_location = _zone_location(before) if before else None
+    new_location = _zone_location(after)
+    moment = timezone.now()
+
+    changes = []
+    with transaction.atomic():
+        for market, field in PRICE_FIELDS.items():
+            old_price = before.get(field)
+            new_price = after[field]
+            if old_price != new_price:
+                changes.append(
+                    PropertyPriceChange(
+                        property=property_obj,
+                        market=market,
+                        old_price=old_price,
+                        new_price=new_price,
+                        changed_at=moment,
+                        changed_by=changed_by,
+                    )
+                )
+            # Prices of unlisted properties are in no histogram.
+            old_price = old_price if before.get("listed") else None
+            new_price = new_price if after["listed"] else None
+            if old_location is not None and old_location != new_location:
+                if old_price:
+                    _move_in_histogram(
+                        property_obj.org_id, market, old_location, old_price, None, moment,
+                    )
+                old_price = None
+            if (old_price or None) != (new_price or None):
+                _move_in_histogram(
+                    property_obj.org_id, market, new_location, old_price, new_price, moment,
+                )
+        PropertyPriceChange.objects.bulk_create(changes)
+    return changes
+
+
+def record_property_removal(property_obj):
+    """Take a deleted property's prices out of its zone histograms."""
+    snapshot = price_snapshot(property_obj)
+    if not snapshot["listed"]:
+        return
+    moment = timezone.now()
+    with transaction.atomic():
+        for market, field in PRICE_FIELDS.items():
+            if snapshot[field]:
+                _move_in_histogram(
+                    property_obj.org_id,
+                    market,
+                    _zone_location(snapshot),
+                    snapshot[field],
+                    None,
+                    moment,
+                )
+
+
+def zone_buckets(rows):
+    """Count property ``rows`` into ``{(org_id, market, city, zone): buckets}``.
+
+    Each row holds ``org_id``, the ``PRICE_FIELDS``, ``zone`` and
+    ``address__city``.
+    """
+    histograms = {}
+    for row in rows:
+        location = _zone_location({"city": row["address__city"], "zone": row["zone"]})
+        for market, field in PRICE_FIELDS.items():
+            if row[field]:
+                buckets = histograms.setdefault((row["org_id"], market, *location), {})
+                bucket = price_bucket(row[field])
+                buckets[bucket] = buckets.get(bucket, 0) + 1
+    return histograms
+
+
+def rebuild_zone_histograms(org_id=None):
+    """Recount the zone histograms of one org, or of all of them, from the
+    listed properties, and refresh the current week of their trends."""
+    properties = Property.objects.filter(
+        org__isnull=False, is_active=True, status__in=LISTED_STATUSES
+    )
+    histograms = ZonePriceHistogram.objects.all()
+    if org_id:
+        properties = properties.filter(org_id=org_id)
+        histograms = histograms.filter(org_id=org_id)
+    rows = properties.values("org_id", *PRICE_FIELDS.values(), "zone", "address__city")
+    counted = zone_buckets(rows.iterator(chunk_size=2000))
+    week = week_start(timezone.now())
+    with transaction.atomic():
+        # Zones left without listings drop to none in this week's trend.
+        for key in histograms.values_list("org_id", "market", "city", "zone"):
+            counted.setdefault(key, {})
+        histograms.delete()
+        ZonePriceHistogram.objects.bulk_create(
+            ZonePriceHistogram(
+                org_id=org, market=market, city=city, zone=zone, buckets=buckets
+            )
+            for (org, market, city, zone), buckets in counted.items()
+            if buckets
+        )
+        for (org, market, city, zone), buckets in counted.items():
+            median, listings = histogram_median(buckets)
+            ZonePriceTrend.objects.update_or_create(
+                org_id=org,
+                market=market,
+                city=city,
+                zone=zone,
+                week=week,
+                defaults={"median_price": median, "listings": listings},
+            )
+    return sum(1 for buckets in counted.values() if buckets)
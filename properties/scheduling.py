@@ -0,0 +1,160 @@
+"""Viewing scheduler: agent busy intervals and free-slot suggestions.
+
+An agent is busy during their viewings and during the events they are
+assigned to. Both are fetched for a whole set of agents and a whole
+window in one query each, through the ``(agent, starts_at, ends_at)``
+viewing index and the ``(start_date, end_date)`` event index, with
+recurring events expanded to their occurrences in the window. Intervals
+are half-open ``[start, end)``, so back-to-back appointments are allowed.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from common.models import Profile
+from events.models import Event
+from events.recurrence import event_interval, expand_occurrences
+
+from .models import PropertyViewing
+
+SLOT_ALIGNMENT = timedelta(minutes=15)
+
+
+def busy_intervals(agent_ids, window_start, window_end, exclude_viewing_id=None):
+    """Return ``{agent_id: [(start, end, kind, id), ...]}`` sorted by start."""
+    busy = defaultdict(list)
+    viewings = PropertyViewing.objects.filter(
+        agent_id__in=agent_ids,
+        starts_at__lt=window_end,
+        ends_at__gt=window_start,
+    ).exclude(status="cancelled")
+    if exclude_viewing_id:
+        viewings = viewings.exclude(id=exclude_viewing_id)
+    for viewing_id, agent_id, start, end in viewings.values_list(
+        "id", "agent_id", "starts_at", "ends_at",
+    ):
+        busy[agent_id].append((start, end, "viewing", viewing_id))
+
+    # Events store local dates and times; the date index narrows the
+    # candidates and the exact overlap is checked once times are combined.
+    first_day = timezone.localtime(window_start).date()
+    last_day = timezone.localtime(window_end).date()
+    assignments = (
+        Event.assigned_to.through.objects.filter(
+            profile_id__in=agent_ids,
+            event__is_active=True,
+            event__start_date__lte=last_day,
+            event__end_date__gte=first_day,
+        )
+        .exclude(event__status="Canceled")
+        .select_related("event")
+    )
+    agents_by_event = defaultdict(list)
+    events = {}
+    for assignment in assignments:
+        agents_by_event[assignment.event_id].append(assignment.profile_id)
+        events[assignment.event_id] = assignment.event
+    # Recurring series are expanded to their occurrences in the window.
+    for occurrence in expand_occurrences(events.values(), first_day, last_day):
+        if occurrence.status == "Canceled":
+            continue
+        start, end = event_interval(
+            occurrence.start_date,
+            occurrence.start_time,
+            occurrence.end_date,
+            occurrence.end_time,
+        )
+        if start < window_end and end > window_start:
+            for agent_id in agents_by_event[occurrence.event.id]:
+                busy[agent_id].append((start, end, "event", occurrence.event.id))
+
+    for intervals in busy.values():
+        intervals.sort(key=lambda interval: interval[:2])
+    return busy
+
+
+def agent_conflicts(agent_id, starts_at, ends_at, exclude_viewing_id=None):
+    return busy_intervals(
+        [agent_id], starts_at, ends_at, exclude_viewing_id=exclude_viewing_id,
+    ).get(agent_id, [])
+
+
+def _align(moment):
+    offset = (moment - moment.replace(minute=0, second=0, microsecond=0)) % SLOT_ALIGNMENT
+    return moment + (SLOT_ALIGNMENT - offset) if offset else moment
+
+
+def free_slots(intervals, windows, duration):
+    """Gaps of at least ``duration`` inside ``windows`` not covered by ``intervals``.
+
+    ``intervals`` must be sorted by start and ``windows`` sorted and
+    disjoint; both are walked once.
+    """
+    slots = []
+    position = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        while position < len(intervals) and intervals[position][1] <= window_start:
+            position += 1
+        index = position
+        while index < len(intervals) and intervals[index][0] < window_end:
+            start, end = intervals[index][:2]
+            gap_start = _align(cursor)
+            if start - gap_start >= duration:
+                slots.append((gap_start, start))
+            cursor = max(cursor, end)
+            index += 1
+        gap_start = _align(cursor)
+        if window_end - gap_start >= duration:
+            slots.append((gap_start, window_end))
+    return slots
+
+
+def working_windows(first_day, days, start_hour, end_hour):
+    tz = timezone.get_current_timezone()
+    return [
+        (
+            timezone.make_aware(datetime.combine(day, time(start_hour)), tz),
+            timezone.make_aware(datetime.combine(day, time(end_hour)), tz),
+        )
+        for day in (first_day + timedelta(days=offset) for offset in range(days))
+    ]
+
+
+def suggest_free_slots(agent_ids, windows, duration):
+    """Free slots of every agent, loading all busy intervals in one pass."""
+    busy = busy_intervals(agent_ids, windows[0][0], windows[-1][1])
+    return {
+        agent_id: free_slots(busy.get(agent_id, []), windows, duration)
+        for agent_id in agent_ids
+    }
+
+
+def save_viewing(serializer, **extra):
+    """Save a validated viewing unless the agent is busy at that time.
+
+    Returns ``(viewing, conflicts)``; ``viewing`` is ``None`` on conflict.
+    """
+    data = serializer.validated_data
+    instance = serializer.instance
+    agent = data.get("agent") or instance.agent
+    starts_at = data.get("starts_at") or instance.starts_at
+    ends_at = data.get("ends_at") or instance.ends_at
+    exclude_id = instance.id if instance else None
+    with transaction.atomic():
+        # Serialize scheduling for the same agent on backends without the
+        # exclusion constraint.
+        Profile.objects.select_for_update().filter(pk=agent.pk).first()
+        if data.get("status", "scheduled") != "cancelled":
+            conflicts = agent_conflicts(agent.pk, starts_at, ends_at, exclude_id)
+            if conflicts:
+                return None, conflicts
+        try:
+            with transaction.atomic():
+                viewing = serializer.save(**extra)
+        except IntegrityError:
+            # Lost a race against a concurrent viewing on PostgreSQL.
+            return None, agent_conflicts(agent.pk, starts_at, ends_at, exclude_id)
+    return viewing, []
@@ -8,14 +8,19 @@ from common.serializer import (
 from contacts.serializer import ContactSerializer
 from teams.serializer import TeamsSerializer
 
+from .constants import ENERGY_RATINGS, OPERATION_TYPES, PROPERTY_TYPES
 from .models import (
     Property,
+    PropertyBooking,
     PropertyDocument,
     PropertyFeature,
     PropertyFeatureCategory,
     PropertyFloorPlan,
     PropertyImage,
+    PropertyPriceChange,
     PropertyVideo,
+    PropertyViewing,
+    ZonePriceTrend,
 )
 
 
@@ -172,3 +177,127 @@ class PropertyCreateSwaggerSerializer(serializers.ModelSerializer):
 class PropertyCommentSwaggerSerializer(serializers.Serializer):
     comment = serializers.CharField()
     property_attachment = serializers.FileField(required=False)
+
+
+class PropertyValuationRequestSerializer(serializers.Serializer):
+    operation = serializers.ChoiceField(choices=OPERATION_TYPES, default="sale")
+    property_type = serializers.ChoiceField(choices=PROPERTY_TYPES)
+    built_area = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=1,
+    )
+    bedrooms = serializers.IntegerField(min_value=0, default=0)
+    energy_rating = serializers.ChoiceField(
+        choices=ENERGY_RATINGS, required=False, allow_blank=True, default="",
+    )
+    city = serializers.CharField(required=False, allow_blank=True, default="")
+    zone = serializers.CharField(required=False, allow_blank=True, default="")
+    k = serializers.IntegerField(min_value=1, max_value=50, default=5)
+
+
+class PropertyPriceChangeSerializer(serializers.ModelSerializer):
+    changed_by = serializers.SerializerMethodField()
+
+    def get_changed_by(self, obj):
+        if obj.changed_by:
+            return obj.changed_by.user.email
+        return None
+
+    class Meta:
+        model = PropertyPriceChange
+        fields = ("id", "market", "old_price", "new_price", "changed_at", "changed_by")
+
+
+class ZonePriceTrendSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ZonePriceTrend
+        fields = ("city", "zone", "week", "median_price", "listings")
+
+
+class PropertyBookingSerializer(serializers.ModelSerializer):
+    def __init__(self, *args, **kwargs):
+        request_obj = kwargs.pop("request_obj", None)
+        super().__init__(*args, **kwargs)
+        if request_obj and hasattr(request_obj, "profile") and request_obj.profile:
+            self.org = request_obj.profile.org
+        else:
+            self.org = None
+
+    def validate_contact(self, value):
+        if value and value.org_id != getattr(self.org, "id", None):
+            raise serializers.ValidationError("Contact not found.")
+        return value
+
+    def validate(self, data):
+        if data["end_date"] <= data["start_date"]:
+            raise serializers.ValidationError(
+                {"end_date": "End date must be after start date."}
+            )
+        return data
+
+    class Meta:
+        model = PropertyBooking
+        fields = (
+            "id", "start_date", "end_date", "status",
+            "contact", "notes", "created_at",
+        )
+
+
+class PropertyViewingSerializer(serializers.ModelSerializer):
+    def __init__(self, *args, **kwargs):
+        request_obj = kwargs.pop("request_obj", None)
+        super().__init__(*args, **kwargs)
+        if request_obj and hasattr(request_obj, "profile") and request_obj.profile:
+            self.org = request_obj.profile.org
+        else:
+            self.org = None
+
+    def _validate_org(self, value, label):
+        if value and value.org_id != getattr(self.org, "id", None):
+            raise serializers.ValidationError(f"{label} not found.")
+        return value
+
+    def validate_property(self, value):
+        return self._validate_org(value, "Property")
+
+    def validate_lead(self, value):
+        return self._validate_org(value, "Lead")
+
+    def validate_contact(self, value):
+        return self._validate_org(value, "Contact")
+
+    def validate_agent(self, value):
+        if not value.is_active:
+            raise serializers.ValidationError("Agent is not active.")
+        return self._validate_org(value, "Agent")
+
+    def validate(self, data):
+        starts_at = data.get("starts_at", getattr(self.instance, "starts_at", None))
+        ends_at = data.get("ends_at", getattr(self.instance, "ends_at", None))
+        if starts_at and ends_at and ends_at <= starts_at:
+            raise serializers.ValidationError(
+                {"ends_at": "End must be after start."}
+            )
+        return data
+
+    class Meta:
+        model = PropertyViewing
+        fields = (
+            "id", "property", "lead", "contact", "agent", "starts_at",
+            "ends_at", "status", "notes", "created_at",
+        )
+
+
+class ViewingFreeSlotsRequestSerializer(serializers.Serializer):
+    agents = serializers.ListField(child=serializers.UUIDField(), min_length=1, max_length=50)
+    date = serializers.DateField()
+    days = serializers.IntegerField(min_value=1, max_value=14, default=1)
+    duration = serializers.IntegerField(min_value=15, max_value=480, default=60)
+    start_hour = serializers.IntegerField(min_value=0, max_value=23, default=9)
+    end_hour = serializers.IntegerField(min_value=1, max_value=23, default=20)
+
+    def validate(self, data):
+        if data["end_hour"] <= data["start_hour"]:
+            raise serializers.ValidationError(
+                {"end_hour": "End hour must be after start hour."}
+            )
+        return data
@@ -0,0 +1,363 @@
+"""Per-org "similar properties" index.
+
+Each org keeps the normalized feature vector of every active property in
+the cache, spread over ``SIMILARITY_SHARDS`` keys, and each property its
+own top-k neighbour list, filled lazily. A detail page reads the list of
+the property being viewed and nothing else.
+
+A neighbour list is stored with its radius: every property closer than
+it is in the list (``math.inf`` when the list holds all of them). The
+radii are kept with the vectors too, so when a property changes
+(``upsert_property`` / ``remove_property``) its new and old distances
+tell which lists it enters or leaves, and only those lists and the
+shards holding their radii are rewritten.
+
+Everything is written under a lock on the org row, by the Celery tasks
+and by the requests filling a missing list, so lists and radii always
+agree. A full rebuild starts a new build id and lists of an older build
+are ignored.
+"""
+import heapq
+import math
+import uuid
+import zlib
+from bisect import insort
+
+from django.core.cache import cache
+from django.db import transaction
+
+from common.models import Org
+
+from .constants import PROPERTY_TYPES
+from .models import Property
+
+SIMILARITY_CACHE_KEY = "property_similarity:{org_id}"
+SIMILARITY_SHARD_KEY = "property_similarity:{org_id}:vectors:{shard}"
+SIMILARITY_NEIGHBOURS_KEY = "property_similarity:{org_id}:neighbours:{property_id}"
+SIMILARITY_CACHE_TIMEOUT = 60 * 60 * 26
+SIMILARITY_SHARDS = 64
+SIMILAR_ACTIVE_STATUSES = ("available", "reserved")
+# Neighbour lists keep more entries than the default page size so that
+# removals can be absorbed without recomputing the list.
+MAX_NEIGHBOURS = 20
+
+PROPERTY_TYPE_CODES = {key: code for code, (key, _) in enumerate(PROPERTY_TYPES)}
+
+TYPE_WEIGHT = 1.0
+PRICE_WEIGHT = 2.0
+AREA_WEIGHT = 2.0
+BEDROOM_WEIGHT = 0.3
+BATHROOM_WEIGHT = 0.2
+FEATURE_WEIGHT = 1.0
+LOCATION_WEIGHT = 0.2
+# Distances beyond this many km all count as "far away".
+MAX_LOCATION_KM = 15.0
+ZONE_MISMATCH_PENALTY = 1.5
+CITY_MISMATCH_PENALTY = 3.0
+
+VECTOR_FIELDS = (
+    "id",
+    "operation",
+    "property_type",
+    "sale_price",
+    "rent_price",
+    "built_area",
+    "bedrooms",
+    "bathrooms",
+    "latitude",
+    "longitude",
+    "zone",
+    "address__city",
+)
+
+
+def _log(value):
+    return math.log(float(value)) if value and value > 0 else None
+
+
+def make_vector(row, feature_ids, feature_bits):
+    """Build the feature vector tuple for one ``VECTOR_FIELDS`` row."""
+    price = row["rent_price"] if row["operation"] == "rent" else row["sale_price"]
+    mask = 0
+    for feature_id in feature_ids:
+        bit = feature_bits.setdefault(str(feature_id), len(feature_bits))
+        mask |= 1 << bit
+    latitude = row["latitude"]
+    longitude = row["longitude"]
+    return (
+        row["operation"],
+        PROPERTY_TYPE_CODES.get(row["property_type"], -1),
+        _log(price),
+        _log(row["built_area"]),
+        row["bedrooms"],
+        row["bathrooms"],
+        mask,
+        float(latitude) if latitude is not None else None,
+        float(longitude) if longitude is not None else None,
+        (row["address__city"] or "").strip().lower(),
+        (row["zone"] or "").strip().lower(),
+    )
+
+
+def _value_distance(a, b, weight):
+    if a is None or b is None:
+        return weight
+    return weight * abs(a - b)
+
+
+def vector_distance(a, b):
+    """Weighted distance between two vectors of the same operation."""
+    distance = 0.0 if a[1] == b[1] else TYPE_WEIGHT
+    distance += _value_distance(a[2], b[2], PRICE_WEIGHT)
+    distance += _value_distance(a[3], b[3], AREA_WEIGHT)
+    distance += BEDROOM_WEIGHT * abs(a[4] - b[4])
+    distance += BATHROOM_WEIGHT * abs(a[5] - b[5])
+    union = a[6] | b[6]
+    if union:
+        distance += FEATURE_WEIGHT * (1 - (a[6] & b[6]).bit_count() / union.bit_count())
+    if None not in (a[7], a[8], b[7], b[8]):
+        # Equirectangular approximation, plenty for intra-city distances.
+        x = math.radians(b[8] - a[8]) * math.cos(math.radians((a[7] + b[7]) / 2))
+        y = math.radians(b[7] - a[7])
+        km = 6371.0 * math.hypot(x, y)
+        distance += LOCATION_WEIGHT * min(km, MAX_LOCATION_KM)
+    elif a[9] != b[9]:
+        distance += CITY_MISMATCH_PENALTY
+    elif a[10] != b[10]:
+        distance += ZONE_MISMATCH_PENALTY
+    return distance
+
+
+def _active_properties(org_id):
+    return Property.objects.filter(
+        org_id=org_id, is_active=True, status__in=SIMILAR_ACTIVE_STATUSES,
+    )
+
+
+def _feature_map(queryset):
+    features = {}
+    for property_id, feature_id in queryset.filter(
+        features__isnull=False
+    ).values_list("id", "features"):
+        features.setdefault(property_id, []).append(feature_id)
+    return features
+
+
+def _neighbours_key(org_id, property_id):
+    return SIMILARITY_NEIGHBOURS_KEY.format(org_id=org_id, property_id=property_id)
+
+
+def _shard_key(org_id, shard):
+    return SIMILARITY_SHARD_KEY.format(org_id=org_id, shard=shard)
+
+
+def _shard_of(property_id):
+    return zlib.crc32(property_id.encode()) % SIMILARITY_SHARDS
+
+
+def _entries(index):
+    """``(property_id, vector, radius)`` of every property in ``index``."""
+    for shard in index["shards"]:
+        for property_id, (vector, radius) in shard.items():
+            yield property_id, vector, radius
+
+
+def _lock_index(org_id):
+    """Serialize the writers of an org's index; call inside a transaction."""
+    Org.objects.select_for_update().filter(id=org_id).first()
+
+
+def _load_index(org_id):
+    """The cached index, or None when any part of it is missing."""
+    meta_key = SIMILARITY_CACHE_KEY.format(org_id=org_id)
+    shard_keys = [_shard_key(org_id, shard) for shard in range(SIMILARITY_SHARDS)]
+    cached = cache.get_many([meta_key, *shard_keys])
+    if len(cached) <= len(shard_keys):
+        return None
+    return dict(cached[meta_key], shards=[cached[key] for key in shard_keys])
+
+
+def _save_shards(org_id, index, shards):
+    cache.set_many(
+        {_shard_key(org_id, shard): index["shards"][shard] for shard in shards},
+        SIMILARITY_CACHE_TIMEOUT,
+    )
+
+
+def _save_meta(org_id, index):
+    cache.set(
+        SIMILARITY_CACHE_KEY.format(org_id=org_id),
+        {"build": index["build"], "feature_bits": index["feature_bits"]},
+        SIMILARITY_CACHE_TIMEOUT,
+    )
+
+
+def build_similarity_index(org_id):
+    """Load every active property's vector; neighbour lists fill lazily."""
+    with transaction.atomic():
+        _lock_index(org_id)
+        return _build_index(org_id)
+
+
+def _build_index(org_id):
+    queryset = _active_properties(org_id)
+    features = _feature_map(queryset)
+    index = {
+        "build": uuid.uuid4().hex,
+        "feature_bits": {},
+        "shards": [{} for _ in range(SIMILARITY_SHARDS)],
+    }
+    for row in queryset.values(*VECTOR_FIELDS).iterator(chunk_size=2000):
+        property_id = str(row["id"])
+        vector = make_vector(
+            row, features.get(row["id"], ()), index["feature_bits"],
+        )
+        index["shards"][_shard_of(property_id)][property_id] = (vector, None)
+    _save_shards(org_id, index, range(SIMILARITY_SHARDS))
+    # Saved last: until then readers keep to the lists of the previous build.
+    _save_meta(org_id, index)
+    return index
+
+
+def _locked_index(org_id):
+    _lock_index(org_id)
+    return _load_index(org_id) or _build_index(org_id)
+
+
+def get_similarity_index(org_id):
+    index = _load_index(org_id)
+    if index is None:
+        index = build_similarity_index(org_id)
+    return index
+
+
+def _neighbours_for(index, property_id):
+    """``(radius, neighbours)`` of a property, from every vector in ``index``."""
+    vector = index["shards"][_shard_of(property_id)][property_id][0]
+    candidates = (
+        (vector_distance(vector, other), other_id)
+        for other_id, other, _ in _entries(index)
+        if other_id != property_id and other[0] == vector[0]
+    )
+    neighbours = heapq.nsmallest(MAX_NEIGHBOURS, candidates)
+    if len(neighbours) < MAX_NEIGHBOURS:
+        return math.inf, neighbours
+    return neighbours[-1][0], neighbours
+
+
+def _usable(entry, build, k):
+    if entry is None or entry[0] != build:
+        return False
+    _, radius, neighbours = entry
+    return len(neighbours) >= k or radius == math.inf
+
+
+def similar_property_ids(org_id, property_id, k=5):
+    """Return ``[(distance, property_id), ...]`` for the ``k`` closest properties."""
+    property_id = str(property_id)
+    meta_key = SIMILARITY_CACHE_KEY.format(org_id=org_id)
+    neighbours_key = _neighbours_key(org_id, property_id)
+    cached = cache.get_many([meta_key, neighbours_key])
+    meta = cached.get(meta_key)
+    if meta and _usable(cached.get(neighbours_key), meta["build"], k):
+        return cached[neighbours_key][2][:k]
+
+    with transaction.atomic():
+        index = _locked_index(org_id)
+        # Another request may have filled it while this one waited.
+        entry = cache.get(neighbours_key)
+        if _usable(entry, index["build"], k):
+            return entry[2][:k]
+        shard = _shard_of(property_id)
+        if property_id not in index["shards"][shard]:
+            return []
+        radius, neighbours = _neighbours_for(index, property_id)
+        vector, _ = index["shards"][shard][property_id]
+        index["shards"][shard][property_id] = (vector, radius)
+        cache.set(
+            neighbours_key,
+            (index["build"], radius, neighbours),
+            SIMILARITY_CACHE_TIMEOUT,
+        )
+        _save_shards(org_id, index, [shard])
+    return neighbours[:k]
+
+
+def _update_property(org_id, property_id, removed=False):
+    """Reload the vector of ``property_id`` from the database (or drop it)
+    and patch the neighbour lists it enters or leaves."""
+    with transaction.atomic():
+        _lock_index(org_id)
+        index = _load_index(org_id)
+        if index is None:
+            # Built from the database, so it already holds this change.
+            _build_index(org_id)
+            return
+        shard = _shard_of(property_id)
+        old = index["shards"][shard].pop(property_id, (None, None))[0]
+        new = None
+        feature_count = len(index["feature_bits"])
+        queryset = _active_properties(org_id).filter(id=property_id)
+        row = None if removed else queryset.values(*VECTOR_FIELDS).first()
+        if row is not None:
+            new = make_vector(
+                row, _feature_map(queryset).get(row["id"], ()), index["feature_bits"],
+            )
+            # Its own list is refilled by the next read.
+            index["shards"][shard][property_id] = (new, None)
+
+        # owner -> its distance to the new vector, or None once out of its list
+        affected = {}
+        for owner_id, vector, radius in _entries(index):
+            if owner_id == property_id or radius is None:
+                continue
+            distance = None
+            if new is not None and vector[0] == new[0]:
+                distance = vector_distance(vector, new)
+                if distance >= radius:
+                    distance = None
+            was_in = (
+                old is not None
+                and vector[0] == old[0]
+                and vector_distance(vector, old) <= radius
+            )
+            if was_in or distance is not None:
+                affected[owner_id] = distance
+
+        keys = {_neighbours_key(org_id, owner_id): owner_id for owner_id in affected}
+        lists = cache.get_many(keys)
+        changed_lists = {}
+        changed_shards = {shard}
+        for key, owner_id in keys.items():
+            owner_shard = _shard_of(owner_id)
+            vector, radius = index["shards"][owner_shard][owner_id]
+            entry = lists.get(key)
+            if entry is None or entry[0] != index["build"]:
+                # Expired: forget its radius, the next read recomputes it.
+                index["shards"][owner_shard][owner_id] = (vector, None)
+                changed_shards.add(owner_shard)
+                continue
+            neighbours = [item for item in entry[2] if item[1] != property_id]
+            if affected[owner_id] is not None:
+                insort(neighbours, (affected[owner_id], property_id))
+                if len(neighbours) > MAX_NEIGHBOURS:
+                    radius = min(radius, neighbours[MAX_NEIGHBOURS][0])
+                    del neighbours[MAX_NEIGHBOURS:]
+                    index["shards"][owner_shard][owner_id] = (vector, radius)
+                    changed_shards.add(owner_shard)
+            changed_lists[key] = (index["build"], radius, neighbours)
+
+        cache.set_many(changed_lists, SIMILARITY_CACHE_TIMEOUT)
+        cache.delete(_neighbours_key(org_id, property_id))
+        _save_shards(org_id, index, sorted(changed_shards))
+        if len(index["feature_bits"]) != feature_count:
+            _save_meta(org_id, index)
+
+
+def upsert_property(org_id, property_id):
+    """Refresh one property's vector and patch the neighbour lists it affects."""
+    _update_property(org_id, str(property_id))
+
+
+def remove_property(org_id, property_id):
+    _update_property(org_id, str(property_id), removed=True)
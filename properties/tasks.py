@@ -0,0 +1,38 @@
+from celery import Celery
+
+from common.models import Org
+from properties import similarity
+from properties.valuation import refresh_org_valuation
+
+app = Celery("redis://")
+
+
+@app.task
+def refresh_valuation_stats(org_id=None):
+    """Rebuild the cached valuation statistics, for one org or all of them"""
+    orgs = Org.objects.filter(is_active=True)
+    if org_id:
+        orgs = orgs.filter(id=org_id)
+    for org_id in orgs.values_list("id", flat=True):
+        refresh_org_valuation(org_id)
+
+
+@app.task
+def rebuild_similarity_index(org_id=None):
+    """Rebuild the similar-properties index, for one org or all of them"""
+    orgs = Org.objects.filter(is_active=True)
+    if org_id:
+        orgs = orgs.filter(id=org_id)
+    for org_id in orgs.values_list("id", flat=True):
+        similarity.build_similarity_index(org_id)
+
+
+@app.task
+def update_similarity_index(org_id, property_id):
+    """Refresh one property in the similar-properties index after a change"""
+    similarity.upsert_property(org_id, property_id)
+
+
+@app.task
+def remove_from_similarity_index(org_id, property_id):
+    similarity.remove_property(org_id, property_id)
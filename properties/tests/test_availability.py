@@ -0,0 +1,79 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.models import Org, Profile, User
+from properties.availability import booking_conflicts, filter_available
+from properties.models import Property, PropertyBooking
+from properties.views import PropertyBookingListView, PropertyListView
+
+
+class AvailabilityTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="rentals org")
+        self.booked = self.create_property("RENT-1")
+        self.free = self.create_property("RENT-2")
+        self.later = self.create_property("RENT-3", available_from=date(2026, 9, 1))
+        PropertyBooking.objects.create(
+            property=self.booked,
+            start_date=date(2026, 7, 1),
+            end_date=date(2026, 7, 15),
+            org=self.org,
+        )
+        PropertyBooking.objects.create(
+            property=self.free,
+            start_date=date(2026, 7, 1),
+            end_date=date(2026, 7, 15),
+            status="cancelled",
+            org=self.org,
+        )
+
+    def create_property(self, reference, available_from=None):
+        return Property.objects.create(
+            reference=reference,
+            title=reference,
+            property_type="flat",
+            operation="rent",
+            rent_price=Decimal("900"),
+            available_from=available_from,
+            org=self.org,
+        )
+
+    def test_half_open_intervals(self):
+        self.assertTrue(
+            booking_conflicts(self.booked.id, date(2026, 7, 10), date(2026, 7, 20)).exists()
+        )
+        # Check-in on the previous booking's check-out day is allowed.
+        self.assertFalse(
+            booking_conflicts(self.booked.id, date(2026, 7, 15), date(2026, 7, 20)).exists()
+        )
+        self.assertFalse(
+            booking_conflicts(self.free.id, date(2026, 7, 1), date(2026, 7, 15)).exists()
+        )
+
+    def test_filter_available(self):
+        available = filter_available(
+            Property.objects.filter(org=self.org), date(2026, 7, 5), date(2026, 7, 10),
+        )
+        self.assertEqual(list(available), [self.free])
+
+    def test_impossible_dates_are_refused(self):
+        user = User.objects.create(email="agent@example.com")
+        profile = Profile.objects.create(user=user, org=self.org, role="ADMIN")
+        dates = {
+            "available_start": "2026-02-30",
+            "available_end": "2026-03-02",
+            "start": "2026-02-30",
+            "end": "2026-03-02",
+        }
+        for view, kwargs in (
+            (PropertyListView, {}),
+            (PropertyBookingListView, {"pk": self.booked.id}),
+        ):
+            request = APIRequestFactory().get("/api/properties/", dates)
+            force_authenticate(request, user=user)
+            request.profile = profile
+            response = view.as_view()(request, **kwargs)
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,68 @@
+import io
+from decimal import Decimal
+
+from django.test import TestCase
+from openpyxl import load_workbook
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.export import text_value
+from common.models import Address, Org, Profile, User
+from properties.models import Property
+from properties.views import PropertyExportView
+
+
+class PropertyExportTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="export org")
+        self.user = User.objects.create(email="exporter@example.com")
+        self.profile = Profile.objects.create(user=self.user, org=self.org, role="ADMIN")
+        for number, operation in enumerate(("sale", "rent", "sale")):
+            Property.objects.create(
+                reference=f"EXP-{number}",
+                title=f"Flat {number}",
+                property_type="flat",
+                operation=operation,
+                sale_price=Decimal("250000") if operation == "sale" else None,
+                address=Address.objects.create(city="Valencia"),
+                org=self.org,
+            )
+
+    def export(self, **params):
+        request = APIRequestFactory().get("/api/properties/export/", params)
+        force_authenticate(request, user=self.user)
+        request.profile = self.profile
+        return PropertyExportView.as_view()(request)
+
+    def test_csv_is_streamed_with_list_filters(self):
+        response = self.export(operation="sale")
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "reference", "title"])
+        self.assertEqual(len(lines), 3)
+        self.assertIn("Valencia", lines[1])
+
+    def test_xlsx(self):
+        response = self.export(export_format="xlsx")
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        rows = list(workbook.active.values)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][1], "reference")
+
+    def test_unknown_format(self):
+        self.assertEqual(self.export(export_format="pdf").status_code, 400)
+
+    def test_unsafe_text_is_neutralised(self):
+        Property.objects.filter(reference="EXP-0").update(title="=1+1")
+        Property.objects.filter(reference="EXP-1").update(title="Pasted\x0b title")
+        response = self.export(export_format="xlsx")
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        titles = {row[1]: row[2] for row in list(workbook.active.values)[1:]}
+        self.assertEqual(titles["EXP-0"], "'=1+1")
+        self.assertEqual(titles["EXP-1"], "Pasted title")
+
+    def test_phone_numbers_and_signed_numbers_are_left_alone(self):
+        self.assertEqual(text_value("+34 600 123 456"), "+34 600 123 456")
+        self.assertEqual(text_value("-12,50"), "-12,50")
+        self.assertEqual(text_value("+1+cmd|' /C calc'!A0"), "'+1+cmd|' /C calc'!A0")
+        self.assertEqual(text_value("-2-3"), "'-2-3")
+        self.assertEqual(text_value("@SUM(A1)"), "'@SUM(A1)")
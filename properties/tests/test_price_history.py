@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from common.models import Address, Org
+from properties.models import (
+    Property,
+    PropertyPriceChange,
+    ZonePriceHistogram,
+    ZonePriceTrend,
+)
+from properties.price_history import (
+    histogram_median,
+    price_bucket,
+    price_snapshot,
+    rebuild_zone_histograms,
+    record_price_changes,
+)
+
+
+class HistogramMedianTest(SimpleTestCase):
+    def test_median_of_buckets(self):
+        buckets = {}
+        for price in (100000, 200000, 300000):
+            bucket = price_bucket(price)
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+        median, listings = histogram_median(buckets)
+        self.assertEqual(listings, 3)
+        self.assertAlmostEqual(float(median), 200000, delta=1000)
+        self.assertEqual(histogram_median({}), (None, 0))
+
+
+class PriceHistoryTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="history org")
+        self.property = Property.objects.create(
+            reference="HIST-1",
+            title="Flat",
+            property_type="flat",
+            operation="sale",
+            sale_price=Decimal("250000.00"),
+            zone="Centro",
+            address=Address.objects.create(city="Valencia"),
+            org=self.org,
+        )
+        record_price_changes(self.property)
+
+    def test_only_real_changes_are_logged(self):
+        before = price_snapshot(self.property)
+        self.property.title = "Renamed"
+        self.property.save()
+        record_price_changes(self.property, before=before)
+        self.assertEqual(PropertyPriceChange.objects.count(), 1)
+
+        before = price_snapshot(self.property)
+        self.property.sale_price = Decimal("240000")
+        self.property.save()
+        record_price_changes(self.property, before=before)
+        change = PropertyPriceChange.objects.latest("id")
+        self.assertEqual(change.old_price, Decimal("250000.00"))
+        self.assertEqual(change.new_price, Decimal("240000"))
+
+    def test_trend_follows_current_prices(self):
+        trend = ZonePriceTrend.objects.get(org=self.org, market="sale")
+        self.assertEqual((trend.city, trend.zone, trend.listings), ("valencia", "centro", 1))
+
+        before = price_snapshot(self.property)
+        self.property.zone = "Ruzafa"
+        self.property.save()
+        record_price_changes(self.property, before=before)
+        trends = {
+            row.zone: row.listings
+            for row in ZonePriceTrend.objects.filter(org=self.org, market="sale")
+        }
+        self.assertEqual(trends, {"centro": 0, "ruzafa": 1})
+        self.assertEqual(PropertyPriceChange.objects.count(), 1)
+
+    def test_only_listed_properties_are_counted(self):
+        before = price_snapshot(self.property)
+        self.property.status = "sold"
+        self.property.save()
+        record_price_changes(self.property, before=before)
+        trend = ZonePriceTrend.objects.get(org=self.org, market="sale")
+        self.assertEqual(trend.listings, 0)
+
+        before = price_snapshot(self.property)
+        self.property.status = "available"
+        self.property.sale_price = Decimal("245000")
+        self.property.save()
+        record_price_changes(self.property, before=before)
+        trend.refresh_from_db()
+        self.assertEqual(trend.listings, 1)
+        self.assertEqual(PropertyPriceChange.objects.count(), 2)
+
+    def test_rebuild_counts_listings_saved_before_tracking(self):
+        Property.objects.create(
+            reference="HIST-2",
+            title="Older flat",
+            property_type="flat",
+            operation="sale",
+            sale_price=Decimal("270000.00"),
+            rent_price=Decimal("900.00"),
+            zone="Centro",
+            address=Address.objects.create(city="Valencia"),
+            org=self.org,
+        )
+        Property.objects.create(
+            reference="HIST-3",
+            title="Withdrawn flat",
+            property_type="flat",
+            operation="sale",
+            sale_price=Decimal("990000.00"),
+            status="withdrawn",
+            zone="Centro",
+            address=Address.objects.create(city="Valencia"),
+            org=self.org,
+        )
+        self.assertEqual(rebuild_zone_histograms(org_id=self.org.id), 2)
+        histogram = ZonePriceHistogram.objects.get(org=self.org, market="sale")
+        self.assertEqual(sum(histogram.buckets.values()), 2)
+        trend = ZonePriceTrend.objects.get(org=self.org, market="sale")
+        self.assertEqual(trend.listings, 2)
+        self.assertEqual(
+            ZonePriceTrend.objects.get(org=self.org, market="rent").listings, 1
+        )
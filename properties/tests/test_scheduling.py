@@ -0,0 +1,80 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from common.models import Org, Profile
+from events.models import Event
+from properties.models import Property, PropertyViewing
+from properties.scheduling import (
+    agent_conflicts,
+    suggest_free_slots,
+    working_windows,
+)
+
+
+def local(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class ViewingSchedulerTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="scheduler org")
+        self.day = date(2026, 11, 2)
+        self.agent = self.create_agent("agent1@example.com")
+        self.other = self.create_agent("agent2@example.com")
+        self.property = Property.objects.create(
+            reference="VIEW-1", title="Flat", property_type="flat",
+            operation="sale", org=self.org,
+        )
+        PropertyViewing.objects.create(
+            property=self.property, agent=self.agent,
+            starts_at=local(self.day, 10), ends_at=local(self.day, 11),
+            org=self.org,
+        )
+        PropertyViewing.objects.create(
+            property=self.property, agent=self.agent,
+            starts_at=local(self.day, 16), ends_at=local(self.day, 17),
+            status="cancelled", org=self.org,
+        )
+        event = Event.objects.create(
+            name="Notary", event_type="Non-Recurring",
+            start_date=self.day, start_time=time(12, 30),
+            end_date=self.day, end_time=time(14, 0), org=self.org,
+        )
+        event.assigned_to.add(self.agent)
+
+    def create_agent(self, email):
+        user = get_user_model().objects.create(email=email)
+        return Profile.objects.create(user=user, org=self.org)
+
+    def test_conflicts_include_events_and_skip_cancelled(self):
+        kinds = [
+            kind for _, _, kind, _ in agent_conflicts(
+                self.agent.id, local(self.day, 10, 30), local(self.day, 13),
+            )
+        ]
+        self.assertEqual(kinds, ["viewing", "event"])
+        # Half-open intervals: starting when the event ends is fine.
+        self.assertEqual(
+            agent_conflicts(self.agent.id, local(self.day, 14), local(self.day, 15)), []
+        )
+        self.assertEqual(
+            agent_conflicts(self.agent.id, local(self.day, 16), local(self.day, 17)), []
+        )
+
+    def test_free_slots_for_several_agents(self):
+        windows = working_windows(self.day, 1, 9, 18)
+        slots = suggest_free_slots(
+            [self.agent.id, self.other.id], windows, timedelta(minutes=60),
+        )
+        self.assertEqual(
+            slots[self.agent.id],
+            [
+                (local(self.day, 9), local(self.day, 10)),
+                (local(self.day, 11), local(self.day, 12, 30)),
+                (local(self.day, 14), local(self.day, 18)),
+            ],
+        )
+        self.assertEqual(slots[self.other.id], [windows[0]])
@@ -0,0 +1,89 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from common.models import Org
+from properties.models import Property
+from properties.similarity import (
+    remove_property,
+    similar_property_ids,
+    upsert_property,
+)
+
+
+class SimilarityIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Org.objects.create(name="similarity org")
+        self.subject = self.create_property("SIM-1", 300000, 90, 3)
+        self.close = self.create_property("SIM-2", 310000, 95, 3)
+        self.far = self.create_property("SIM-3", 900000, 250, 6)
+        self.rent = self.create_property("SIM-4", 1200, 90, 3, operation="rent")
+
+    def create_property(self, reference, price, area, bedrooms, operation="sale"):
+        return Property.objects.create(
+            reference=reference,
+            title=reference,
+            property_type="flat",
+            operation=operation,
+            sale_price=Decimal(price) if operation == "sale" else None,
+            rent_price=Decimal(price) if operation == "rent" else None,
+            built_area=Decimal(area),
+            bedrooms=bedrooms,
+            zone="Centro",
+            org=self.org,
+        )
+
+    def neighbour_ids(self, property_obj, k=5):
+        return [
+            property_id
+            for _, property_id in similar_property_ids(
+                self.org.id, property_obj.id, k=k
+            )
+        ]
+
+    def list_key(self, property_obj):
+        return f"property_similarity:{self.org.id}:neighbours:{property_obj.id}"
+
+    def test_neighbours_are_ranked_within_operation(self):
+        self.assertEqual(
+            self.neighbour_ids(self.subject), [str(self.close.id), str(self.far.id)]
+        )
+
+    def test_upsert_patches_cached_lists(self):
+        self.neighbour_ids(self.subject)
+        self.neighbour_ids(self.rent)
+        closer = self.create_property("SIM-5", 300000, 90, 3)
+        with mock.patch("properties.similarity.cache", wraps=cache) as spy:
+            upsert_property(self.org.id, closer.id)
+        written = {
+            key for call in spy.set_many.call_args_list for key in call.args[0]
+        }
+        # The lists it enters and the shard holding its vector, nothing else.
+        self.assertIn(self.list_key(self.subject), written)
+        self.assertNotIn(self.list_key(self.rent), written)
+        self.assertEqual(len([key for key in written if ":vectors:" in key]), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.neighbour_ids(self.subject)[0], str(closer.id))
+
+    @mock.patch("properties.similarity.MAX_NEIGHBOURS", 1)
+    def test_truncated_lists_are_refilled_when_short(self):
+        self.assertEqual(self.neighbour_ids(self.subject, k=1), [str(self.close.id)])
+        closer = self.create_property("SIM-5", 300000, 90, 3)
+        upsert_property(self.org.id, closer.id)
+        self.assertEqual(self.neighbour_ids(self.subject, k=1), [str(closer.id)])
+        # Only the closest one was kept, so the list is recomputed.
+        remove_property(self.org.id, closer.id)
+        self.assertEqual(cache.get(self.list_key(self.subject))[2], [])
+        self.assertEqual(self.neighbour_ids(self.subject, k=1), [str(self.close.id)])
+
+    def test_remove_and_deactivate(self):
+        self.neighbour_ids(self.subject)
+        remove_property(self.org.id, self.close.id)
+        self.assertEqual(self.neighbour_ids(self.subject), [str(self.far.id)])
+
+        Property.objects.filter(id=self.far.id).update(is_active=False)
+        upsert_property(self.org.id, self.far.id)
+        self.assertEqual(self.neighbour_ids(self.subject), [])
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from common.models import Address, Org
+from properties.models import Property
+from properties.valuation import (
+    estimate_value,
+    quantile,
+    refresh_org_valuation,
+    zone_statistics,
+)
+
+
+class QuantileTest(SimpleTestCase):
+    def test_quantile_interpolates(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        self.assertEqual(quantile(values, 0.5), 2.5)
+        self.assertEqual(quantile(values, 0.25), 1.75)
+        self.assertEqual(quantile(values, 1), 4.0)
+        self.assertIsNone(quantile([], 0.5))
+
+
+class ValuationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Org.objects.create(name="valuation org")
+        self.address = Address.objects.create(city="Madrid")
+        for index, (zone, area, price) in enumerate(
+            [
+                ("Centro", 80, 400000),
+                ("Centro", 100, 500000),
+                ("Centro", 120, 540000),
+                ("Retiro", 90, 630000),
+            ]
+        ):
+            Property.objects.create(
+                reference=f"VAL-{index}",
+                title=f"Flat {index}",
+                property_type="flat",
+                operation="sale",
+                sale_price=Decimal(price),
+                built_area=Decimal(area),
+                bedrooms=2,
+                zone=zone,
+                address=self.address,
+                org=self.org,
+            )
+
+    def test_zone_statistics(self):
+        refresh_org_valuation(self.org.id)
+        zones = zone_statistics(self.org.id, "sale", city="madrid")
+        self.assertEqual([row["zone"] for row in zones], ["centro", "retiro"])
+        centro = zones[0]
+        self.assertEqual(centro["count"], 3)
+        self.assertEqual(centro["median"], 5000.0)
+
+    def test_estimate_prefers_same_zone(self):
+        valuation = estimate_value(
+            self.org.id,
+            {
+                "operation": "sale",
+                "property_type": "flat",
+                "built_area": Decimal("100"),
+                "bedrooms": 2,
+                "city": "Madrid",
+                "zone": "Centro",
+            },
+            k=3,
+        )
+        self.assertEqual(valuation["market"], "sale")
+        self.assertEqual(len(valuation["comparables"]), 3)
+        self.assertTrue(4500 <= valuation["price_per_m2"] <= 5000)
+        self.assertEqual(valuation["zone"]["count"], 3)
@@ -6,11 +6,67 @@ app_name = "api_properties"
 
 urlpatterns = [
     path("", views.PropertyListView.as_view(), name="property-list"),
+    path("export/", views.PropertyExportView.as_view(), name="property-export"),
     path(
         "<uuid:pk>/",
         views.PropertyDetailView.as_view(),
         name="property-detail",
     ),
+    path(
+        "valuation/",
+        views.PropertyValuationEstimateView.as_view(),
+        name="property-valuation-estimate",
+    ),
+    path(
+        "valuation/zones/",
+        views.PropertyZoneStatsView.as_view(),
+        name="property-valuation-zones",
+    ),
+    path(
+        "price-trends/",
+        views.ZonePriceTrendView.as_view(),
+        name="zone-price-trends",
+    ),
+    path(
+        "<uuid:pk>/price-history/",
+        views.PropertyPriceHistoryView.as_view(),
+        name="property-price-history",
+    ),
+    path(
+        "<uuid:pk>/bookings/",
+        views.PropertyBookingListView.as_view(),
+        name="property-bookings",
+    ),
+    path(
+        "<uuid:pk>/bookings/<uuid:booking_pk>/",
+        views.PropertyBookingDetailView.as_view(),
+        name="property-booking-detail",
+    ),
+    path(
+        "viewings/",
+        views.PropertyViewingListView.as_view(),
+        name="property-viewings",
+    ),
+    path(
+        "viewings/free-slots/",
+        views.ViewingFreeSlotsView.as_view(),
+        name="property-viewing-free-slots",
+    ),
+    path(
+        "viewings/<uuid:pk>/",
+        views.PropertyViewingDetailView.as_view(),
+        name="property-viewing-detail",
+    ),
+    path(
+        "<uuid:pk>/similar/",
+        views.PropertySimilarView.as_view(),
+        name="property-similar",
+    ),
+    path(
+        "<uuid:pk>/valuation/",
+        views.PropertyValuationView.as_view(),
+        name="property-valuation",
+    ),
     path(
         "features/",
         views.PropertyFeatureListView.as_view(),
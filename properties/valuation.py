@@ -0,0 +1,257 @@
+"""Comparable-based valuation and price-per-m² statistics.
+
+Statistics are built per org and market (sale/rent) by
+``build_valuation_snapshot`` and stored in the cache as compact arrays, so
+valuation requests never touch the property table.
+"""
+import heapq
+import math
+from array import array
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+from .constants import ENERGY_RATINGS, PROPERTY_TYPES
+from .models import Property
+
+VALUATION_CACHE_KEY = "property_valuation:{org_id}:{market}"
+# Refreshed nightly; the extra hours cover a late or failed run.
+VALUATION_CACHE_TIMEOUT = 60 * 60 * 26
+
+MARKETS = {
+    "sale": "sale_price",
+    "rent": "rent_price",
+}
+VALUATION_STATUSES = ("available", "reserved", "sold", "rented")
+
+PROPERTY_TYPE_CODES = {key: code for code, (key, _) in enumerate(PROPERTY_TYPES)}
+# A..G map to 1..7; exempt, pending and empty ratings sit in the middle.
+ENERGY_RATING_CODES = {
+    key: code for code, (key, _) in enumerate(ENERGY_RATINGS[:7], start=1)
+}
+UNKNOWN_ENERGY_CODE = 4
+
+# Distance weights for the comparables search.
+AREA_WEIGHT = 3.0
+BEDROOM_WEIGHT = 0.5
+TYPE_WEIGHT = 1.0
+ENERGY_WEIGHT = 0.15
+ZONE_WEIGHT = 1.0
+CITY_WEIGHT = 3.0
+
+
+def market_for_operation(operation):
+    return "rent" if operation == "rent" else "sale"
+
+
+def quantile(sorted_values, q):
+    """Linear interpolation quantile of an already sorted sequence."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def distribution(values):
+    values = sorted(values)
+    q1 = quantile(values, 0.25)
+    q3 = quantile(values, 0.75)
+    return {
+        "count": len(values),
+        "median": round(quantile(values, 0.5), 2),
+        "q1": round(q1, 2),
+        "q3": round(q3, 2),
+        "iqr": round(q3 - q1, 2),
+    }
+
+
+def zone_key(city, zone):
+    return "{}|{}".format((city or "").strip().lower(), (zone or "").strip().lower())
+
+
+def _code_for(value, codes):
+    return codes.setdefault(value, len(codes))
+
+
+def build_valuation_snapshot(org_id, market):
+    """Compute zone distributions and comparable arrays for one org/market."""
+    price_field = MARKETS[market]
+    rows = (
+        Property.objects.filter(
+            org_id=org_id,
+            status__in=VALUATION_STATUSES,
+            built_area__gt=0,
+            **{f"{price_field}__gt": 0},
+        )
+        .values_list(
+            "id",
+            price_field,
+            "built_area",
+            "bedrooms",
+            "property_type",
+            "energy_rating",
+            "zone",
+            "address__city",
+        )
+        .iterator(chunk_size=2000)
+    )
+
+    city_codes = {}
+    zone_codes = {}
+    snapshot = {
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "ids": [],
+        "city_codes": city_codes,
+        "zone_codes": zone_codes,
+        "area": array("d"),
+        "log_area": array("d"),
+        "ppm2": array("d"),
+        "bedrooms": array("H"),
+        "type": array("B"),
+        "energy": array("B"),
+        "city": array("H"),
+        "zone": array("H"),
+    }
+    by_zone = {}
+    for pk, price, area, bedrooms, property_type, rating, zone, city in rows:
+        area = float(area)
+        ppm2 = float(price) / area
+        key = zone_key(city, zone)
+        city = key.split("|", 1)[0]
+
+        snapshot["ids"].append(str(pk))
+        snapshot["area"].append(area)
+        snapshot["log_area"].append(math.log(area))
+        snapshot["ppm2"].append(ppm2)
+        snapshot["bedrooms"].append(min(bedrooms, 65535))
+        snapshot["type"].append(PROPERTY_TYPE_CODES.get(property_type, 255))
+        snapshot["energy"].append(
+            ENERGY_RATING_CODES.get(rating, UNKNOWN_ENERGY_CODE)
+        )
+        snapshot["city"].append(_code_for(city, city_codes))
+        snapshot["zone"].append(_code_for(key, zone_codes))
+        by_zone.setdefault(key, []).append(ppm2)
+
+    snapshot["zone_stats"] = {
+        key: dict(
+            distribution(values),
+            city=key.split("|", 1)[0],
+            zone=key.split("|", 1)[1],
+        )
+        for key, values in by_zone.items()
+    }
+    return snapshot
+
+
+def refresh_org_valuation(org_id):
+    snapshots = {}
+    for market in MARKETS:
+        snapshots[market] = build_valuation_snapshot(org_id, market)
+        cache.set(
+            VALUATION_CACHE_KEY.format(org_id=org_id, market=market),
+            snapshots[market],
+            VALUATION_CACHE_TIMEOUT,
+        )
+    return snapshots
+
+
+def get_valuation_snapshot(org_id, market):
+    snapshot = cache.get(VALUATION_CACHE_KEY.format(org_id=org_id, market=market))
+    if snapshot is None:
+        # Cold cache (new org or cache flush): build once, the nightly
+        # task keeps it fresh afterwards.
+        snapshot = refresh_org_valuation(org_id)[market]
+    return snapshot
+
+
+def zone_statistics(org_id, market, city=None):
+    stats = get_valuation_snapshot(org_id, market)["zone_stats"].values()
+    if city:
+        city = city.strip().lower()
+        stats = [row for row in stats if row["city"] == city]
+    return sorted(stats, key=lambda row: (row["city"], row["zone"]))
+
+
+def find_comparables(snapshot, subject, k=5, exclude_id=None):
+    """Return the ``k`` nearest comparables as ``(distance, index)`` pairs.
+
+    ``subject`` is a dict with ``built_area``, ``bedrooms``,
+    ``property_type``, ``energy_rating``, ``zone`` and ``city``.
+    """
+    area = float(subject["built_area"])
+    log_area = math.log(area)
+    bedrooms = subject.get("bedrooms") or 0
+    type_code = PROPERTY_TYPE_CODES.get(subject.get("property_type"), 255)
+    energy_code = ENERGY_RATING_CODES.get(
+        subject.get("energy_rating"), UNKNOWN_ENERGY_CODE
+    )
+    key = zone_key(subject.get("city"), subject.get("zone"))
+    city_code = snapshot["city_codes"].get(key.split("|", 1)[0], -1)
+    zone_code = snapshot["zone_codes"].get(key, -1)
+
+    log_areas = snapshot["log_area"]
+    rooms = snapshot["bedrooms"]
+    types = snapshot["type"]
+    energies = snapshot["energy"]
+    city_col = snapshot["city"]
+    zone_col = snapshot["zone"]
+    ids = snapshot["ids"]
+
+    def scores():
+        for index in range(len(ids)):
+            if ids[index] == exclude_id:
+                continue
+            distance = AREA_WEIGHT * abs(log_areas[index] - log_area)
+            distance += BEDROOM_WEIGHT * abs(rooms[index] - bedrooms)
+            distance += ENERGY_WEIGHT * abs(energies[index] - energy_code)
+            if types[index] != type_code:
+                distance += TYPE_WEIGHT
+            if city_col[index] != city_code:
+                distance += CITY_WEIGHT
+            elif zone_col[index] != zone_code:
+                distance += ZONE_WEIGHT
+            yield distance, index
+
+    return heapq.nsmallest(k, scores())
+
+
+def estimate_value(org_id, subject, k=5, exclude_id=None):
+    market = market_for_operation(subject.get("operation"))
+    snapshot = get_valuation_snapshot(org_id, market)
+    comparables = find_comparables(snapshot, subject, k=k, exclude_id=exclude_id)
+    if not comparables:
+        return None
+
+    area = float(subject["built_area"])
+    ppm2 = snapshot["ppm2"]
+    weights = [1.0 / (distance + 0.1) for distance, _ in comparables]
+    weighted_ppm2 = sum(
+        weight * ppm2[index] for weight, (_, index) in zip(weights, comparables)
+    ) / sum(weights)
+    comparable_ppm2 = sorted(ppm2[index] for _, index in comparables)
+
+    return {
+        "market": market,
+        "price_per_m2": round(weighted_ppm2, 2),
+        "estimate": round(weighted_ppm2 * area, 2),
+        "low": round(quantile(comparable_ppm2, 0.25) * area, 2),
+        "high": round(quantile(comparable_ppm2, 0.75) * area, 2),
+        "zone": snapshot["zone_stats"].get(
+            zone_key(subject.get("city"), subject.get("zone"))
+        ),
+        "comparables": [
+            {
+                "id": snapshot["ids"][index],
+                "price_per_m2": round(ppm2[index], 2),
+                "built_area": snapshot["area"][index],
+                "distance": round(distance, 4),
+            }
+            for distance, index in comparables
+        ],
+        "computed_at": snapshot["built_at"],
+    }
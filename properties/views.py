@@ -1,4 +1,9 @@
+from datetime import timedelta
+from uuid import UUID
+
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status
@@ -10,18 +15,23 @@ from rest_framework.views import APIView
 
 from accounts.models import Tags
 from common.models import Attachments, Comment, Profile
+from common.export import export_format_param, export_response, requested_format
 from common.serializer import CommentSerializer
 from contacts.models import Contact
 from teams.models import Teams
 
+from .availability import booking_conflicts, create_booking, filter_available
 from .models import (
     Property,
+    PropertyBooking,
     PropertyDocument,
     PropertyFeature,
     PropertyFeatureCategory,
     PropertyFloorPlan,
     PropertyImage,
     PropertyVideo,
+    PropertyViewing,
+    ZonePriceTrend,
 )
 from .serializer import (
     PropertyCommentSwaggerSerializer,
@@ -33,9 +43,24 @@ from .serializer import (
     PropertyFeatureSerializer,
     PropertyFloorPlanSerializer,
     PropertyImageSerializer,
+    PropertyBookingSerializer,
     PropertyListSerializer,
+    PropertyPriceChangeSerializer,
+    PropertyValuationRequestSerializer,
     PropertyVideoSerializer,
+    PropertyViewingSerializer,
+    ViewingFreeSlotsRequestSerializer,
+    ZonePriceTrendSerializer,
+)
+from .price_history import (
+    price_snapshot,
+    record_price_changes,
+    record_property_removal,
 )
+from .scheduling import save_viewing, suggest_free_slots, working_windows
+from .similarity import MAX_NEIGHBOURS, similar_property_ids
+from .tasks import remove_from_similarity_index, update_similarity_index
+from .valuation import estimate_value, market_for_operation, zone_statistics
 
 
 class PropertyListView(APIView, LimitOffsetPagination):
@@ -127,6 +152,10 @@ class PropertyListView(APIView, LimitOffsetPagination):
                 )
             if params.get("tags"):
                 queryset = queryset.filter(tags__in=params.getlist("tags"))
+            available_start = parse_date(params.get("available_start") or "")
+            available_end = parse_date(params.get("available_end") or "")
+            if available_start and available_end and available_end > available_start:
+                queryset = filter_available(queryset, available_start, available_end)
 
         return queryset.distinct()
 
@@ -140,11 +169,19 @@ class PropertyListView(APIView, LimitOffsetPagination):
             OpenApiParameter("max_price", float, description="Maximum price"),
             OpenApiParameter("min_bedrooms", int, description="Minimum bedrooms"),
             OpenApiParameter("city", str, description="Filter by city"),
+            OpenApiParameter("available_start", str, description="Free from this date (YYYY-MM-DD)"),
+            OpenApiParameter("available_end", str, description="Free until this check-out date (YYYY-MM-DD)"),
         ],
         responses={200: PropertyListSerializer(many=True)},
     )
     def get(self, request):
-        queryset = self.get_context_data()
+        try:
+            queryset = self.get_context_data()
+        except ValueError:
+            # A well-formed but impossible availability date, e.g. 2024-02-30.
+            return Response(
+                {"error": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST
+            )
         results = self.paginate_queryset(queryset, request, view=self)
         serializer = PropertyListSerializer(results, many=True)
         return Response(
@@ -201,12 +238,59 @@ class PropertyListView(APIView, LimitOffsetPagination):
             ).first()
             property_obj.save()
 
+        record_price_changes(property_obj, changed_by=request.profile)
+        update_similarity_index.delay(
+            str(request.profile.org_id), str(property_obj.id)
+        )
         return Response(
             PropertyDetailSerializer(property_obj).data,
             status=status.HTTP_201_CREATED,
         )
 
 
+PROPERTY_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("reference", "reference"),
+    ("title", "title"),
+    ("property_type", "property_type"),
+    ("operation", "operation"),
+    ("status", "status"),
+    ("sale_price", "sale_price"),
+    ("rent_price", "rent_price"),
+    ("built_area", "built_area"),
+    ("bedrooms", "bedrooms"),
+    ("bathrooms", "bathrooms"),
+    ("city", "address__city"),
+    ("zone", "zone"),
+    ("energy_rating", "energy_rating"),
+    ("is_active", "is_active"),
+    ("is_featured", "is_featured"),
+    ("created_at", "created_at"),
+)
+
+
+class PropertyExportView(PropertyListView):
+    http_method_names = ["get", "options"]
+
+    @extend_schema(parameters=[export_format_param])
+    def get(self, request):
+        export_format = requested_format(request.query_params)
+        if export_format is None:
+            return Response(
+                {"error": "Unsupported export format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            queryset = self.get_context_data()
+        except ValueError:
+            return Response(
+                {"error": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return export_response(
+            queryset, PROPERTY_EXPORT_COLUMNS, "properties", export_format
+        )
+
+
 class PropertyDetailView(APIView):
     model = Property
     permission_classes = (IsAuthenticated,)
@@ -235,6 +319,7 @@ class PropertyDetailView(APIView):
     )
     def put(self, request, pk):
         property_obj = self.get_object(pk)
+        prices_before = price_snapshot(property_obj)
         serializer = PropertyCreateSerializer(
             instance=property_obj,
             data=request.data,
@@ -247,6 +332,9 @@ class PropertyDetailView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         property_obj = serializer.save()
+        record_price_changes(
+            property_obj, before=prices_before, changed_by=request.profile,
+        )
 
         if "assigned_to" in request.data:
             property_obj.assigned_to.set(
@@ -273,6 +361,9 @@ class PropertyDetailView(APIView):
                 )
             )
 
+        update_similarity_index.delay(
+            str(request.profile.org_id), str(property_obj.id)
+        )
         return Response(
             PropertyDetailSerializer(property_obj).data,
             status=status.HTTP_200_OK,
@@ -280,10 +371,49 @@ class PropertyDetailView(APIView):
 
     def delete(self, request, pk):
         property_obj = self.get_object(pk)
+        property_id = str(property_obj.id)
+        record_property_removal(property_obj)
         property_obj.delete()
+        remove_from_similarity_index.delay(str(request.profile.org_id), property_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class PropertySimilarView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("k", int, description="Number of similar properties (default 5, max 20)"),
+        ],
+        responses={200: PropertyListSerializer(many=True)},
+    )
+    def get(self, request, pk):
+        property_obj = get_object_or_404(Property, pk=pk, org=request.profile.org)
+        try:
+            k = min(max(int(request.query_params.get("k", 5)), 1), MAX_NEIGHBOURS)
+        except ValueError:
+            k = 5
+        neighbours = similar_property_ids(request.profile.org_id, property_obj.id, k=k)
+        properties = (
+            Property.objects.filter(
+                id__in=[property_id for _, property_id in neighbours],
+                org=request.profile.org,
+            )
+            .select_related("address", "created_by")
+            .prefetch_related("tags", "assigned_to", "images")
+            .in_bulk()
+        )
+        similar = []
+        for distance, property_id in neighbours:
+            # Skip entries removed since the index was last refreshed.
+            obj = properties.get(UUID(property_id))
+            if obj is not None:
+                data = PropertyListSerializer(obj).data
+                data["distance"] = round(distance, 4)
+                similar.append(data)
+        return Response({"similar": similar}, status=status.HTTP_200_OK)
+
+
 class PropertyImageView(APIView):
     permission_classes = (IsAuthenticated,)
     parser_classes = (MultiPartParser, FormParser)
@@ -491,3 +621,374 @@ class PropertyFeatureCategoryListView(APIView):
         ).prefetch_related("features")
         serializer = PropertyFeatureCategorySerializer(categories, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class PropertyValuationView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("k", int, description="Number of comparables (default 5)"),
+        ],
+    )
+    def get(self, request, pk):
+        property_obj = get_object_or_404(
+            Property.objects.select_related("address"),
+            pk=pk,
+            org=request.profile.org,
+        )
+        if not property_obj.built_area:
+            return Response(
+                {"error": "The property has no built area to value."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            k = min(max(int(request.query_params.get("k", 5)), 1), 50)
+        except ValueError:
+            k = 5
+        subject = {
+            "operation": property_obj.operation,
+            "property_type": property_obj.property_type,
+            "built_area": property_obj.built_area,
+            "bedrooms": property_obj.bedrooms,
+            "energy_rating": property_obj.energy_rating,
+            "zone": property_obj.zone,
+            "city": property_obj.address.city if property_obj.address else "",
+        }
+        valuation = estimate_value(
+            request.profile.org_id, subject, k=k, exclude_id=str(property_obj.id),
+        )
+        if valuation is None:
+            return Response(
+                {"error": "Not enough comparables to value this property."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(valuation, status=status.HTTP_200_OK)
+
+
+class PropertyValuationEstimateView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(request=PropertyValuationRequestSerializer)
+    def post(self, request):
+        serializer = PropertyValuationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        subject = dict(serializer.validated_data)
+        k = subject.pop("k")
+        valuation = estimate_value(request.profile.org_id, subject, k=k)
+        if valuation is None:
+            return Response(
+                {"error": "Not enough comparables to value this property."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(valuation, status=status.HTTP_200_OK)
+
+
+class PropertyZoneStatsView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("operation", str, description="sale (default) or rent"),
+            OpenApiParameter("city", str, description="Restrict to one city"),
+        ],
+    )
+    def get(self, request):
+        market = market_for_operation(request.query_params.get("operation"))
+        zones = zone_statistics(
+            request.profile.org_id, market, city=request.query_params.get("city"),
+        )
+        return Response(
+            {"market": market, "zones": zones},
+            status=status.HTTP_200_OK,
+        )
+
+
+class PropertyPriceHistoryView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(responses={200: PropertyPriceChangeSerializer(many=True)})
+    def get(self, request, pk):
+        property_obj = get_object_or_404(Property, pk=pk, org=request.profile.org)
+        changes = property_obj.price_changes.select_related("changed_by__user")
+        if request.query_params.get("market"):
+            changes = changes.filter(market=request.query_params.get("market"))
+        serializer = PropertyPriceChangeSerializer(changes, many=True)
+        return Response(
+            {
+                "sale_price": property_obj.sale_price,
+                "rent_price": property_obj.rent_price,
+                "history": serializer.data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ZonePriceTrendView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("operation", str, description="sale (default) or rent"),
+            OpenApiParameter("city", str, description="Filter by city"),
+            OpenApiParameter("zone", str, description="Filter by zone"),
+            OpenApiParameter("weeks", int, description="Number of weeks back (default 26)"),
+        ],
+        responses={200: ZonePriceTrendSerializer(many=True)},
+    )
+    def get(self, request):
+        params = request.query_params
+        market = market_for_operation(params.get("operation"))
+        try:
+            weeks = min(max(int(params.get("weeks", 26)), 1), 520)
+        except ValueError:
+            weeks = 26
+        trends = ZonePriceTrend.objects.filter(
+            org=request.profile.org,
+            market=market,
+            week__gte=timezone.localdate() - timedelta(weeks=weeks),
+        ).order_by("city", "zone", "week")
+        if params.get("city"):
+            trends = trends.filter(city=params.get("city").strip().lower())
+        if params.get("zone"):
+            trends = trends.filter(zone=params.get("zone").strip().lower())
+        serializer = ZonePriceTrendSerializer(trends, many=True)
+        return Response(
+            {"market": market, "trends": serializer.data},
+            status=status.HTTP_200_OK,
+        )
+
+
+class PropertyBookingListView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("start", str, description="Window start (YYYY-MM-DD)"),
+            OpenApiParameter("end", str, description="Window end (YYYY-MM-DD)"),
+        ],
+        responses={200: PropertyBookingSerializer(many=True)},
+    )
+    def get(self, request, pk):
+        property_obj = get_object_or_404(Property, pk=pk, org=request.profile.org)
+        bookings = property_obj.bookings.exclude(status="cancelled")
+        try:
+            start = parse_date(request.query_params.get("start") or "")
+            end = parse_date(request.query_params.get("end") or "")
+        except ValueError:
+            return Response(
+                {"error": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if start and end:
+            bookings = booking_conflicts(property_obj.pk, start, end)
+        serializer = PropertyBookingSerializer(bookings, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        request=PropertyBookingSerializer,
+        responses={201: PropertyBookingSerializer},
+    )
+    def post(self, request, pk):
+        property_obj = get_object_or_404(Property, pk=pk, org=request.profile.org)
+        serializer = PropertyBookingSerializer(data=request.data, request_obj=request)
+        if not serializer.is_valid():
+            return Response(
+                {"errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        booking, conflicts = create_booking(
+            serializer, property_obj, org=request.profile.org,
+        )
+        if booking is None:
+            return Response(
+                {
+                    "error": "The property is already booked for these dates.",
+                    "conflicts": PropertyBookingSerializer(conflicts, many=True).data,
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            PropertyBookingSerializer(booking).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class PropertyBookingDetailView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def delete(self, request, pk, booking_pk):
+        booking = get_object_or_404(
+            PropertyBooking,
+            pk=booking_pk,
+            property_id=pk,
+            property__org=request.profile.org,
+        )
+        booking.status = "cancelled"
+        booking.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def serialize_conflicts(conflicts):
+    return [
+        {"type": kind, "id": str(object_id), "start": start, "end": end}
+        for start, end, kind, object_id in conflicts
+    ]
+
+
+class PropertyViewingListView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("agent", str, description="Filter by agent profile id"),
+            OpenApiParameter("property", str, description="Filter by property id"),
+            OpenApiParameter("start", str, description="Window start (ISO datetime)"),
+            OpenApiParameter("end", str, description="Window end (ISO datetime)"),
+        ],
+        responses={200: PropertyViewingSerializer(many=True)},
+    )
+    def get(self, request):
+        params = request.query_params
+        viewings = PropertyViewing.objects.filter(
+            org=request.profile.org,
+        ).exclude(status="cancelled")
+        if params.get("agent"):
+            viewings = viewings.filter(agent_id=params.get("agent"))
+        if params.get("property"):
+            viewings = viewings.filter(property_id=params.get("property"))
+        try:
+            start = parse_datetime(params.get("start") or "")
+            end = parse_datetime(params.get("end") or "")
+        except ValueError:
+            return Response(
+                {"error": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if start:
+            viewings = viewings.filter(ends_at__gt=start)
+        if end:
+            viewings = viewings.filter(starts_at__lt=end)
+        serializer = PropertyViewingSerializer(viewings, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        request=PropertyViewingSerializer,
+        responses={201: PropertyViewingSerializer},
+    )
+    def post(self, request):
+        serializer = PropertyViewingSerializer(data=request.data, request_obj=request)
+        if not serializer.is_valid():
+            return Response(
+                {"errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        viewing, conflicts = save_viewing(serializer, org=request.profile.org)
+        if viewing is None:
+            return Response(
+                {
+                    "error": "The agent is not available at this time.",
+                    "conflicts": serialize_conflicts(conflicts),
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            PropertyViewingSerializer(viewing).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class PropertyViewingDetailView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get_object(self, pk):
+        return get_object_or_404(
+            PropertyViewing, pk=pk, org=self.request.profile.org,
+        )
+
+    @extend_schema(
+        request=PropertyViewingSerializer,
+        responses={200: PropertyViewingSerializer},
+    )
+    def put(self, request, pk):
+        viewing = self.get_object(pk)
+        serializer = PropertyViewingSerializer(
+            viewing, data=request.data, partial=True, request_obj=request,
+        )
+        if not serializer.is_valid():
+            return Response(
+                {"errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        viewing, conflicts = save_viewing(serializer)
+        if viewing is None:
+            return Response(
+                {
+                    "error": "The agent is not available at this time.",
+                    "conflicts": serialize_conflicts(conflicts),
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            PropertyViewingSerializer(viewing).data,
+            status=status.HTTP_200_OK,
+        )
+
+    def delete(self, request, pk):
+        viewing = self.get_object(pk)
+        viewing.status = "cancelled"
+        viewing.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ViewingFreeSlotsView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("agents", str, many=True, description="Agent profile ids"),
+            OpenApiParameter("date", str, description="First day (YYYY-MM-DD)"),
+            OpenApiParameter("days", int, description="Number of days (default 1, max 14)"),
+            OpenApiParameter("duration", int, description="Slot length in minutes (default 60)"),
+            OpenApiParameter("start_hour", int, description="Working day start (default 9)"),
+            OpenApiParameter("end_hour", int, description="Working day end (default 20)"),
+        ],
+    )
+    def get(self, request):
+        serializer = ViewingFreeSlotsRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                {"errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = serializer.validated_data
+        agent_ids = list(
+            Profile.objects.filter(
+                id__in=data["agents"], org=request.profile.org, is_active=True,
+            ).values_list("id", flat=True)
+        )
+        if len(agent_ids) != len(set(data["agents"])):
+            return Response(
+                {"errors": {"agents": ["Agent not found."]}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        windows = working_windows(
+            data["date"], data["days"], data["start_hour"], data["end_hour"],
+        )
+        slots = suggest_free_slots(
+            agent_ids, windows, timedelta(minutes=data["duration"]),
+        )
+        return Response(
+            {
+                "duration": data["duration"],
+                "agents": {
+                    str(agent_id): [
+                        {"start": start, "end": end} for start, end in agent_slots
+                    ]
+                    for agent_id, agent_slots in slots.items()
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
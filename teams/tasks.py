@@ -1,146 +1,151 @@
 from celery import Celery
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
 
-from common.models import Profile
+from events.calendar import opportunity_task_ids, refresh_entries
 from teams.models import Teams
 
 app = Celery("redis://")
 
+# Reverse name of each model's ``teams`` field and the field that lists the
+# profiles the object is shared with.
+TEAM_RELATIONS = (
+    ("account_teams", "assigned_to"),
+    ("contact_teams", "assigned_to"),
+    ("lead_teams", "assigned_to"),
+    ("oppurtunity_teams", "assigned_to"),
+    ("cases_teams", "assigned_to"),
+    ("document_teams", "shared_to"),
+    ("tasks_teams", "assigned_to"),
+    ("invoices_teams", "assigned_to"),
+    ("event_teams", "assigned_to"),
+)
+# Cached querysets that embed lead assignments (see leads.tasks).
+LEAD_CACHE_KEYS = ("admin_leads_open_queryset", "admin_leads_close_queryset")
+# Calendar source rebuilt when the assignees of a relation change.
+CALENDAR_SOURCES = {
+    "event_teams": "event",
+    "tasks_teams": "task",
+    "cases_teams": "case",
+    "oppurtunity_teams": "opportunity_task",
+}
+
+
+def team_object_ids(team_id, related_name):
+    """Ids of the objects linked to the team, as a subquery."""
+    teams_field = Teams._meta.get_field(related_name).field
+    return teams_field.remote_field.through.objects.filter(
+        **{f"{teams_field.m2m_reverse_field_name()}_id": team_id}
+    ).values_list(f"{teams_field.m2m_field_name()}_id", flat=True)
+
+
+def m2m_table(field):
+    """The through table of an m2m field and its source and target columns."""
+    return field.m2m_db_table(), field.m2m_column_name(), field.m2m_reverse_name()
+
+
+def assign_team_members(team_id, related_name, field_name):
+    """Assign every team member to every object shared with the team.
+
+    One ``INSERT ... SELECT`` of the cross join of the team's objects and
+    members, so nothing is loaded into Python; assignments that already
+    exist are skipped. Return the number of rows inserted.
+    """
+    quote = connection.ops.quote_name
+    model = Teams._meta.get_field(related_name).related_model
+    table, source, target = m2m_table(model._meta.get_field(field_name))
+    objects_table, object_column, object_team = m2m_table(
+        Teams._meta.get_field(related_name).field
+    )
+    members_table, member_team, member_column = m2m_table(
+        Teams._meta.get_field("users")
+    )
+    sql = (
+        f"{connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)} "
+        f"{quote(table)} ({quote(source)}, {quote(target)}) "
+        f"SELECT objects.{quote(object_column)}, members.{quote(member_column)} "
+        f"FROM {quote(objects_table)} objects, {quote(members_table)} members "
+        f"WHERE objects.{quote(object_team)} = %s "
+        f"AND members.{quote(member_team)} = %s "
+        + connection.ops.on_conflict_suffix_sql(
+            [], OnConflict.IGNORE, None, None
+        )
+    )
+    team_pk = Teams._meta.pk.get_db_prep_value(team_id, connection)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [team_pk, team_pk])
+        return cursor.rowcount
+
+
+def profiles_through(related_name, field_name):
+    """The through model of the profile field and its two column names."""
+    model = Teams._meta.get_field(related_name).related_model
+    field = model._meta.get_field(field_name)
+    return (
+        field.remote_field.through,
+        f"{field.m2m_field_name()}_id",
+        f"{field.m2m_reverse_field_name()}_id",
+    )
+
+
+def invalidate_visibility_caches(related_names):
+    if "lead_teams" in related_names:
+        cache.delete_many(LEAD_CACHE_KEYS)
+
+
+def refresh_calendars(team_id, related_names):
+    """Rebuild the calendar entries of team objects whose assignees changed.
+
+    The bulk writes above bypass the ``m2m_changed`` receivers that keep
+    the calendar up to date.
+    """
+    for related_name in related_names:
+        source = CALENDAR_SOURCES.get(related_name)
+        if not source:
+            continue
+        object_ids = team_object_ids(team_id, related_name)
+        if source == "opportunity_task":
+            object_ids = opportunity_task_ids(object_ids)
+        refresh_entries(source, object_ids)
+
 
 @app.task
 def remove_users(removed_users_list, team_id):
-    removed_users_list = [i for i in removed_users_list if i.isdigit()]
-    users_list = Profile.objects.filter(id__in=removed_users_list)
-    if users_list.exists():
-        team = Teams.objects.filter(id=team_id).first()
-        if team:
-            accounts = team.account_teams.all()
-            for account in accounts:
-                for user in users_list:
-                    account.assigned_to.remove(user)
-
-            # for contacts
-            contacts = team.contact_teams.all()
-            for contact in contacts:
-                for user in users_list:
-                    contact.assigned_to.remove(user)
-
-            # for leads
-            leads = team.lead_teams.all()
-            for lead in leads:
-                for user in users_list:
-                    lead.assigned_to.remove(user)
-
-            # for opportunities
-            opportunities = team.oppurtunity_teams.all()
-            for opportunity in opportunities:
-                for user in users_list:
-                    opportunity.assigned_to.remove(user)
-
-            # for cases
-            cases = team.cases_teams.all()
-            for case in cases:
-                for user in users_list:
-                    case.assigned_to.remove(user)
-
-            # for documents
-            docs = team.document_teams.all()
-            for doc in docs:
-                for user in users_list:
-                    doc.shared_to.remove(user)
-
-            # for tasks
-            tasks = team.tasks_teams.all()
-            for task in tasks:
-                for user in users_list:
-                    task.assigned_to.remove(user)
-
-            # for invoices
-            invoices = team.invoices_teams.all()
-            for invoice in invoices:
-                for user in users_list:
-                    invoice.assigned_to.remove(user)
-
-            # for events
-            events = team.event_teams.all()
-            for event in events:
-                for user in users_list:
-                    event.assigned_to.remove(user)
+    """Unassign removed team members from every object shared with the team.
+
+    Runs one DELETE per object type on the assignment through table.
+    """
+    if not removed_users_list:
+        return
+    changed = []
+    with transaction.atomic():
+        for related_name, field_name in TEAM_RELATIONS:
+            through, source, target = profiles_through(related_name, field_name)
+            deleted, _ = through.objects.filter(
+                **{
+                    f"{source}__in": team_object_ids(team_id, related_name),
+                    f"{target}__in": removed_users_list,
+                }
+            ).delete()
+            if deleted:
+                changed.append(related_name)
+        refresh_calendars(team_id, changed)
+    invalidate_visibility_caches(changed)
 
 
 @app.task
 def update_team_users(team_id):
     """this function updates assigned_to field on all models when a team is updated"""
     team = Teams.objects.filter(id=team_id).first()
-    if team:
-        teams_members = team.users.all()
-        # for accounts
-        accounts = team.account_teams.all()
-        for account in accounts:
-            account_assigned_to_users = account.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in account_assigned_to_users:
-                    account.assigned_to.add(team_member)
-
-        # for contacts
-        contacts = team.contact_teams.all()
-        for contact in contacts:
-            contact_assigned_to_users = contact.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in contact_assigned_to_users:
-                    contact.assigned_to.add(team_member)
-
-        # for leads
-        leads = team.lead_teams.all()
-        for lead in leads:
-            lead_assigned_to_users = lead.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in lead_assigned_to_users:
-                    lead.assigned_to.add(team_member)
-
-        # for opportunities
-        opportunities = team.oppurtunity_teams.all()
-        for opportunity in opportunities:
-            opportunity_assigned_to_users = opportunity.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in opportunity_assigned_to_users:
-                    opportunity.assigned_to.add(team_member)
-
-        # for cases
-        cases = team.cases_teams.all()
-        for case in cases:
-            case_assigned_to_users = case.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in case_assigned_to_users:
-                    case.assigned_to.add(team_member)
-
-        # for documents
-        docs = team.document_teams.all()
-        for doc in docs:
-            doc_assigned_to_users = doc.shared_to.all()
-            for team_member in teams_members:
-                if team_member not in doc_assigned_to_users:
-                    doc.shared_to.add(team_member)
-
-        # for tasks
-        tasks = team.tasks_teams.all()
-        for task in tasks:
-            task_assigned_to_users = task.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in task_assigned_to_users:
-                    task.assigned_to.add(team_member)
-
-        # for invoices
-        invoices = team.invoices_teams.all()
-        for invoice in invoices:
-            invoice_assigned_to_users = invoice.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in invoice_assigned_to_users:
-                    invoice.assigned_to.add(team_member)
-
-        # for events
-        events = team.event_teams.all()
-        for event in events:
-            event_assigned_to_users = event.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in event_assigned_to_users:
-                    event.assigned_to.add(team_member)
+    if not team:
+        return
+    if not team.users.exists():
+        return
+    changed = []
+    with transaction.atomic():
+        for related_name, field_name in TEAM_RELATIONS:
+            if assign_team_members(team.id, related_name, field_name):
+                changed.append(related_name)
+        refresh_calendars(team_id, changed)
+    invalidate_visibility_caches(changed)
@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Account
+from common.models import Org, Profile, User
+from leads.models import Lead
+from teams.models import Teams
+from teams.tasks import TEAM_RELATIONS, remove_users, update_team_users
+
+
+class TeamPropagationTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="team org")
+        self.profiles = [
+            Profile.objects.create(
+                user=User.objects.create(email=f"member{number}@example.com"),
+                org=self.org,
+            )
+            for number in range(4)
+        ]
+        self.team = Teams.objects.create(name="Sales", description="", org=self.org)
+        self.team.users.set(self.profiles[:3])
+        self.accounts = [
+            Account.objects.create(
+                name=f"Account {number}", email="a@example.com", org=self.org
+            )
+            for number in range(3)
+        ]
+        self.leads = [
+            Lead.objects.create(title=f"Lead {number}", org=self.org)
+            for number in range(3)
+        ]
+        for obj in self.accounts + self.leads:
+            obj.teams.add(self.team)
+        self.accounts[0].assigned_to.add(self.profiles[0], self.profiles[3])
+        self.untouched = Account.objects.create(
+            name="Other", email="o@example.com", org=self.org
+        )
+        self.untouched.assigned_to.add(self.profiles[0])
+
+    def assigned(self, obj):
+        return set(obj.assigned_to.values_list("id", flat=True))
+
+    def test_members_are_added_and_removed_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            update_team_users(self.team.id)
+        members = {profile.id for profile in self.profiles[:3]}
+        for obj in self.accounts[1:] + self.leads:
+            self.assertEqual(self.assigned(obj), members)
+        self.assertEqual(
+            self.assigned(self.accounts[0]), members | {self.profiles[3].id}
+        )
+        # One INSERT ... SELECT per object type, however many objects and
+        # members there are, and the calendar refreshes.
+        self.assertLessEqual(len(queries), 2 + len(TEAM_RELATIONS) + 4)
+        inserts = [query for query in queries if "INSERT" in query["sql"]]
+        self.assertEqual(len(inserts), len(TEAM_RELATIONS))
+
+        with CaptureQueriesContext(connection) as queries:
+            update_team_users(self.team.id)
+        # Nothing new to assign: no calendar to refresh either.
+        reads = [query for query in queries if query["sql"].startswith("SELECT")]
+        self.assertEqual(len(reads), 2)
+
+        remove_users([str(self.profiles[0].id), str(self.profiles[3].id)], self.team.id)
+        for obj in self.accounts + self.leads:
+            self.assertEqual(self.assigned(obj), members - {self.profiles[0].id})
+        self.assertEqual(self.assigned(self.untouched), {self.profiles[0].id})